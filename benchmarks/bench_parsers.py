@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+bench_parsers.py
+
+Compare net_parsers against the original regex parsers from
+multi_host_environment_settings_extractor.py on synthetic inputs:
+- ifconfig output with 1,000 interfaces
+- 'route -n' output with 100,000 routes
+
+Usage: python3 benchmarks/bench_parsers.py [--interfaces N] [--routes N] [--repeat N]
+"""
+import argparse
+import io
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import net_parsers
+
+
+# ---------------- Original parsers (reference) ----------------
+def legacy_parse_ifconfig(output):
+    interfaces = {}
+    blocks = re.split(r'\n(?=\S)', output.strip())
+
+    for block in blocks:
+        lines = block.splitlines()
+        if not lines:
+            continue
+
+        iface_line = lines[0]
+        iface_name = iface_line.split(":")[0].strip()
+
+        iface_data = {
+            "flags": None,
+            "inet": None,
+            "inet6": None,
+            "mac": None,
+        }
+
+        flags_match = re.search(r"<([^>]+)>", iface_line)
+        if flags_match:
+            iface_data["flags"] = flags_match.group(1).split(",")
+
+        for line in lines[1:]:
+            if "inet " in line:
+                match = re.search(r"inet (\d+\.\d+\.\d+\.\d+)", line)
+                if match:
+                    iface_data["inet"] = match.group(1)
+            elif "inet6 " in line:
+                match = re.search(r"inet6 ([0-9a-f:]+)", line)
+                if match:
+                    iface_data["inet6"] = match.group(1)
+            elif "ether " in line:
+                match = re.search(r"ether ([0-9a-f:]+)", line)
+                if match:
+                    iface_data["mac"] = match.group(1)
+
+        interfaces[iface_name] = iface_data
+
+    return interfaces
+
+
+def legacy_parse_route(output):
+    routes = []
+    lines = output.strip().splitlines()
+
+    for i, line in enumerate(lines):
+        if line.startswith("Destination"):
+            header_index = i
+            break
+    else:
+        return routes
+
+    for line in lines[header_index + 1:]:
+        parts = line.split()
+        if len(parts) >= 8:
+            routes.append({
+                "destination": parts[0],
+                "gateway": parts[1],
+                "genmask": parts[2],
+                "flags": parts[3],
+                "metric": int(parts[4]),
+                "ref": int(parts[5]),
+                "use": int(parts[6]),
+                "iface": parts[7],
+            })
+
+    return routes
+
+
+# ---------------- Synthetic inputs ----------------
+def make_ifconfig(count):
+    blocks = []
+    for i in range(count):
+        hi, lo = divmod(i, 256)
+        blocks.append(
+            f"veth{i}: flags=4163<UP,BROADCAST,RUNNING,MULTICAST>  mtu 1500\n"
+            f"        inet 10.{hi}.{lo}.1  netmask 255.255.255.0  broadcast 10.{hi}.{lo}.255\n"
+            f"        inet6 fe80::{i:x}:ff:fe00:1  prefixlen 64  scopeid 0x20<link>\n"
+            f"        ether 02:00:00:00:{hi:02x}:{lo:02x}  txqueuelen 1000  (Ethernet)\n"
+            f"        RX packets {i}  bytes {i * 64} (0.0 B)\n"
+            f"        RX errors 0  dropped 0  overruns 0  frame 0\n"
+            f"        TX packets {i}  bytes {i * 64} (0.0 B)\n"
+            f"        TX errors 0  dropped 0 overruns 0  carrier 0  collisions 0\n"
+        )
+    return "\n".join(blocks)
+
+
+def make_routes(count):
+    lines = [
+        "Kernel IP routing table",
+        "Destination     Gateway         Genmask         Flags Metric Ref    Use Iface",
+    ]
+    for i in range(count):
+        a, rest = divmod(i, 65536)
+        b, c = divmod(rest, 256)
+        lines.append(
+            f"10.{a}.{b}.{c}        192.0.2.1       255.255.255.255 UGH   {i % 10:<6} 0        0 eth{i % 4}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+# ---------------- Runner ----------------
+def best_of(repeat, funcs, text):
+    """
+    Best time of each func over `repeat` rounds. Rounds run every func in
+    turn, so load on the machine hits them alike rather than whichever ran
+    last. Returns ([seconds], [result]) in funcs order.
+    """
+    best = [float("inf")] * len(funcs)
+    results = [None] * len(funcs)
+    for _ in range(repeat):
+        for i, func in enumerate(funcs):
+            start = time.perf_counter()
+            results[i] = func(text)
+            best[i] = min(best[i], time.perf_counter() - start)
+    return best, results
+
+
+def compare(label, text, legacy, current, repeat):
+    (t_old, t_new, t_stream), (old, new, streamed) = best_of(
+        repeat, [legacy, current, lambda t: current(io.StringIO(t))], text
+    )
+    if not (old == new == streamed):
+        raise SystemExit(f"{label}: parser outputs differ")
+    print(f"{label:<22} legacy {t_old * 1000:9.1f} ms   "
+          f"net_parsers {t_new * 1000:9.1f} ms ({t_old / t_new:4.1f}x)   "
+          f"streamed {t_stream * 1000:9.1f} ms")
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--interfaces", type=int, default=1000)
+    p.add_argument("--routes", type=int, default=100000)
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args()
+
+    compare(f"ifconfig x{args.interfaces}", make_ifconfig(args.interfaces),
+            legacy_parse_ifconfig, net_parsers.parse_ifconfig, args.repeat)
+    compare(f"route -n x{args.routes}", make_routes(args.routes),
+            legacy_parse_route, net_parsers.parse_route, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
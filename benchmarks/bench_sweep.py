@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+bench_sweep.py
+
+Extractor sweep benchmark against fleet_sim.SimulatedFleet (no network).
+
+For 10/100/1000 simulated hosts it reports wall time, connections
+opened/reused, commands issued and CPU time per host, for batched and
+per-command collection.
+
+Usage: python3 benchmarks/bench_sweep.py [--sizes 10 100 1000] [--parallel N]
+                                         [--latency S] [--connect-latency S]
+                                         [--failure-rate P] [--backend net-tools|proc]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import fleet_sim
+import multi_host_environment_settings_extractor as extractor
+
+
+def sweep(size, args, batch):
+    fleet = fleet_sim.SimulatedFleet(
+        size, latency=args.latency, jitter=args.latency / 2,
+        connect_latency=args.connect_latency, failure_rate=args.failure_rate,
+    )
+    extractor.TRANSPORT = fleet
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    swept = extractor.collect_hosts(fleet.hosts, args.parallel, None, batch, verbose=False)
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    ok = sum(1 for _, collected in swept if all(v is not None for v in collected.values()))
+    return wall, cpu, fleet, ok
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    p.add_argument("--parallel", type=int, default=64)
+    p.add_argument("--latency", type=float, default=0.02, help="per-command latency (s)")
+    p.add_argument("--connect-latency", type=float, default=0.1, help="handshake latency (s)")
+    p.add_argument("--failure-rate", type=float, default=0.0)
+    p.add_argument("--backend", choices=sorted(extractor.BACKENDS), default="net-tools")
+    args = p.parse_args()
+
+    extractor.use_backend(args.backend)
+    print(f"backend={args.backend} parallel={args.parallel} latency={args.latency}s "
+          f"connect={args.connect_latency}s failure_rate={args.failure_rate}")
+    print(f"{'hosts':>6} {'mode':<10} {'wall s':>8} {'opened':>7} {'reused':>7} "
+          f"{'calls':>6} {'ok':>6} {'cpu ms/host':>12}")
+    for size in args.sizes:
+        for batch in (True, False):
+            wall, cpu, fleet, ok = sweep(size, args, batch)
+            stats = fleet.stats()
+            print(f"{size:>6} {'batched' if batch else 'per-cmd':<10} {wall:>8.2f} "
+                  f"{stats['opened']:>7} {stats['reused']:>7} {fleet.calls:>6} {ok:>6} "
+                  f"{cpu / size * 1000:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
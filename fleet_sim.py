@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+fleet_sim.py
+
+A simulated fleet that stands in for SSHTransport (see transport.py), so
+sweeps and orchestration can be benchmarked or regression-tested offline.
+
+SimulatedFleet(N) pretends to be N hosts named sim0000..simNNNN:
+- The first call to each host pays `connect_latency` (the handshake),
+  later calls reuse the "connection"; opened/reused are counted like
+  SSHPool does.
+- Every call pays `latency` plus up to `jitter` seconds, and fails with
+  probability `failure_rate` (raised as TransportError, like ssh exit 255).
+- ifconfig, 'route -n', /proc/net/route and the sysfs interface script
+  are answered with generated output (or canned text passed in), so all
+  extractor backends work. The extractor's batched scripts are unpacked
+  and answered section by section. Anything else succeeds with no output.
+
+Usage: python3 fleet_sim.py [N]   print ifconfig and route -n output of host N-1
+"""
+import ipaddress
+import random
+import re
+import socket
+import struct
+import sys
+import threading
+import time
+
+from transport import TransportError
+
+# The extractor frames each batched command as:
+#   echo '<marker> BEGIN <name>' / <command> / echo "<marker> END <name> $?"
+_BATCH_RE = re.compile(
+    r"^echo '(?P<marker>\S+) BEGIN (?P<name>\S+)'\n(?P<command>.*?)\n"
+    r"echo \"(?P=marker) END (?P=name) \$\?\"$",
+    re.MULTILINE | re.DOTALL,
+)
+
+
+class SimulatedFleet:
+    """N fake hosts with configurable latency, failures and command output."""
+
+    def __init__(self, size, latency=0.02, jitter=0.01, connect_latency=0.1,
+                 failure_rate=0.0, interfaces=4, routes=20, seed=0,
+                 ifconfig_text=None, route_text=None):
+        self.hosts = [f"sim{i:04d}" for i in range(size)]
+        self.latency = latency
+        self.jitter = jitter
+        self.connect_latency = connect_latency
+        self.failure_rate = failure_rate
+        self.interfaces = interfaces
+        self.routes = routes
+        self.ifconfig_text = ifconfig_text
+        self.route_text = route_text
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._connected = set()
+        self.opened = 0
+        self.reused = 0
+        self.calls = 0
+
+    # ---------- transport interface ----------
+    def _connect(self, host):
+        with self._lock:
+            self.calls += 1
+            first = host not in self._connected
+            if first:
+                self._connected.add(host)
+                self.opened += 1
+            else:
+                self.reused += 1
+            delay = self.latency + self._random.random() * self.jitter
+            failed = self._random.random() < self.failure_rate
+        time.sleep(delay + (self.connect_latency if first else 0))
+        if failed:
+            with self._lock:
+                self._connected.discard(host)
+            raise TransportError(f"simulated connection failure to {host}", 255)
+
+    def call(self, host, command, timeout=None):
+        self._connect(host)
+        return 0, self.respond(host, command)
+
+    def run(self, host, command, timeout=None):
+        return self.call(host, command, timeout)[1]
+
+    def copy_to(self, host, local_path, remote_path, timeout=None):
+        self._connect(host)
+
+    def copy_from(self, host, remote_path, local_path, timeout=None):
+        self._connect(host)
+        with open(local_path, "w"):
+            pass
+
+    def spawn(self, host, command):
+        raise TransportError("SimulatedFleet does not run long-lived remote processes")
+
+    def command_argv(self, host, command):
+        raise TransportError("SimulatedFleet does not run long-lived remote processes")
+
+    def stats(self):
+        with self._lock:
+            return {"opened": self.opened, "reused": self.reused}
+
+    def close(self):
+        with self._lock:
+            self._connected.clear()
+
+    # ---------- command output ----------
+    def respond(self, host, command):
+        """Output `host` would print for `command`."""
+        sections = list(_BATCH_RE.finditer(command))
+        if sections:
+            out = []
+            for m in sections:
+                out.append(f"{m['marker']} BEGIN {m['name']}\n")
+                out.append(self.respond(host, m["command"]))
+                out.append(f"{m['marker']} END {m['name']} 0\n")
+            return "".join(out)
+        if "/sys/class/net" in command:
+            return self.sysfs_output(host)
+        if "/proc/net/route" in command:
+            return self.proc_route_output(host)
+        if "ifconfig" in command:
+            return self.ifconfig_text or self.ifconfig_output(host)
+        if "route -n" in command:
+            return self.route_text or self.route_output(host)
+        return ""
+
+    def _index(self, host):
+        return int(host[3:]) if host.startswith("sim") and host[3:].isdigit() else 0
+
+    def _iface_addrs(self, host):
+        n = self._index(host)
+        for i in range(self.interfaces):
+            yield (f"eth{i}", f"10.{i}.{n // 256 % 256}.{n % 256 or 1}",
+                   f"02:00:{i:02x}:00:{n // 256 % 256:02x}:{n % 256:02x}",
+                   str(ipaddress.IPv6Address(f"fe80::{i:x}:ff:fe{n // 256 % 256:02x}:{n % 256:x}")))
+
+    def ifconfig_output(self, host):
+        blocks = []
+        for name, inet, mac, inet6 in self._iface_addrs(host):
+            blocks.append(
+                f"{name}: flags=4163<UP,BROADCAST,RUNNING,MULTICAST>  mtu 1500\n"
+                f"        inet {inet}  netmask 255.255.255.0  broadcast {inet.rsplit('.', 1)[0]}.255\n"
+                f"        inet6 {inet6}  prefixlen 64  scopeid 0x20<link>\n"
+                f"        ether {mac}  txqueuelen 1000  (Ethernet)\n"
+                f"        RX packets 0  bytes 0 (0.0 B)\n"
+            )
+        blocks.append(
+            "lo: flags=73<UP,LOOPBACK,RUNNING>  mtu 65536\n"
+            "        inet 127.0.0.1  netmask 255.0.0.0\n"
+            "        inet6 ::1  prefixlen 128  scopeid 0x10<host>\n"
+            "        loop  txqueuelen 1000  (Local Loopback)\n"
+        )
+        return "\n".join(blocks)
+
+    def sysfs_output(self, host):
+        lines = ["#sysfs"]
+        for name, _inet, mac, _inet6 in self._iface_addrs(host):
+            lines.append(f"link {name} 0x1003 1 1 {mac}")
+        lines.append("link lo 0x9 772 1 00:00:00:00:00:00")
+        lines.append("#inet6")
+        for i, (name, _inet, _mac, inet6) in enumerate(self._iface_addrs(host), start=2):
+            packed = socket.inet_pton(socket.AF_INET6, inet6)
+            lines.append(f"{packed.hex()} {i:02x} 40 20 80 {name:>8}")
+        lines.append(f"{'0' * 31}1 01 80 10 80 {'lo':>8}")
+        lines.append("#inet")
+        lines.append("1: lo    inet 127.0.0.1/8 scope host lo\\       valid_lft forever")
+        for i, (name, inet, _mac, _inet6) in enumerate(self._iface_addrs(host), start=2):
+            lines.append(f"{i}: {name}    inet {inet}/24 scope global {name}\\       valid_lft forever")
+        return "\n".join(lines) + "\n"
+
+    def _route_rows(self, host):
+        """(destination, gateway, genmask, flags, metric, iface) per route."""
+        n = self._index(host)
+        rows = [("0.0.0.0", f"10.0.{n // 256 % 256}.1", "0.0.0.0", "UG", 100, "eth0")]
+        for i in range(self.interfaces):
+            rows.append((f"10.{i}.{n // 256 % 256}.0", "0.0.0.0", "255.255.255.0", "U", 0, f"eth{i}"))
+        for i in range(max(0, self.routes - len(rows))):
+            rows.append((f"172.{16 + i // 256 % 16}.{i % 256}.0", f"10.0.{n // 256 % 256}.254",
+                         "255.255.255.0", "UG", 10, "eth0"))
+        return rows
+
+    def route_output(self, host):
+        lines = [
+            "Kernel IP routing table",
+            "Destination     Gateway         Genmask         Flags Metric Ref    Use Iface",
+        ]
+        for dest, gw, mask, flags, metric, iface in self._route_rows(host):
+            lines.append(f"{dest:<15} {gw:<15} {mask:<15} {flags:<5} {metric:<6} 0        0 {iface}")
+        return "\n".join(lines) + "\n"
+
+    def proc_route_output(self, host):
+        def hex_le(addr):
+            return "%08X" % struct.unpack("<L", socket.inet_aton(addr))[0]
+
+        flag_bits = {"U": 0x1, "G": 0x2}
+        lines = ["Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\t\tMTU\tWindow\tIRTT"]
+        for dest, gw, mask, flags, metric, iface in self._route_rows(host):
+            bits = sum(flag_bits[f] for f in flags)
+            lines.append(f"{iface}\t{hex_le(dest)}\t{hex_le(gw)}\t{bits:04X}\t0\t0\t{metric}\t"
+                         f"{hex_le(mask)}\t0\t0\t0")
+        return "\n".join(lines) + "\n"
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    fleet = SimulatedFleet(size, latency=0, jitter=0, connect_latency=0)
+    host = fleet.hosts[-1]
+    print(fleet.ifconfig_output(host))
+    print(fleet.route_output(host))
+
+
+if __name__ == "__main__":
+    main()
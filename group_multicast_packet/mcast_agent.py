@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+mcast_agent.py
+
+A long-lived multicast test agent: one per host, deployed once, driven by
+line-delimited JSON commands. Each command line gets exactly one JSON
+reply line ({"ok": true, ...} or {"ok": false, "error": ...}).
+
+    {"cmd": "ping"}
+    {"cmd": "join",  "group": G, "port": P, "iface": IP}   start listening (reply = joined)
+    {"cmd": "leave", "group": G, "port": P, "iface": IP}
+    {"cmd": "send",  "group": G, "port": P, "count": N, "rate": PPS, "size": B,
+                     "burst": N, "duration": S, "sender_id": ID, "iface": IP}
+                     or {"cmd": "send", ..., "msg": TEXT} for one plain datagram
+    {"cmd": "stats", "group": G, "port": P, "iface": IP, "reset": false}
+                     per-sender statistics as in recv_mcast.py's STATS summary
+    {"cmd": "quit"}
+
+Commands come from stdin, so `ssh host python3 mcast_agent.py` makes the
+ssh channel the control channel, or from TCP connections with --listen.
+"iface" is optional everywhere: without it, membership uses INADDR_ANY
+and the kernel picks the egress interface.
+Packets use send_mcast.py's HEADER and are counted with recv_mcast.py's
+SenderStats; both scripts must sit next to this one.
+
+Usage:
+    python3 mcast_agent.py [--id ID] [--iface IP]          commands on stdin
+    python3 mcast_agent.py --listen [HOST:]PORT            commands over TCP
+    python3 mcast_agent.py --local N [--count N] [--rate PPS]
+        Stand-in: start N agents on this machine (loopback multicast) and
+        run one send matrix through them.
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+
+from recv_mcast import DEFAULT_RCVBUF, IP_MULTICAST_ALL, SenderStats, kernel_drops, set_rcvbuf
+from send_mcast import HEADER, MAGIC, default_sender_id, send_stream
+
+class AgentError(Exception):
+    """An agent replied with ok: false, or the channel to it broke."""
+
+class Listener(threading.Thread):
+    """Joined (group, port, interface) socket feeding per-sender statistics."""
+
+    def __init__(self, group, port, iface=None, rcvbuf=DEFAULT_RCVBUF):
+        super().__init__(daemon=True)
+        self.group = group
+        self.port = port
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        set_rcvbuf(self.sock, rcvbuf)
+        try:
+            self.sock.bind((group, port))
+        except OSError:
+            self.sock.bind(("", port))
+        try:
+            # only the groups joined on this socket, not every group the host has joined
+            self.sock.setsockopt(socket.IPPROTO_IP, IP_MULTICAST_ALL, 0)
+        except OSError:
+            pass
+        mreq = socket.inet_aton(group) + socket.inet_aton(iface or "0.0.0.0")
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+        self.sock.settimeout(0.2)
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.text = 0
+        self.stopping = threading.Event()
+
+    def run(self):
+        buf = bytearray(65535)
+        header_size = HEADER.size
+        unpack_from = HEADER.unpack_from
+        wall_ns = time.time_ns
+        while not self.stopping.is_set():
+            try:
+                n, addr = self.sock.recvfrom_into(buf)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            recv_ns = wall_ns()
+            with self.lock:
+                if n >= header_size:
+                    magic, sender_id, seq, sent_ns = unpack_from(buf)
+                    if magic == MAGIC:
+                        sender = self.stats.get(sender_id)
+                        if sender is None:
+                            sender = self.stats[sender_id] = SenderStats(addr[0], seq)
+                        sender.add(seq, sent_ns, recv_ns)
+                        continue
+                self.text += 1
+
+    def summary(self, reset=False):
+        with self.lock:
+            senders = {str(sid): s.summary() for sid, s in self.stats.items()}
+            text = self.text
+            if reset:
+                self.stats = {}
+                self.text = 0
+        return {"senders": senders, "text": text, "kernel_drops": kernel_drops(self.sock)}
+
+    def stop(self):
+        self.stopping.set()
+        self.join()
+        self.sock.close()
+
+class Agent:
+    """Command handler; one per process, shared by all control connections."""
+
+    def __init__(self, sender_id=None, iface=None, rcvbuf=DEFAULT_RCVBUF):
+        self.iface = iface
+        # Without --id or --iface the id is resolved per send (see cmd_send)
+        if sender_id is None and iface:
+            sender_id = default_sender_id(iface)
+        self.sender_id = sender_id
+        self.rcvbuf = rcvbuf
+        self.listeners = {}
+        self.lock = threading.Lock()
+
+    def handle(self, request):
+        cmd = request.get("cmd")
+        handler = getattr(self, f"cmd_{cmd}", None)
+        if handler is None:
+            raise ValueError(f"unknown command {cmd!r}")
+        return handler(request)
+
+    def cmd_ping(self, request):
+        return {"host": platform.node(), "pid": os.getpid(), "sender_id": self.sender_id}
+
+    def _key(self, request):
+        return (request.get("group", "239.1.1.1"), int(request.get("port", 5000)),
+                request.get("iface"))
+
+    def cmd_join(self, request):
+        key = self._key(request)
+        with self.lock:
+            if key not in self.listeners:
+                listener = Listener(*key, rcvbuf=self.rcvbuf)
+                listener.start()
+                self.listeners[key] = listener
+        return {"group": key[0], "port": key[1], "iface": key[2]}
+
+    def cmd_leave(self, request):
+        key = self._key(request)
+        with self.lock:
+            listener = self.listeners.pop(key, None)
+        if listener:
+            listener.stop()
+        return {"left": listener is not None}
+
+    def cmd_send(self, request):
+        group = request.get("group", "239.1.1.1")
+        port = int(request.get("port", 5000))
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        try:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, int(request.get("ttl", 1)))
+            iface = request.get("iface", self.iface)
+            if iface:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(iface))
+            sock.connect((group, port))
+            if "msg" in request:
+                sock.send(request["msg"].encode())
+                return {"sent": 1}
+            sender_id = request.get("sender_id", self.sender_id)
+            if sender_id is None:
+                sender_id = default_sender_id(iface or None)
+            count, duration = request.get("count"), request.get("duration")
+            if count is None and duration is None:
+                count = 1
+            sent, dropped, elapsed = send_stream(
+                sock, int(request.get("size", HEADER.size)),
+                int(sender_id),
+                request.get("rate"), int(request.get("burst", 1)), count, duration,
+            )
+        finally:
+            sock.close()
+        return {"sent": sent, "dropped": dropped, "elapsed": round(elapsed, 6)}
+
+    def cmd_stats(self, request):
+        key = self._key(request)
+        listener = self.listeners.get(key)
+        if listener is None:
+            raise ValueError(f"not joined to {key[0]}:{key[1]} on {key[2] or 'any interface'}")
+        return listener.summary(bool(request.get("reset")))
+
+    def serve(self, rfile, wfile):
+        """Answer JSON command lines from `rfile` (bytes) on `wfile` until quit or EOF."""
+        for line in rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if request.get("cmd") == "quit":
+                    reply = {"ok": True}
+                else:
+                    reply = {"ok": True, **self.handle(request)}
+            except Exception as e:
+                request = {}
+                reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            wfile.write(json.dumps(reply).encode() + b"\n")
+            wfile.flush()
+            if request.get("cmd") == "quit":
+                break
+
+    def close(self):
+        with self.lock:
+            listeners, self.listeners = list(self.listeners.values()), {}
+        for listener in listeners:
+            listener.stop()
+
+class AgentClient:
+    """One agent's control channel: a subprocess's stdin/stdout or a TCP connection."""
+
+    def __init__(self, name, rfile, wfile, proc=None, sock=None):
+        self.name = name
+        self._rfile = rfile
+        self._wfile = wfile
+        self._proc = proc
+        self._sock = sock
+        self._lock = threading.Lock()
+
+    @classmethod
+    def spawn(cls, name, argv):
+        """Start an agent with `argv` (e.g. TRANSPORT.command_argv(host, ...))."""
+        proc = subprocess.Popen(argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        return cls(name, proc.stdout, proc.stdin, proc=proc)
+
+    @classmethod
+    def connect(cls, name, address, timeout=10):
+        sock = socket.create_connection(address, timeout)
+        return cls(name, sock.makefile("rb"), sock.makefile("wb"), sock=sock)
+
+    def request(self, cmd, **params):
+        with self._lock:
+            try:
+                self._wfile.write(json.dumps({"cmd": cmd, **params}).encode() + b"\n")
+                self._wfile.flush()
+                line = self._rfile.readline()
+            except OSError as e:
+                raise AgentError(f"{self.name}: {e}")
+        if not line:
+            raise AgentError(f"{self.name}: agent closed the channel")
+        reply = json.loads(line)
+        if not reply.pop("ok", False):
+            raise AgentError(f"{self.name}: {reply.get('error')}")
+        return reply
+
+    def close(self):
+        try:
+            self.request("quit")
+        except (AgentError, ValueError):
+            pass
+        for f in (self._wfile, self._rfile):
+            try:
+                f.close()
+            except OSError:
+                pass
+        if self._sock:
+            self._sock.close()
+        if self._proc:
+            try:
+                self._proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+
+def run_matrix(clients, group="239.1.1.1", port=5000, count=100, rate=None, size=HEADER.size,
+               timeout=5):
+    """
+    Every agent joins, then every agent sends `count` packets at once with
+    its index as sender id. Returns ({(sender, receiver): sender summary or
+    None}, {sender: error} for senders whose send request failed); waiting
+    stops as soon as each receiver has the last packet of every sender that
+    sent, or after `timeout` seconds.
+    """
+    for client in clients:
+        client.request("join", group=group, port=port)
+        client.request("stats", group=group, port=port, reset=True)
+
+    errors = {}
+    def send(i, client):
+        try:
+            client.request("send", group=group, port=port, count=count, rate=rate, size=size,
+                           sender_id=i)
+        except Exception as e:
+            errors[client.name] = str(e) or type(e).__name__
+
+    threads = [threading.Thread(target=send, args=(i, client)) for i, client in enumerate(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    sent = [i for i, client in enumerate(clients) if client.name not in errors]
+    deadline = time.monotonic() + timeout
+    while True:
+        seen = {c.name: c.request("stats", group=group, port=port)["senders"] for c in clients}
+        complete = all(
+            str(i) in senders and senders[str(i)]["last_seq"] == count - 1
+            for senders in seen.values() for i in sent
+        )
+        if complete or time.monotonic() >= deadline:
+            break
+        time.sleep(0.05)
+    matrix = {
+        (sender.name, receiver.name): seen[receiver.name].get(str(i))
+        for i, sender in enumerate(clients) for receiver in clients
+    }
+    return matrix, errors
+
+def print_matrix(matrix, names, count, errors=None):
+    errors = errors or {}
+    print(f"{'sender':<20} {'receiver':<20} {'received':>9} {'loss %':>8} {'lat us':>9} {'jitter us':>10}")
+    for sender in names:
+        if sender in errors:
+            print(f"{sender:<20} {'*':<20} send error: {errors[sender]}")
+            continue
+        for receiver in names:
+            s = matrix[(sender, receiver)]
+            if s is None:
+                print(f"{sender:<20} {receiver:<20} {0:>9} {100.0:>8.2f} {'-':>9} {'-':>10}")
+                continue
+            loss = 100.0 * (count - s["unique"]) / count
+            print(f"{sender:<20} {receiver:<20} {s['unique']:>9} {loss:>8.2f} "
+                  f"{s['latency_us']['mean']:>9.1f} {s['jitter_us']:>10.1f}")
+
+def parse_address(text):
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+def main():
+    p = argparse.ArgumentParser(description="Long-lived multicast test agent.")
+    p.add_argument("--id", type=int, help="default sender id (default: iface IP, else the hostname's address)")
+    p.add_argument("--iface", help="interface IP to send from")
+    p.add_argument("--rcvbuf", type=int, default=DEFAULT_RCVBUF)
+    p.add_argument("--listen", help="serve commands over TCP on [HOST:]PORT instead of stdin")
+    p.add_argument("--local", type=int, metavar="N", help="run N local agents and a test matrix")
+    p.add_argument("--group", default="239.1.1.1")
+    p.add_argument("--port", type=int, default=5000)
+    p.add_argument("--count", type=int, default=1000, help="packets per sender (--local)")
+    p.add_argument("--rate", type=float, help="packets per second per sender (--local)")
+    args = p.parse_args()
+
+    if args.local:
+        argv = [sys.executable, os.path.abspath(__file__)]
+        clients = [AgentClient.spawn(f"agent{i}", argv) for i in range(args.local)]
+        try:
+            started = time.perf_counter()
+            matrix, errors = run_matrix(clients, args.group, args.port, args.count, args.rate)
+            elapsed = time.perf_counter() - started
+        finally:
+            for client in clients:
+                client.close()
+        print_matrix(matrix, [c.name for c in clients], args.count, errors)
+        print(f"Matrix of {args.local} agents in {elapsed:.3f}s")
+        if errors:
+            sys.exit(1)
+        return
+
+    agent = Agent(args.id, args.iface, args.rcvbuf)
+    try:
+        if args.listen:
+            class Handler(socketserver.StreamRequestHandler):
+                def handle(self):
+                    agent.serve(self.rfile, self.wfile)
+
+            socketserver.ThreadingTCPServer.allow_reuse_address = True
+            with socketserver.ThreadingTCPServer(parse_address(args.listen), Handler) as server:
+                server.daemon_threads = True
+                print(f"READY listening on {args.listen}", flush=True)
+                server.serve_forever()
+        else:
+            agent.serve(sys.stdin.buffer, sys.stdout.buffer)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        agent.close()
+
+if __name__ == "__main__":
+    main()
@@ -11,17 +11,73 @@ What it does:
 - Copies send_mcast.py and recv_mcast.py to /tmp on each host
 - For each host in HOSTS, treats it as the sender:
     - starts recv_mcast.py on all other hosts (background, saves PID to /tmp/recv_mcast.pid)
+    - waits until every receiver has joined the group (/tmp/recv_mcast.ready)
     - runs send_mcast.py on the sender host (foreground, captures output)
+    - waits until every receiver has logged the packet
     - collects /tmp/recv_mcast.log from all receivers
     - kills remote receivers and cleans up /tmp files
 - Stores per-round logs locally under ./results/<sender-host>/
+
+With --matrix, receivers are started once on every host instead and all
+senders fire in one window, staggered by --stagger seconds. Each payload
+is tagged "cec-matrix from=<sender> slot=<i>", so the receiver logs give
+the whole sender x receiver matrix, written to ./results/matrix_<time>/matrix.csv.
+
+With --agent, one mcast_agent.py is started per host over ssh and kept
+for the whole run; --agent-rounds matrices of --agent-count sequenced
+packets per sender then cost only the packets and a few JSON lines per
+host. Loss/latency/jitter per pair go to ./results/agent_<time>/matrix.csv.
+
+With --sweep, receivers on every host join all --groups on all --ports
+and every host sends --sweep-count sequenced packets per (group, port,
+--sizes) combination. Pass sizes past the MTU to check fragmentation.
+Each receiver's final statistics are read back over ssh and merged into
+one cube: ./results/sweep_<time>/cube.csv, with one row per
+sender x receiver x group x port x size.
+
+With --interfaces DIR (implies --sweep), each host's latest
+{host}_ifconfig_*.json from the environment extractor's output DIR picks
+the interfaces to test: UP, MULTICAST, not LOOPBACK, with an IPv4
+address. Receivers join on every such interface, senders run one
+send_mcast.py per interface in parallel with IP_MULTICAST_IF bound to it,
+and the cube gets sender_iface/receiver_iface columns, so it shows which
+interface pairs share a multicast segment. Hosts without a snapshot fall
+back to the kernel's default interface.
+
+With --db FILE, --matrix, --agent and --sweep also append their results
+to an SQLite store (see mcast_results.py), one run per matrix, agent
+round or sweep, for per-host/per-pair summaries and run-over-run
+regressions across many runs.
+
+With --metrics DIR, deploy/start/wait/send/collect are timed per host
+and written to DIR/mcast_manager_<time>.json and DIR/mcast_manager.prom
+(see timing.py).
+
+Both waits poll on the remote side and return as soon as the condition
+holds; READY_TIMEOUT and RECV_TIMEOUT only bound how long a silent host
+can hold up a run.
 """
-import subprocess
+import argparse
+import csv
+import json
 import os
+import re
+import shlex
+import threading
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import timing
+from transport import SSHTransport, TransportError
+from mcast_results import ResultStore
+from multi_host_environment_settings_extractor import load_multicast_interfaces
+from mcast_agent import AgentClient, AgentError, run_matrix as run_agent_matrix
+from send_mcast import HEADER, MAX_UDP
+
 # ========== CONFIGURE ==========
 SSH_USER = "youruser"   # replace with your ssh username
 HOSTS = [
@@ -37,41 +93,118 @@ HOSTS = [
 REMOTE_DIR = "/tmp"
 SEND_SCRIPT = "send_mcast.py"
 RECV_SCRIPT = "recv_mcast.py"
+AGENT_SCRIPT = "mcast_agent.py"
 GROUP = "239.1.1.1"
 PORT = 5000
+MATRIX_TAG = "cec-matrix"
+READY_TIMEOUT = 10   # max seconds for a receiver to join the group
+RECV_TIMEOUT = 5     # max seconds for a packet to show up in a receiver log
 # ===============================
 
-def run(cmd, capture=False):
-    if capture:
-        return subprocess.check_output(cmd, shell=True, stderr=subprocess.STDOUT).decode()
-    else:
-        return subprocess.call(cmd, shell=True)
+# how ssh/scp reach the hosts; one multiplexed master connection per host.
+# Swap for transport.LocalTransport or fleet_sim.SimulatedFleet to run offline.
+TRANSPORT = SSHTransport(user=SSH_USER)
 
 def scp_to(host, local_path, remote_path):
-    cmd = f"scp {local_path} {SSH_USER}@{host}:{remote_path}"
-    print("SCP ->", cmd)
-    return run(cmd)
+    print("SCP ->", f"{local_path} {host}:{remote_path}")
+    try:
+        TRANSPORT.copy_to(host, local_path, remote_path)
+        return 0
+    except TransportError as e:
+        print("SCP failed:", e)
+        return e.status or 1
+
+def scp_from(host, remote_path, local_path):
+    print("SCP <-", f"{host}:{remote_path} {local_path}")
+    try:
+        TRANSPORT.copy_from(host, remote_path, local_path)
+        return 0
+    except TransportError as e:
+        print("SCP failed:", e)
+        return e.status or 1
+
+def ssh_call(host, remote_cmd):
+    """Run remote_cmd on host; (exit status, output), status 255 when ssh itself failed."""
+    print("SSH ->", f"{host}: {remote_cmd}")
+    try:
+        return TRANSPORT.call(host, remote_cmd)
+    except TransportError as e:
+        print("SSH failed:", e)
+        return 255, ""
 
 def ssh(host, remote_cmd, capture=False):
-    ssh_cmd = f"ssh {SSH_USER}@{host} \"{remote_cmd}\""
-    print("SSH ->", ssh_cmd)
-    return run(ssh_cmd, capture=capture)
+    status, output = ssh_call(host, remote_cmd)
+    return output if capture else status
+
+def on_hosts(fn, hosts, *args):
+    """Run fn(host, *args) on all hosts at once; results in host order."""
+    if not hosts:
+        return []
+    with ThreadPoolExecutor(max_workers=len(hosts)) as pool:
+        return list(pool.map(lambda h: fn(h, *args), hosts))
 
-def start_receivers(sender):
+def wait_remote(host, condition, timeout):
+    """Poll a shell `condition` on `host` until it holds; False after `timeout` seconds."""
+    cmd = (
+        f"end=$(( $(date +%s) + {int(timeout) + 1} )); "
+        f"until {condition}; do [ $(date +%s) -ge $end ] && exit 1; sleep 0.05; done"
+    )
+    return ssh(host, cmd) == 0
+
+def start_receiver(h, options=None):
+    # remote logfile, pidfile and ready file
+    remote_log = f"{REMOTE_DIR}/recv_mcast.log"
+    remote_pid = f"{REMOTE_DIR}/recv_mcast.pid"
+    remote_ready = f"{REMOTE_DIR}/recv_mcast.ready"
+    options = options or f"--group {GROUP} --port {PORT}"
+    # start in background with nohup and save PID
+    cmd = (
+        f"rm -f {remote_log} {remote_ready}; "
+        f"nohup python3 {REMOTE_DIR}/{RECV_SCRIPT} {options} --log {remote_log} "
+        f"--ready-file {remote_ready} > /dev/null 2>&1 & echo $! > {remote_pid}"
+    )
+    with timing.span("start", h):
+        ssh(h, cmd)
+
+def start_receivers(sender=None, options=None):
+    """
+    Start a receiver on every host but `sender` (all hosts when None) and
+    wait until they have joined the group. Returns the receiver hosts.
+    `options` replaces the default "--group GROUP --port PORT"; a dict
+    gives each host its own.
+    """
     print(f"Starting receivers (excluding sender: {sender})")
-    for h in HOSTS:
-        if h == sender:
-            continue
-        # remote logfile and pidfile
-        remote_log = f"{REMOTE_DIR}/recv_mcast.log"
-        remote_pid = f"{REMOTE_DIR}/recv_mcast.pid"
-        # start in background with nohup and save PID
-        cmd = (
-            f"nohup python3 {REMOTE_DIR}/{RECV_SCRIPT} --group {GROUP} --port {PORT} --log {remote_log} "
-            f"> /dev/null 2>&1 & echo $! > {remote_pid}"
+    receivers = [h for h in HOSTS if h != sender]
+    if not isinstance(options, dict):
+        options = dict.fromkeys(receivers, options)
+    on_hosts(lambda h: start_receiver(h, options[h]), receivers)
+
+    def wait_ready(h):
+        with timing.span("wait_ready", h):
+            return wait_remote(h, f"[ -f {REMOTE_DIR}/recv_mcast.ready ]", READY_TIMEOUT)
+
+    ready = on_hosts(wait_ready, receivers)
+    for h, ok in zip(receivers, ready):
+        if not ok:
+            print(f"[WARN] {h}: receiver not ready after {READY_TIMEOUT}s")
+    return receivers
+
+def wait_for_packets(receivers, expected=1):
+    """Wait until each receiver has logged `expected` distinct senders (any packet when 1)."""
+    remote_log = f"{REMOTE_DIR}/recv_mcast.log"
+    if expected == 1:
+        condition = f"grep -q RECV {remote_log} 2>/dev/null"
+    else:
+        condition = (
+            f"[ $(grep -o '{MATRIX_TAG} from=[^ ]*' {remote_log} 2>/dev/null | sort -u | wc -l) "
+            f"-ge {expected} ]"
         )
-        ssh(h, cmd)
-        time.sleep(0.05)
+
+    def wait_packets(h):
+        with timing.span("wait_packets", h):
+            return wait_remote(h, condition, RECV_TIMEOUT)
+
+    return on_hosts(wait_packets, receivers)
 
 def stop_receivers_and_collect(sender, results_dir):
     print("Collecting logs and stopping receivers")
@@ -81,42 +214,110 @@ def stop_receivers_and_collect(sender, results_dir):
             continue
         remote_log = f"{REMOTE_DIR}/recv_mcast.log"
         remote_pid = f"{REMOTE_DIR}/recv_mcast.pid"
+        remote_ready = f"{REMOTE_DIR}/recv_mcast.ready"
         local_log = os.path.join(results_dir, f"{h}_recv.log")
-        # scp the log if exists (ignore errors)
-        try:
-            scp_to(h, remote_log, local_log)  # scp local_path remote: but here we call reversed, fix:
-        except Exception:
-            pass
-        # because scp_to above expects local->remote, do a direct scp pull here:
-        try:
-            cmd = f"scp {SSH_USER}@{h}:{remote_log} {local_log}"
-            run(cmd)
-        except Exception:
-            pass
-        # kill the receiver process if pid file exists
-        try:
-            out = ssh(h, f"if [ -f {remote_pid} ]; then kill \"$(cat {remote_pid})\" 2>/dev/null || true; fi; rm -f {remote_pid} {remote_log}")
-        except Exception:
-            pass
+        with timing.span("collect", h):
+            # pull the log if it exists (errors are reported and ignored)
+            scp_from(h, remote_log, local_log)
+            # kill the receiver process if pid file exists
+            try:
+                out = ssh(h, f"if [ -f {remote_pid} ]; then kill \"$(cat {remote_pid})\" 2>/dev/null || true; fi; rm -f {remote_pid} {remote_log} {remote_ready}")
+            except Exception:
+                pass
+
+def stop_receiver_stats(h):
+    """Stop the receiver on `h` (SIGTERM), wait for its final summary and return it parsed."""
+    remote_log = f"{REMOTE_DIR}/recv_mcast.log"
+    remote_pid = f"{REMOTE_DIR}/recv_mcast.pid"
+    remote_ready = f"{REMOTE_DIR}/recv_mcast.ready"
+    remote_stats = f"{REMOTE_DIR}/recv_mcast.stats"
+    cmd = (
+        f"pid=$(cat {remote_pid} 2>/dev/null); [ -n \"$pid\" ] && kill $pid 2>/dev/null; i=0; "
+        f"while [ -n \"$pid\" ] && kill -0 $pid 2>/dev/null && [ $i -lt 100 ]; do sleep 0.05; i=$((i+1)); done; "
+        f"cat {remote_stats} 2>/dev/null; rm -f {remote_pid} {remote_log} {remote_ready} {remote_stats}"
+    )
+    with timing.span("collect", h):
+        out = ssh(h, cmd, capture=True)
+    try:
+        return json.loads(out.strip().splitlines()[-1])
+    except (ValueError, IndexError):
+        print(f"[WARN] {h}: no receiver statistics")
+        return None
 
-def run_sender(sender):
+def run_sender(sender, msg=None):
+    """Run send_mcast.py on `sender`; returns (exit status, output)."""
     print("Running sender on", sender)
     cmd = f"python3 {REMOTE_DIR}/{SEND_SCRIPT} --group {GROUP} --port {PORT}"
+    if msg is not None:
+        cmd += f" --msg {shlex.quote(msg)}"
     # run and capture output
-    out = ssh(sender, cmd, capture=True)
-    return out
+    with timing.span("send", sender):
+        return ssh_call(sender, cmd)
 
 def deploy_scripts():
     print("Copying scripts to all hosts")
     for h in HOSTS:
-        scp_to(h, SEND_SCRIPT, f"{REMOTE_DIR}/{SEND_SCRIPT}")
-        scp_to(h, RECV_SCRIPT, f"{REMOTE_DIR}/{RECV_SCRIPT}")
+        with timing.span("deploy", h):
+            scp_to(h, SEND_SCRIPT, f"{REMOTE_DIR}/{SEND_SCRIPT}")
+            scp_to(h, RECV_SCRIPT, f"{REMOTE_DIR}/{RECV_SCRIPT}")
+            scp_to(h, AGENT_SCRIPT, f"{REMOTE_DIR}/{AGENT_SCRIPT}")
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Multicast reachability test across HOSTS.")
+    p.add_argument("--matrix", action="store_true",
+                   help="run all senders in one window instead of one round per sender")
+    p.add_argument("--stagger", type=float, default=0.2,
+                   help="seconds between sender slots in --matrix mode (0 = all at once)")
+    p.add_argument("--agent", action="store_true",
+                   help="drive persistent mcast_agent.py processes instead of per-round scripts")
+    p.add_argument("--agent-rounds", type=int, default=1, help="matrices to run in --agent mode")
+    p.add_argument("--agent-count", type=int, default=100, help="packets per sender per matrix")
+    p.add_argument("--agent-rate", type=float, default=None, help="packets/s per sender")
+    p.add_argument("--sweep", action="store_true",
+                   help="sweep groups x ports x payload sizes in one pass")
+    p.add_argument("--groups", nargs="+", default=[GROUP], help="groups for --sweep")
+    p.add_argument("--ports", nargs="+", type=int, default=[PORT], help="ports for --sweep")
+    p.add_argument("--sizes", nargs="+", type=int, default=[64, 512, 1472, 1473, 4000, 9000],
+                   help=f"datagram sizes for --sweep ({HEADER.size}..{MAX_UDP})")
+    p.add_argument("--sweep-count", type=int, default=100,
+                   help="packets per sender per group/port/size")
+    p.add_argument("--sweep-rate", default="10k", help="packets/s per sender in --sweep")
+    p.add_argument("--interfaces", metavar="DIR", default=None,
+                   help="extractor output dir; sweep every multicast interface found there")
+    p.add_argument("--db", metavar="FILE", default=None,
+                   help="also store results in this SQLite file (mcast_results.py)")
+    p.add_argument("--metrics", metavar="DIR", default=None,
+                   help="write per-phase, per-host timings to DIR (JSON and Prometheus textfile)")
+    return p.parse_args()
 
 def main():
+    args = parse_args()
     # simple pre-check
     if SSH_USER == "youruser":
         print("Edit SSH_USER in the script before running.")
         sys.exit(1)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if args.metrics:
+        timing.enable()
+    try:
+        if args.sweep or args.interfaces:
+            run_sweep(args.groups, args.ports, args.sizes, args.sweep_count, args.sweep_rate,
+                      args.interfaces, args.db)
+        elif args.agent:
+            run_agents(args.agent_rounds, args.agent_count, args.agent_rate, args.db)
+        elif args.matrix:
+            run_matrix(args.stagger, args.db)
+        else:
+            run_rounds()
+    finally:
+        stats = TRANSPORT.stats()
+        TRANSPORT.close()
+        print(f"SSH connections opened: {stats['opened']}, reused: {stats['reused']}")
+        if args.metrics:
+            paths = timing.write_metrics(args.metrics, "mcast_manager", stamp)
+            print("Timings in", " and ".join(str(p) for p in paths))
+
+def run_rounds():
     deploy_scripts()
     base_results = Path("results")
     base_results.mkdir(exist_ok=True)
@@ -125,18 +326,268 @@ def main():
         print("Sender round:", sender)
         results_dir = base_results / sender
         results_dir.mkdir(exist_ok=True)
-        start_receivers(sender)
-        # give receivers a bit to join group
-        time.sleep(2)
-        sender_out = run_sender(sender)
+        receivers = start_receivers(sender)
+        status, sender_out = run_sender(sender)
+        if status != 0:
+            print(f"[WARN] {sender}: sender exited with status {status}")
         # write sender output
         with open(results_dir / "sender_output.txt", "w") as f:
             f.write(sender_out or "")
-        # wait a moment for receivers to log
-        time.sleep(1)
+        wait_for_packets(receivers)
         stop_receivers_and_collect(sender, str(results_dir))
         print(f"Round for sender {sender} complete. Logs in {results_dir}")
-        time.sleep(1)
+
+def matrix_payload(sender, slot):
+    return f"{MATRIX_TAG} from={sender} slot={slot}"
+
+_MATRIX_RE = re.compile(re.escape(MATRIX_TAG) + r" from=(\S+) slot=\d+")
+
+def read_matrix(results_dir):
+    """{(sender, receiver)} pairs that were heard, from the collected receiver logs."""
+    heard = set()
+    for h in HOSTS:
+        try:
+            with open(os.path.join(results_dir, f"{h}_recv.log")) as f:
+                for line in f:
+                    m = _MATRIX_RE.search(line)
+                    if m:
+                        heard.add((m.group(1), h))
+        except OSError:
+            pass
+    return heard
+
+def write_matrix(heard, path, errors=None):
+    """
+    Write the matrix as CSV: one row per sender, one column per receiver;
+    a sender in `errors` (its send failed) has "send error" in every cell.
+    """
+    errors = errors or {}
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["sender"] + HOSTS)
+        for sender in HOSTS:
+            if sender in errors:
+                writer.writerow([sender] + ["send error"] * len(HOSTS))
+            else:
+                writer.writerow([sender] + [int((sender, r) in heard) for r in HOSTS])
+
+def run_matrix(stagger, db=None):
+    deploy_scripts()
+    results_dir = Path("results") / f"matrix_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    results_dir.mkdir(parents=True, exist_ok=True)
+    receivers = start_receivers()
+
+    outputs = {}
+    errors = {}
+    def fire(slot, sender):
+        time.sleep(slot * stagger)
+        try:
+            status, outputs[sender] = run_sender(sender, matrix_payload(sender, slot))
+        except Exception as e:
+            errors[sender] = str(e) or type(e).__name__
+            return
+        if status != 0:
+            errors[sender] = f"exit status {status}"
+
+    senders = [threading.Thread(target=fire, args=(slot, h)) for slot, h in enumerate(HOSTS)]
+    for t in senders:
+        t.start()
+    for t in senders:
+        t.join()
+    with open(results_dir / "sender_output.txt", "w") as f:
+        for h in HOSTS:
+            f.write(f"--- {h}\n{outputs.get(h) or ''}")
+    wait_for_packets(receivers, expected=len(HOSTS))
+    stop_receivers_and_collect(None, str(results_dir))
+
+    heard = read_matrix(str(results_dir))
+    write_matrix(heard, results_dir / "matrix.csv", errors)
+    if db:
+        with ResultStore(db, "matrix") as store:
+            for sender in HOSTS:
+                if sender in errors:
+                    continue
+                for r in receivers:
+                    store.add(sender, r, 1, int((sender, r) in heard), group=GROUP, port=PORT)
+    print("="*60)
+    for sender in HOSTS:
+        if sender in errors:
+            print(f"{sender:<30} send error: {errors[sender]}")
+            continue
+        row = " ".join("x" if (sender, r) in heard else "." for r in HOSTS)
+        print(f"{sender:<30} {row}")
+    print(f"Matrix: {len(heard)}/{len(HOSTS) ** 2} pairs heard. Results in {results_dir}")
+    if errors:
+        print(f"[ERROR] {len(errors)} senders failed to send: {', '.join(errors)}")
+        sys.exit(1)
+
+def run_agents(rounds, count, rate, db=None):
+    deploy_scripts()
+    results_dir = Path("results") / f"agent_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    results_dir.mkdir(parents=True, exist_ok=True)
+    clients = [
+        AgentClient.spawn(h, TRANSPORT.command_argv(h, f"python3 {REMOTE_DIR}/{AGENT_SCRIPT}"))
+        for h in HOSTS
+    ]
+    failed = {}
+    try:
+        with open(results_dir / "matrix.csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["round", "sender", "receiver", "received", "loss_pct",
+                             "latency_mean_us", "jitter_us", "error"])
+            for n in range(rounds):
+                started = time.perf_counter()
+                with timing.span("agent_matrix"):
+                    matrix, errors = run_agent_matrix(clients, GROUP, PORT, count, rate,
+                                                      timeout=RECV_TIMEOUT)
+                if db:
+                    with ResultStore(db, "agent") as store:
+                        for (sender, receiver), s in matrix.items():
+                            if sender not in errors:
+                                store.add_summary(sender, receiver, count, s, group=GROUP, port=PORT)
+                heard = 0
+                for (sender, receiver), s in matrix.items():
+                    if sender in errors:
+                        writer.writerow([n, sender, receiver, "", "", "", "", "send error"])
+                        continue
+                    if s is None:
+                        writer.writerow([n, sender, receiver, 0, 100.0, "", "", ""])
+                        continue
+                    heard += 1
+                    writer.writerow([n, sender, receiver, s["unique"],
+                                     round(100.0 * (count - s["unique"]) / count, 4),
+                                     s["latency_us"]["mean"], s["jitter_us"], ""])
+                print(f"Round {n}: {heard}/{len(HOSTS) ** 2} pairs heard "
+                      f"in {time.perf_counter() - started:.2f}s")
+                for sender, error in errors.items():
+                    print(f"[ERROR] Round {n}: {sender} failed to send: {error}")
+                failed.update(errors)
+    except AgentError as e:
+        print("Agent failed:", e)
+        failed["agent"] = str(e)
+    finally:
+        for client in clients:
+            client.close()
+    print(f"Results in {results_dir}")
+    if failed:
+        sys.exit(1)
+
+def host_interfaces(base_dir):
+    """
+    {host: [interface IPv4]} from the extractor snapshots in base_dir, one
+    address per interface (memberships are per interface, not per address).
+    Hosts with no usable interface map to [None], the kernel's default.
+    """
+    interfaces = {}
+    for h in HOSTS:
+        found = load_multicast_interfaces(base_dir, h)
+        if not found:
+            print(f"[WARN] {h}: no multicast interface in {base_dir}, using the default")
+        interfaces[h] = [addresses[0] for addresses in found.values()] or [None]
+    return interfaces
+
+def run_sweep(groups, ports, sizes, count, rate, interfaces_dir=None, db=None):
+    deploy_scripts()
+    results_dir = Path("results") / f"sweep_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    results_dir.mkdir(parents=True, exist_ok=True)
+    sizes = [min(max(size, HEADER.size), MAX_UDP) for size in sizes]
+    targets = " ".join([f"--group {g}" for g in groups] + [f"--port {p}" for p in ports])
+    interfaces = host_interfaces(interfaces_dir) if interfaces_dir else dict.fromkeys(HOSTS, [None])
+    receivers = start_receivers(options={
+        h: " ".join([targets] + [f"--iface {ip}" for ip in interfaces[h] if ip]
+                    + [f"--expect {count} --stats-file {REMOTE_DIR}/recv_mcast.stats"])
+        for h in HOSTS
+    })
+
+    outputs = {}
+    errors = {}
+    def sweep(slot, sender):
+        cmd = (f"python3 {REMOTE_DIR}/{SEND_SCRIPT} {targets} "
+               + " ".join(f"--size {size}" for size in sizes)
+               + f" --count {count} --rate {shlex.quote(str(rate))} --sender-id {slot}")
+        # one sender process per interface, all at once; fails if any of them does
+        script = "pids=; " + " ".join(
+            f"({cmd}{f' --iface {ip}' if ip else ''}) & pids=\"$pids $!\";" for ip in interfaces[sender]
+        ) + " s=0; for p in $pids; do wait $p || s=$?; done; exit $s"
+        try:
+            with timing.span("send", sender):
+                status, outputs[sender] = ssh_call(sender, script)
+        except Exception as e:
+            errors[sender] = str(e) or type(e).__name__
+            return
+        if status != 0:
+            errors[sender] = f"exit status {status}"
+
+    print(f"Sweeping {len(groups)} groups x {len(ports)} ports x {len(sizes)} sizes from {len(HOSTS)} hosts")
+    senders = [threading.Thread(target=sweep, args=(slot, h)) for slot, h in enumerate(HOSTS)]
+    for t in senders:
+        t.start()
+    for t in senders:
+        t.join()
+    with open(results_dir / "sender_output.txt", "w") as f:
+        for h in HOSTS:
+            f.write(f"--- {h}\n{outputs.get(h) or ''}")
+
+    summaries = dict(zip(receivers, on_hosts(stop_receiver_stats, receivers)))
+    lossless = {size: 0 for size in sizes}
+    cells = 0
+    store = ResultStore(db, "sweep") if db else None
+    with open(results_dir / "cube.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["sender", "sender_iface", "receiver", "receiver_iface", "group", "port",
+                         "size", "sent", "received", "loss_pct", "latency_mean_us", "jitter_us",
+                         "reordered", "duplicates", "error"])
+        # senders bound to an interface are told apart by source address; for
+        # the rest (no snapshot) it is whatever the kernel picked, so key on None
+        bound = {slot for slot, h in enumerate(HOSTS) if interfaces[h] != [None]}
+        for r in receivers:
+            streams = {
+                (s["sender"], s["addr"] if s["sender"] in bound else None, s["iface"],
+                 s["group"], s["port"], s["size"]): s
+                for s in (summaries[r] or {}).get("streams", [])
+            }
+            for slot, sender in enumerate(HOSTS):
+                for sender_iface in interfaces[sender]:
+                    for receiver_iface in interfaces[r]:
+                        receiver_iface = receiver_iface or "0.0.0.0"
+                        cells += 1
+                        for size in sizes:
+                            for port in ports:
+                                for group in groups:
+                                    s = streams.get((slot, sender_iface, receiver_iface,
+                                                     group, port, size))
+                                    row = [sender, sender_iface or "", r, receiver_iface,
+                                           group, port, size, count]
+                                    if sender in errors:
+                                        writer.writerow(row + ["", "", "", "", "", "", "send error"])
+                                        continue
+                                    if store:
+                                        store.add_summary(sender, r, count, s,
+                                                          sender_iface=sender_iface,
+                                                          receiver_iface=receiver_iface,
+                                                          group=group, port=port, size=size)
+                                    if s is None:
+                                        writer.writerow(row + [0, 100.0, "", "", 0, 0, ""])
+                                        continue
+                                    if s["unique"] >= count:
+                                        lossless[size] += 1
+                                    writer.writerow(row + [
+                                        s["unique"],
+                                        round(100.0 * max(0, count - s["unique"]) / count, 4),
+                                        s["latency_us"]["mean"], s["jitter_us"], s["reordered"],
+                                        s["duplicates"], "",
+                                    ])
+    if store:
+        store.close()
+    cells *= len(groups) * len(ports)
+    print("="*60)
+    for size in sizes:
+        print(f"size {size:>5}B: {lossless[size]}/{cells} sender/receiver/group/port cells lossless")
+    print(f"Cube in {results_dir / 'cube.csv'}")
+    if errors:
+        for sender, error in errors.items():
+            print(f"[ERROR] {sender} failed to send: {error}")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -1,47 +1,365 @@
 #!/usr/bin/env python3
 """
 recv_mcast.py
-Usage: python3 recv_mcast.py [--group GROUP] [--port PORT] [--log LOGFILE]
+Usage: python3 recv_mcast.py [--group GROUP ...] [--port PORT ...] [--iface IP ...]
+                             [--log LOGFILE] [--ready-file PATH]
+                             [--duration S] [--stats-interval S] [--stats-file PATH]
+                             [--rcvbuf BYTES] [--binary-log PATH] [--expect N]
 This will block and print received messages; intended to be run in background (nohup).
+--group, --port and --iface can be repeated: every group is joined on
+every port and every interface (INADDR_ANY when no --iface), with one
+socket per (group, port, interface), all served by one selector loop.
+Once every group is joined it prints READY and creates --ready-file, so an
+orchestrator can start sending without guessing how long startup takes.
+
+Packets from send_mcast.py's load mode (they start with its HEADER) are
+not logged one by one. They feed statistics per stream, meaning per
+(group, port, interface, source address, sender id, datagram size):
+received, lost, duplicated, reordered, gaps, one-way latency histogram
+and RFC 3550 jitter, all in constant memory per sender. The summary is
+one JSON object, printed as a "STATS {...}" line and written to
+--stats-file, every --stats-interval seconds and when the receiver stops
+(SIGTERM, Ctrl-C or --duration), also when nothing arrived: a joined
+group that heard no sender is listed with "sender": null and zero
+received. On SIGTERM, datagrams already queued on the sockets are read
+before the final summary.
+
+A receiver only sees the sequence numbers that arrived, so by default
+"lost" counts the gaps between the first and the last one: packets lost
+at the end of a stream (or before its first arrival) are not in it.
+With --expect N, the number of packets each sender sends (seq 0..N-1,
+as with send_mcast.py --count N), "lost" and "loss_pct" are against N
+and the summary carries "expected": N.
+
+Latency is receive time minus the sender's time.time_ns stamp, so it
+includes any clock offset between the two hosts.
+
+The receive loop is built to keep up at high packet rates so drops are
+the network's, not this script's. It asks for a large socket buffer
+(--rcvbuf) and receives into one preallocated buffer. It checks the
+clock once per batch of packets. The logs stay open and are flushed
+every TICK. --binary-log appends one RECORD per sequenced packet. The
+summary includes the kernel's drop counter for the socket (from
+/proc/net/udp), next to the application-level loss.
 """
 import socket
 import struct
 import argparse
+import json
+import os
+import platform
+import selectors
+import signal
+import sys
 import time
 
-def main():
-    p = argparse.ArgumentParser()
-    p.add_argument("--group", default="239.1.1.1")
-    p.add_argument("--port", type=int, default=5000)
-    p.add_argument("--log", default=None)
-    args = p.parse_args()
+from send_mcast import HEADER, MAGIC
+
+DEFAULT_RCVBUF = 4 << 20
+SO_RCVBUFFORCE = getattr(socket, "SO_RCVBUFFORCE", 33)  # Linux; lets root exceed rmem_max
+IP_MULTICAST_ALL = getattr(socket, "IP_MULTICAST_ALL", 49)  # Linux; 0: only groups joined here
+BATCH = 1024   # packets received between clock checks
+TICK = 0.1     # socket timeout and log flush interval, seconds
+LOG_BUFFER = 1 << 20
+# binary log record: sender id, seq, send time ns, receive time ns
+RECORD = struct.Struct("!IQQQ")
+WINDOW = 4096  # sequence numbers behind the highest seen that can still be told apart
+WINDOW_MASK = (1 << WINDOW) - 1
+LATENCY_BUCKETS = 40  # log2 microsecond buckets: up to ~2^39 us
+
+class SenderStats:
+    """Running statistics for one sender id."""
+
+    def __init__(self, addr, seq):
+        self.addr = addr
+        self.first_seq = self.max_seq = seq
+        self.seen = 0  # bit i set: max_seq - i has been received
+        self.received = self.unique = 0
+        self.duplicates = self.reordered = self.late = 0
+        self.gaps = self.max_gap = 0
+        self.lat_min = self.lat_max = None
+        self.lat_sum = 0
+        self.lat_negative = 0
+        self.hist = [0] * LATENCY_BUCKETS
+        self.jitter = 0.0
+        self.transit = None
+
+    def add(self, seq, sent_ns, recv_ns):
+        self.received += 1
+        offset = self.max_seq - seq
+        if offset < 0:
+            # new highest sequence number; anything skipped is a gap (for now)
+            if offset < -1:
+                self.gaps += 1
+                self.max_gap = max(self.max_gap, -offset - 1)
+            if -offset >= WINDOW:
+                # jumped past the whole window (seq is 64-bit: never shift by it)
+                self.seen = 1
+            else:
+                self.seen = ((self.seen << -offset) | 1) & WINDOW_MASK
+            self.max_seq = seq
+        elif offset >= WINDOW:
+            # too old to check against the window; counted once, not as a duplicate
+            self.late += 1
+            self.first_seq = min(self.first_seq, seq)
+        elif self.seen >> offset & 1:
+            self.duplicates += 1
+            return
+        else:
+            self.seen |= 1 << offset
+            if self.unique:
+                self.reordered += 1
+            self.first_seq = min(self.first_seq, seq)
+        self.unique += 1
+
+        transit = recv_ns - sent_ns
+        if self.transit is not None:
+            # RFC 3550 interarrival jitter
+            self.jitter += (abs(transit - self.transit) - self.jitter) / 16
+        self.transit = transit
+        self.lat_sum += transit
+        if self.lat_min is None or transit < self.lat_min:
+            self.lat_min = transit
+        if self.lat_max is None or transit > self.lat_max:
+            self.lat_max = transit
+        if transit < 0:
+            self.lat_negative += 1
+        else:
+            self.hist[min((transit // 1000).bit_length(), LATENCY_BUCKETS - 1)] += 1
+
+    def summary(self, expected=None):
+        """
+        Statistics as a dict. Without `expected` (packets the sender sent),
+        loss only covers gaps between the first and last sequence seen.
+        """
+        if expected is None:
+            span = self.max_seq - self.first_seq + 1
+        else:
+            span = max(expected, 1)
+        return {
+            "addr": self.addr,
+            "received": self.received,
+            "unique": self.unique,
+            "expected": expected,
+            "lost": max(0, span - self.unique),
+            "loss_pct": round(100.0 * max(0, span - self.unique) / span, 4),
+            "duplicates": self.duplicates,
+            "reordered": self.reordered,
+            "late": self.late,
+            "gaps": self.gaps,
+            "max_gap": self.max_gap,
+            "first_seq": self.first_seq,
+            "last_seq": self.max_seq,
+            "latency_us": {
+                "min": self.lat_min / 1000 if self.lat_min is not None else None,
+                "mean": round(self.lat_sum / self.unique / 1000, 3) if self.unique else None,
+                "max": self.lat_max / 1000 if self.lat_max is not None else None,
+                "negative": self.lat_negative,
+                # bucket "N": N/2 <= latency < N microseconds ("1": under 1 us)
+                "hist": {str(1 << b): n for b, n in enumerate(self.hist) if n},
+            },
+            "jitter_us": round(self.jitter / 1000, 3),
+        }
+
+def set_rcvbuf(sock, size):
+    """Ask for a `size` byte receive buffer; returns what the kernel granted."""
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, SO_RCVBUFFORCE, size)
+    except OSError:
+        # not root: capped at net.core.rmem_max
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+    return sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
 
-    mcast_grp = args.group
-    mcast_port = args.port
+def kernel_drops(sock):
+    """Datagrams the kernel dropped for this socket (last /proc/net/udp column), or None."""
+    inode = str(os.fstat(sock.fileno()).st_ino)
+    try:
+        with open("/proc/net/udp") as f:
+            next(f)
+            for line in f:
+                fields = line.split()
+                if fields[9] == inode:
+                    return int(fields[-1])
+    except (OSError, IndexError, ValueError, StopIteration):
+        pass
+    return None
 
+def open_socket(group, port, rcvbuf, iface="0.0.0.0"):
+    """
+    Non-blocking socket joined to `group` on interface address `iface` that
+    only receives that group, on that interface, on `port`.
+    """
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
     # allow reuse
     sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    set_rcvbuf(sock, rcvbuf)
     # bind to the multicast group address and port
     try:
-        sock.bind((mcast_grp, mcast_port))
+        sock.bind((group, port))
     except Exception:
         # Some kernels require binding to '' instead
-        sock.bind(('', mcast_port))
+        sock.bind(('', port))
+    try:
+        sock.setsockopt(socket.IPPROTO_IP, IP_MULTICAST_ALL, 0)
+    except OSError:
+        pass
 
-    mreq = struct.pack("4sl", socket.inet_aton(mcast_grp), socket.INADDR_ANY)
+    mreq = socket.inet_aton(group) + socket.inet_aton(iface)
     sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+    sock.setblocking(False)
+    return sock
 
-    prefix = f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] "
-    out = []
-    while True:
-        data, addr = sock.recvfrom(4096)
-        line = f"{prefix}RECV from {addr}: {data.decode(errors='replace')}"
-        if args.log:
-            with open(args.log, "a") as f:
-                f.write(line + "\n")
-        else:
-            print(line)
+def silent_stream(group, port, iface, expected=None):
+    """Summary entry for a joined (group, port, interface) that received nothing."""
+    return {"group": group, "port": port, "iface": iface, "sender": None, "size": None,
+            "addr": None, "received": 0, "unique": 0, "expected": expected, "lost": expected,
+            "loss_pct": 100.0,
+            "duplicates": 0, "reordered": 0, "late": 0, "gaps": 0, "max_gap": 0,
+            "first_seq": None, "last_seq": None,
+            "latency_us": {"min": None, "mean": None, "max": None, "negative": 0, "hist": {}},
+            "jitter_us": None}
+
+def write_stats(stats, path, started, socks, joined, expected=None):
+    """
+    Print the per-stream summary as one STATS line and write it to `path`.
+    Every joined (group, port, interface) in `joined` without a stream gets
+    a zero-received entry (sender null), so silence is reported, not omitted.
+    `expected` is the packet count per sender, when known (--expect).
+    """
+    drops = [kernel_drops(sock) for sock in socks]
+    heard = {key[:3] for key in stats}
+    summary = {
+        "receiver": platform.node(),
+        "time": time.time(),
+        "elapsed": round(time.monotonic() - started, 3),
+        "rcvbuf": socks[0].getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF),
+        "kernel_drops": sum(drops) if None not in drops else None,
+        "streams": [
+            {"group": group, "port": port, "iface": iface, "sender": sender_id, "size": size,
+             **s.summary(expected)}
+            for (group, port, iface, _addr, sender_id, size), s in stats.items()
+        ] + [silent_stream(*dest, expected) for dest in joined if dest not in heard],
+    }
+    line = json.dumps(summary, separators=(",", ":"))
+    print(f"STATS {line}", flush=True)
+    if path:
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(line + "\n")
+        os.replace(tmp, path)
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--group", action="append", help="group to join (repeatable; default 239.1.1.1)")
+    p.add_argument("--port", type=int, action="append", help="port (repeatable; default 5000)")
+    p.add_argument("--iface", action="append",
+                   help="interface address to join on (repeatable; default: any)")
+    p.add_argument("--log", default=None)
+    p.add_argument("--ready-file", default=None, help="created once the groups are joined")
+    p.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    p.add_argument("--stats-interval", type=float, default=None,
+                   help="also emit the summary every this many seconds")
+    p.add_argument("--stats-file", default=None, help="where to write the latest JSON summary")
+    p.add_argument("--rcvbuf", type=int, default=DEFAULT_RCVBUF,
+                   help="socket receive buffer bytes")
+    p.add_argument("--binary-log", default=None,
+                   help="append a RECORD per sequenced packet to this file")
+    p.add_argument("--expect", type=int, default=None,
+                   help="packets each sender sends; loss is counted against it")
+    args = p.parse_args()
+
+    groups = args.group or ["239.1.1.1"]
+    ports = args.port or [5000]
+    ifaces = args.iface or ["0.0.0.0"]
+    sel = selectors.DefaultSelector()
+    socks = []
+    joined = []
+    for mcast_port in ports:
+        for mcast_grp in groups:
+            for iface in ifaces:
+                sock = open_socket(mcast_grp, mcast_port, args.rcvbuf, iface)
+                sel.register(sock, selectors.EVENT_READ, (mcast_grp, mcast_port, iface))
+                socks.append(sock)
+                joined.append((mcast_grp, mcast_port, iface))
+
+    # SIGTERM (kill from the manager): read what is already queued, then stop.
+    # Installed before READY, since a manager may signal as soon as it sees it.
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+
+    # joined: tell whoever is waiting
+    if args.ready_file:
+        open(args.ready_file, "w").close()
+    print("READY", flush=True)
+
+    stats = {}
+    started = time.monotonic()
+    deadline = started + args.duration if args.duration else None
+    next_report = started + args.stats_interval if args.stats_interval else None
+    next_flush = started + TICK
+    log = open(args.log, "a", buffering=LOG_BUFFER) if args.log else sys.stdout
+    binary_log = open(args.binary_log, "ab", buffering=LOG_BUFFER) if args.binary_log else None
+
+    buf = bytearray(65535)
+    header_size = HEADER.size
+    unpack_from = HEADER.unpack_from
+    pack_record = RECORD.pack
+    wall_ns = time.time_ns
+
+    def receive(sock, dest):
+        """Read up to BATCH queued datagrams from one socket; True if it may have more."""
+        recv_into = sock.recvfrom_into
+        for _ in range(BATCH):
+            try:
+                n, addr = recv_into(buf)
+            except BlockingIOError:
+                return False
+            recv_ns = wall_ns()
+            if n >= header_size:
+                magic, sender_id, seq, sent_ns = unpack_from(buf)
+                if magic == MAGIC:
+                    key = (*dest, addr[0], sender_id, n)
+                    stream = stats.get(key)
+                    if stream is None:
+                        stream = stats[key] = SenderStats(addr[0], seq)
+                    stream.add(seq, sent_ns, recv_ns)
+                    if binary_log:
+                        binary_log.write(pack_record(sender_id, seq, sent_ns, recv_ns))
+                    continue
+            text = buf[:n].decode(errors="replace")
+            log.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] RECV from {addr}: {text}\n")
+        return True
+
+    try:
+        while True:
+            now = time.monotonic()
+            if stopping or (deadline is not None and now >= deadline):
+                for key in sel.get_map().values():
+                    while receive(key.fileobj, key.data):
+                        pass
+                break
+            if next_report is not None and now >= next_report:
+                write_stats(stats, args.stats_file, started, socks, joined, args.expect)
+                next_report += args.stats_interval
+            if now >= next_flush:
+                log.flush()
+                if binary_log:
+                    binary_log.flush()
+                next_flush = now + TICK
+            for key, _ in sel.select(TICK):
+                receive(key.fileobj, key.data)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        write_stats(stats, args.stats_file, started, socks, joined, args.expect)
+        log.flush()
+        if log is not sys.stdout:
+            log.close()
+        if binary_log:
+            binary_log.close()
+        sel.close()
+        for sock in socks:
+            sock.close()
 
 if __name__ == "__main__":
     main()
@@ -1,46 +1,174 @@
 #!/usr/bin/env python3
 """
 send_mcast.py
-Usage: python3 send_mcast.py [--iface IFACE_IP] [--group GROUP] [--port PORT] [--msg MESSAGE]
+Usage: python3 send_mcast.py [--iface IFACE_IP ...] [--group GROUP] [--port PORT] [--msg MESSAGE]
+       python3 send_mcast.py [--rate PPS | --bitrate BPS] [--size BYTES] [--burst N]
+                             [--count N] [--duration S] [--sender-id ID] [--df] ...
+
+Without load options it sends --msg once. With --rate, --bitrate, --count
+or --duration it sends a stream of --size byte datagrams, each starting
+with a HEADER (magic, sender id, sequence number, send time in ns since
+the epoch) followed by zero padding. Packets go out in bursts of --burst,
+paced on perf_counter_ns: it sleeps while well ahead of schedule and spins
+for the last stretch, and if it falls behind it sends back to back until
+caught up, so the average rate holds. --rate/--bitrate accept k/M/G
+suffixes (e.g. --bitrate 200M).
+
+--iface, --group, --port and --size can be repeated to sweep every
+combination, one after another (--count/--duration apply to each).
+Without --iface the kernel picks the egress interface from the routing
+table. The default --sender-id is the first --iface address, or the
+host's address from its hostname; without either it refuses to send
+rather than guess. Sizes past the path MTU are fragmented by the kernel,
+unless --df is given; then they fail locally (EMSGSIZE) and are reported
+as such.
 """
+import errno
 import socket
 import argparse
+import struct
+import time
+
+# magic, sender id, sequence number, send time (time.time_ns)
+HEADER = struct.Struct("!4sIQQ")
+MAGIC = b"CECM"
+MAX_UDP = 65507  # largest IPv4 UDP payload
+SPIN_NS = 200_000  # finish the wait by spinning when the next burst is this close
+
+def default_sender_id(iface=None):
+    """
+    Sender id carried in load-mode headers: the interface address sent
+    from, else this host's address as resolved from its hostname (no
+    default route needed). ValueError when neither gives a non-loopback
+    IPv4 address.
+    """
+    address = iface
+    if address is None:
+        name = socket.gethostname()
+        try:
+            address = socket.gethostbyname(name)
+        except OSError as e:
+            raise ValueError(f"cannot resolve {name} ({e}); pass --iface or --sender-id")
+        if address.startswith("127."):
+            raise ValueError(f"{name} resolves to loopback {address}; pass --iface or --sender-id")
+    return struct.unpack("!I", socket.inet_aton(address))[0]
+
+def parse_rate(text):
+    """'100000', '100k', '1.5M', '1G' -> float."""
+    scale = {"k": 1e3, "K": 1e3, "m": 1e6, "M": 1e6, "g": 1e9, "G": 1e9}
+    if text and text[-1] in scale:
+        return float(text[:-1]) * scale[text[-1]]
+    return float(text)
 
-def get_primary_ip():
-    # Attempt to find primary interface by connecting to a public IP (no traffic sent).
-    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+def send_stream(sock, size, sender_id, rate=None, burst=1, count=None, duration=None):
+    """
+    Send sequenced datagrams of `size` bytes on a connected socket at `rate`
+    packets/s (unpaced when None) until `count` packets or `duration`
+    seconds. Returns (sent, dropped, elapsed seconds); sends refused with
+    ENOBUFS/EAGAIN are counted as dropped.
+    """
+    buf = bytearray(max(size, HEADER.size))
+    pack_into = HEADER.pack_into
+    send = sock.send
+    perf_ns = time.perf_counter_ns
+    wall_ns = time.time_ns
+    interval = int(burst * 1e9 / rate) if rate else 0
+
+    seq = dropped = 0
+    start = next_burst = perf_ns()
+    end = start + int(duration * 1e9) if duration else None
     try:
-        s.connect(("8.8.8.8", 80))
-        return s.getsockname()[0]
-    except Exception:
-        return "127.0.0.1"
-    finally:
-        s.close()
+        while count is None or seq < count:
+            now = perf_ns()
+            if end is not None and now >= end:
+                break
+            if now < next_burst:
+                if next_burst - now > SPIN_NS:
+                    time.sleep((next_burst - now - SPIN_NS) / 1e9)
+                continue
+            n = burst if count is None else min(burst, count - seq)
+            for _ in range(n):
+                pack_into(buf, 0, MAGIC, sender_id, seq, wall_ns())
+                try:
+                    send(buf)
+                except OSError as e:
+                    if e.errno not in (errno.ENOBUFS, errno.EAGAIN):
+                        raise
+                    dropped += 1
+                seq += 1
+            next_burst += interval
+    except KeyboardInterrupt:
+        pass
+    return seq, dropped, (perf_ns() - start) / 1e9
 
 def main():
     p = argparse.ArgumentParser()
-    p.add_argument("--iface", help="Interface IP to send from")
-    p.add_argument("--group", default="239.1.1.1")
-    p.add_argument("--port", type=int, default=5000)
+    p.add_argument("--iface", action="append", help="Interface IP to send from (repeatable)")
+    p.add_argument("--group", action="append", help="group to send to (repeatable; default 239.1.1.1)")
+    p.add_argument("--port", type=int, action="append", help="port (repeatable; default 5000)")
     p.add_argument("--msg", default="hello multicast")
+    load = p.add_argument_group("load generation")
+    rate = load.add_mutually_exclusive_group()
+    rate.add_argument("--rate", type=parse_rate, help="packets per second")
+    rate.add_argument("--bitrate", type=parse_rate, help="bits per second of UDP payload")
+    load.add_argument("--size", type=int, action="append",
+                      help=f"datagram payload bytes, {HEADER.size}..{MAX_UDP} (repeatable)")
+    load.add_argument("--burst", type=int, default=1, help="packets sent back to back per tick")
+    load.add_argument("--count", type=int, help="stop after this many packets")
+    load.add_argument("--duration", type=float, help="stop after this many seconds")
+    load.add_argument("--sender-id", type=int,
+                      help="id carried in each header (default: iface IP, else the hostname's address)")
+    load.add_argument("--df", action="store_true", help="set Don't Fragment; oversize sends fail")
     args = p.parse_args()
 
-    iface_ip = args.iface or get_primary_ip()
-    mcast_grp = args.group
-    mcast_port = args.port
+    groups = args.group or ["239.1.1.1"]
+    ports = args.port or [5000]
     message = args.msg.encode()
 
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
     # TTL 1 keeps it local to the subnet
     sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
-    try:
-        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(iface_ip))
-    except Exception:
-        # fallback: don't set IF if it fails
-        pass
+    if args.df:
+        sock.setsockopt(socket.IPPROTO_IP, getattr(socket, "IP_MTU_DISCOVER", 10),
+                        getattr(socket, "IP_PMTUDISC_DO", 2))
+    load = any(v is not None for v in (args.rate, args.bitrate, args.count, args.duration))
+    sender_id = args.sender_id
+    if load and sender_id is None:
+        try:
+            sender_id = default_sender_id((args.iface or [None])[0])
+        except ValueError as e:
+            p.error(str(e))
 
-    sock.sendto(message, (mcast_grp, mcast_port))
-    print(f"SENT: {message.decode()} -> {mcast_grp}:{mcast_port} from {iface_ip}")
+    for iface in args.iface or [None]:
+        if iface:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(iface))
+        source = iface or "default interface"
+        if not load:
+            for mcast_port in ports:
+                for mcast_grp in groups:
+                    sock.sendto(message, (mcast_grp, mcast_port))
+                    print(f"SENT: {message.decode()} -> {mcast_grp}:{mcast_port} from {source}")
+            continue
+        for size in args.size or [HEADER.size]:
+            size = min(max(size, HEADER.size), MAX_UDP)
+            pps = args.bitrate / (size * 8) if args.bitrate else args.rate
+            for mcast_port in ports:
+                for mcast_grp in groups:
+                    # connected: the kernel skips the per-packet route lookup
+                    sock.connect((mcast_grp, mcast_port))
+                    try:
+                        sent, dropped, elapsed = send_stream(sock, size, sender_id, pps, max(1, args.burst),
+                                                             args.count, args.duration)
+                    except OSError as e:
+                        if e.errno != errno.EMSGSIZE:
+                            raise
+                        print(f"TOO BIG: {size}B -> {mcast_grp}:{mcast_port} from {source} ({e.strerror})")
+                        continue
+                    achieved = sent / elapsed if elapsed else 0.0
+                    print(f"SENT: {sent} x {size}B -> {mcast_grp}:{mcast_port} from {source} "
+                          f"id={sender_id} in {elapsed:.3f}s ({achieved:.0f} pps, "
+                          f"{achieved * size * 8 / 1e6:.2f} Mbit/s, {dropped} dropped by the local stack)")
+    sock.close()
 
 if __name__ == "__main__":
     main()
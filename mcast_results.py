@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+mcast_results.py
+
+SQLite store for multicast test results, shared by the v1 and v2 managers
+(--db FILE).
+
+One row per (run, sender, receiver, sender interface, receiver interface,
+group, port, size) with typed columns: packets sent and received, p50/p99
+one-way latency and jitter in microseconds. Host, interface and group
+strings are dictionary-encoded into the `names` table, so a row is a
+handful of integers, clustered by its cell key (no separate index). Rows
+are buffered and written in batches of BATCH_ROWS, each batch in its own
+transaction, so a long run is queryable (and survives a crash) while it
+is still going. Unknown values are empty strings / 0 rather than NULL so
+that run-over-run joins stay plain equality joins on the primary key;
+received is NULL when the receiver never joined.
+
+The queries below aggregate in SQLite and stream their rows, so they work
+on millions of results without loading them into Python.
+
+Usage:
+    python3 mcast_results.py DB runs
+        Every run with its mode, row count and overall loss.
+    python3 mcast_results.py DB hosts [--run ID]
+        Per host, as sender and as receiver: pairs, packets, loss, worst p99.
+    python3 mcast_results.py DB pairs [--run ID] [--min-loss PCT]
+        Per (sender, receiver) pair across runs: runs, loss, worst run, p99.
+    python3 mcast_results.py DB regressions [--run ID] [--against ID]
+                                            [--loss-delta PCT] [--latency-factor X]
+        Cells whose loss or p99 got worse between two runs of the same mode
+        (default: the latest run and the one before it).
+"""
+import argparse
+import sqlite3
+import sys
+from datetime import datetime
+
+BATCH_ROWS = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY,
+    started_at  TEXT NOT NULL,
+    mode        TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS names (
+    id    INTEGER PRIMARY KEY,
+    name  TEXT NOT NULL UNIQUE
+);
+-- sender .. grp are names(id); received is NULL when the receiver never joined
+CREATE TABLE IF NOT EXISTS results (
+    run_id          INTEGER NOT NULL REFERENCES runs(id),
+    sender          INTEGER NOT NULL,
+    receiver        INTEGER NOT NULL,
+    sender_iface    INTEGER NOT NULL,
+    receiver_iface  INTEGER NOT NULL,
+    grp             INTEGER NOT NULL,
+    port            INTEGER NOT NULL,
+    size            INTEGER NOT NULL,
+    sent            INTEGER NOT NULL,
+    received        INTEGER,
+    p50_us          REAL,
+    p99_us          REAL,
+    jitter_us       REAL,
+    PRIMARY KEY (run_id, sender, receiver, sender_iface, receiver_iface, grp, port, size)
+) WITHOUT ROWID;
+CREATE VIEW IF NOT EXISTS results_view AS
+SELECT t.run_id, s.name AS sender, r.name AS receiver,
+       si.name AS sender_iface, ri.name AS receiver_iface, g.name AS grp,
+       t.port, t.size, t.sent, t.received,
+       CASE WHEN t.received IS NULL OR t.sent = 0 THEN NULL
+            ELSE 100.0 * MAX(0, t.sent - t.received) / t.sent END AS loss_pct,
+       t.p50_us, t.p99_us, t.jitter_us
+FROM results t
+JOIN names s ON s.id = t.sender
+JOIN names r ON r.id = t.receiver
+JOIN names si ON si.id = t.sender_iface
+JOIN names ri ON ri.id = t.receiver_iface
+JOIN names g ON g.id = t.grp;
+"""
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def hist_percentile(hist, q):
+    """
+    Upper bound in microseconds of the recv_mcast latency bucket holding
+    quantile `q` (0..1), from a summary's {"N": count} histogram; None if empty.
+    """
+    buckets = sorted((int(bound), n) for bound, n in (hist or {}).items())
+    total = sum(n for _, n in buckets)
+    if not total:
+        return None
+    seen = 0
+    for bound, n in buckets:
+        seen += n
+        if seen >= q * total:
+            return float(bound)
+    return float(buckets[-1][0])
+
+
+class ResultStore:
+    """Writes one run's result rows in batches. Use as a context manager or call close()."""
+
+    def __init__(self, db_path, mode, started_at=None):
+        self.conn = connect(db_path)
+        self._names = dict(self.conn.execute("SELECT name, id FROM names"))
+        self._rows = []
+        with self.conn:
+            self.run_id = self.conn.execute(
+                "INSERT INTO runs (started_at, mode) VALUES (?, ?)",
+                ((started_at or datetime.now()).isoformat(timespec="seconds"), mode),
+            ).lastrowid
+        self.count = 0
+
+    def _name(self, name):
+        name = "" if name is None else str(name)
+        name_id = self._names.get(name)
+        if name_id is None:
+            self.conn.execute("INSERT OR IGNORE INTO names (name) VALUES (?)", (name,))
+            name_id = self.conn.execute("SELECT id FROM names WHERE name = ?", (name,)).fetchone()[0]
+            self._names[name] = name_id
+        return name_id
+
+    def add(self, sender, receiver, sent, received, sender_iface=None, receiver_iface=None,
+            group=None, port=0, size=0, p50_us=None, p99_us=None, jitter_us=None):
+        """Queue one result row; written once BATCH_ROWS are pending."""
+        self._rows.append((
+            self.run_id, self._name(sender), self._name(receiver),
+            self._name(sender_iface), self._name(receiver_iface), self._name(group),
+            port or 0, size or 0, sent, received, p50_us, p99_us, jitter_us,
+        ))
+        if len(self._rows) >= BATCH_ROWS:
+            self.flush()
+
+    def add_summary(self, sender, receiver, sent, summary, **cell):
+        """add() from a recv_mcast stream summary (None when nothing arrived)."""
+        if summary is None:
+            self.add(sender, receiver, sent, 0, **cell)
+            return
+        hist = summary["latency_us"]["hist"]
+        self.add(sender, receiver, sent, summary["unique"],
+                 p50_us=hist_percentile(hist, 0.5), p99_us=hist_percentile(hist, 0.99),
+                 jitter_us=summary["jitter_us"], **cell)
+
+    def flush(self):
+        if not self._rows:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._rows,
+            )
+        self.count += len(self._rows)
+        self._rows = []
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---------------- Queries ----------------
+def _latest_run(conn):
+    return conn.execute("SELECT MAX(id) FROM runs").fetchone()[0]
+
+
+def list_runs(conn):
+    """(id, started_at, mode, rows, sent, received) per run."""
+    return conn.execute(
+        """
+        SELECT r.id, r.started_at, r.mode, COUNT(t.run_id),
+               COALESCE(SUM(t.sent), 0), COALESCE(SUM(t.received), 0)
+        FROM runs r LEFT JOIN results t ON t.run_id = r.id
+        GROUP BY r.id ORDER BY r.id
+        """
+    )
+
+
+def host_summary(conn, run_id=None):
+    """(host, role, pairs, sent, received, loss_pct, worst p99) for one run (default latest)."""
+    run_id = run_id or _latest_run(conn)
+    return conn.execute(
+        """
+        SELECT n.name, role, COUNT(*), SUM(sent), SUM(received),
+               100.0 * MAX(0, SUM(sent) - SUM(received)) / MAX(1, SUM(sent)), MAX(p99_us)
+        FROM (
+            SELECT sender AS host, 'sender' AS role, sent, received, p99_us
+            FROM results WHERE run_id = ? AND received IS NOT NULL
+            UNION ALL
+            SELECT receiver, 'receiver', sent, received, p99_us
+            FROM results WHERE run_id = ? AND received IS NOT NULL
+        ) JOIN names n ON n.id = host
+        GROUP BY host, role ORDER BY n.name, role
+        """,
+        (run_id, run_id),
+    )
+
+
+def pair_summary(conn, run_id=None, min_loss=0.0):
+    """
+    (sender, receiver, runs, sent, received, loss_pct, worst run loss_pct,
+    worst p99) per pair over every run, or only `run_id`.
+    """
+    return conn.execute(
+        """
+        SELECT s.name, r.name, runs, sent, received, loss, worst, p99 FROM (
+            SELECT sender, receiver, COUNT(DISTINCT run_id) AS runs,
+                   SUM(sent) AS sent, SUM(received) AS received,
+                   100.0 * MAX(0, SUM(sent) - SUM(received)) / MAX(1, SUM(sent)) AS loss,
+                   MAX(100.0 * MAX(0, sent - received) / MAX(1, sent)) AS worst,
+                   MAX(p99_us) AS p99
+            FROM results
+            WHERE received IS NOT NULL AND (? IS NULL OR run_id = ?)
+            GROUP BY sender, receiver
+        )
+        JOIN names s ON s.id = sender JOIN names r ON r.id = receiver
+        WHERE loss >= ?
+        ORDER BY loss DESC, s.name, r.name
+        """,
+        (run_id, run_id, min_loss),
+    )
+
+
+def regressions(conn, run_id=None, against=None, loss_delta=1.0, latency_factor=2.0):
+    """
+    (sender, receiver, sender_iface, receiver_iface, group, port, size,
+    loss before, loss after, p99 before, p99 after) for cells of `run_id`
+    whose loss grew by `loss_delta` points or whose p99 grew `latency_factor`
+    times against run `against` (default: the previous run of the same mode).
+    Returns (run_id, against, cursor); cursor is None without a run to compare.
+    """
+    run_id = run_id or _latest_run(conn)
+    if against is None:
+        row = conn.execute(
+            "SELECT MAX(id) FROM runs WHERE id < ? AND mode = (SELECT mode FROM runs WHERE id = ?)",
+            (run_id, run_id),
+        ).fetchone()
+        against = row[0] if row else None
+    if run_id is None or against is None:
+        return run_id, against, None
+    cursor = conn.execute(
+        """
+        SELECT s.name, r.name, si.name, ri.name, g.name, port, size,
+               before_loss, after_loss, before_p99, after_p99 FROM (
+            SELECT b.sender, b.receiver, b.sender_iface, b.receiver_iface, b.grp, b.port, b.size,
+                   100.0 * MAX(0, a.sent - a.received) / MAX(1, a.sent) AS before_loss,
+                   100.0 * MAX(0, b.sent - b.received) / MAX(1, b.sent) AS after_loss,
+                   a.p99_us AS before_p99, b.p99_us AS after_p99
+            FROM results b JOIN results a
+              ON a.run_id = ? AND a.sender = b.sender AND a.receiver = b.receiver
+             AND a.sender_iface = b.sender_iface AND a.receiver_iface = b.receiver_iface
+             AND a.grp = b.grp AND a.port = b.port AND a.size = b.size
+            WHERE b.run_id = ? AND a.received IS NOT NULL AND b.received IS NOT NULL
+        )
+        JOIN names s ON s.id = sender JOIN names r ON r.id = receiver
+        JOIN names si ON si.id = sender_iface JOIN names ri ON ri.id = receiver_iface
+        JOIN names g ON g.id = grp
+        WHERE after_loss - before_loss >= ?
+           OR (before_p99 > 0 AND after_p99 >= before_p99 * ?)
+        ORDER BY after_loss - before_loss DESC, s.name, r.name
+        """,
+        (against, run_id, loss_delta, latency_factor),
+    )
+    return run_id, against, cursor
+
+
+def _fmt(value, spec=".2f"):
+    return "-" if value is None else format(value, spec)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Aggregate stored multicast test results.")
+    p.add_argument("db")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("runs", help="list runs")
+
+    h = sub.add_parser("hosts", help="per-host summary of one run")
+    h.add_argument("--run", type=int, help="run id (default: latest)")
+
+    pr = sub.add_parser("pairs", help="per sender/receiver pair summary")
+    pr.add_argument("--run", type=int, help="only this run (default: all runs)")
+    pr.add_argument("--min-loss", type=float, default=0.0, help="only pairs with at least this loss %%")
+
+    rg = sub.add_parser("regressions", help="cells that got worse between two runs")
+    rg.add_argument("--run", type=int, help="run to check (default: latest)")
+    rg.add_argument("--against", type=int, help="baseline run (default: previous run of the same mode)")
+    rg.add_argument("--loss-delta", type=float, default=1.0, help="loss increase in points")
+    rg.add_argument("--latency-factor", type=float, default=2.0, help="p99 growth factor")
+
+    args = p.parse_args()
+
+    conn = connect(args.db)
+    rows = 0
+    try:
+        if args.command == "runs":
+            for run_id, started_at, mode, count, sent, received in list_runs(conn):
+                loss = 100.0 * max(0, sent - received) / sent if sent else None
+                print(f"{run_id:>5}  {started_at}  {mode:<8} {count:>10} rows  loss {_fmt(loss)}%")
+                rows += 1
+        elif args.command == "hosts":
+            print(f"{'host':<30} {'role':<8} {'pairs':>7} {'sent':>12} {'received':>12} "
+                  f"{'loss%':>7} {'p99us':>9}")
+            for host, role, pairs, sent, received, loss, p99 in host_summary(conn, args.run):
+                print(f"{host:<30} {role:<8} {pairs:>7} {sent:>12} {received:>12} "
+                      f"{_fmt(loss):>7} {_fmt(p99, '.0f'):>9}")
+                rows += 1
+        elif args.command == "pairs":
+            print(f"{'sender':<30} {'receiver':<30} {'runs':>5} {'loss%':>7} {'worst%':>7} {'p99us':>9}")
+            for sender, receiver, runs, sent, received, loss, worst, p99 in pair_summary(
+                    conn, args.run, args.min_loss):
+                print(f"{sender:<30} {receiver:<30} {runs:>5} {_fmt(loss):>7} {_fmt(worst):>7} "
+                      f"{_fmt(p99, '.0f'):>9}")
+                rows += 1
+        else:
+            run_id, against, cursor = regressions(conn, args.run, args.against,
+                                                  args.loss_delta, args.latency_factor)
+            if cursor is None:
+                print("[ERROR] Need two runs of the same mode to compare.", file=sys.stderr)
+                sys.exit(1)
+            print(f"Run {run_id} against run {against}:")
+            for (sender, receiver, s_iface, r_iface, group, port, size,
+                 before, after, before_p99, after_p99) in cursor:
+                where = f"{group}:{port} {size}B" if group else f"{size}B" if size else ""
+                via = f" [{s_iface or '*'} -> {r_iface or '*'}]" if s_iface or r_iface else ""
+                print(f"{sender} -> {receiver}{via} {where}  loss {_fmt(before)}% -> {_fmt(after)}%  "
+                      f"p99 {_fmt(before_p99, '.0f')} -> {_fmt(after_p99, '.0f')} us")
+                rows += 1
+    finally:
+        conn.close()
+
+    if not rows:
+        print("[INFO] No matching rows.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
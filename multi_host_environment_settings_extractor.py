@@ -1,88 +1,148 @@
+import argparse
+import heapq
+import ipaddress
 import json
 import os
 import re
 import shutil
-import subprocess
+import socket
+import struct
 import sys
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
 
+import fleet_sim
+import snapshot_db
+import timing
+from net_parsers import parse_ifconfig, parse_route
+from snapshot_store import SnapshotStore, canonical_json, content_hash
+from ssh_pool import SSHPool
+from transport import LocalTransport, SSHTransport, TransportError
+
 
 # ---------------- Parsing ----------------
-def parse_ifconfig(output):
-    """Parse ifconfig output into a structured dictionary."""
-    interfaces = {}
-    blocks = re.split(r'\n(?=\S)', output.strip())  # split on new interface blocks
+# parse_ifconfig / parse_route (ifconfig and 'route -n' text) come from
+# net_parsers: precompiled, single pass, and able to stream line iterators.
+# The parsers below handle the /proc and sysfs backend.
 
-    for block in blocks:
-        lines = block.splitlines()
-        if not lines:
-            continue
+# Interface flags in the order ifconfig prints them (IFF_* bit order)
+IFF_FLAGS = [
+    (0x1, "UP"), (0x2, "BROADCAST"), (0x4, "DEBUG"), (0x8, "LOOPBACK"),
+    (0x10, "POINTOPOINT"), (0x20, "NOTRAILERS"), (0x40, "RUNNING"),
+    (0x80, "NOARP"), (0x100, "PROMISC"), (0x200, "ALLMULTI"),
+    (0x400, "MASTER"), (0x800, "SLAVE"), (0x1000, "MULTICAST"),
+    (0x2000, "PORTSEL"), (0x4000, "AUTOMEDIA"), (0x8000, "DYNAMIC"),
+]
+IFF_UP = 0x1
+IFF_RUNNING = 0x40
+ARPHRD_ETHER = 1
 
-        iface_line = lines[0]
-        iface_name = iface_line.split(":")[0].strip()
+# Route flags in the order 'route -n' prints them
+RTF_FLAGS = [
+    (0x0001, "U"), (0x0002, "G"), (0x0200, "!"), (0x0004, "H"),
+    (0x0008, "R"), (0x0010, "D"), (0x0020, "M"),
+]
 
-        iface_data = {
-            "flags": None,
-            "inet": None,
-            "inet6": None,
-            "mac": None,
-        }
+# One cheap remote call: sysfs links, IPv6 from /proc, IPv4 from ip(8).
+# Falls back to ifconfig where /sys/class/net is missing.
+PROC_INTERFACES_CMD = r"""if [ -d /sys/class/net ]; then
+echo '#sysfs'
+for d in /sys/class/net/*; do
+  echo "link ${d##*/} $(cat $d/flags 2>/dev/null || echo 0) $(cat $d/type 2>/dev/null || echo 0) $(cat $d/carrier 2>/dev/null || echo 0) $(cat $d/address 2>/dev/null)"
+done
+echo '#inet6'
+cat /proc/net/if_inet6 2>/dev/null
+echo '#inet'
+ip -o -4 addr show 2>/dev/null
+else
+/usr/sbin/ifconfig
+fi"""
 
-        # Extract flags
-        flags_match = re.search(r"<([^>]+)>", iface_line)
-        if flags_match:
-            iface_data["flags"] = flags_match.group(1).split(",")
-
-        # Extract inet, inet6, mac
-        for line in lines[1:]:
-            if "inet " in line:
-                match = re.search(r"inet (\d+\.\d+\.\d+\.\d+)", line)
-                if match:
-                    iface_data["inet"] = match.group(1)
-            elif "inet6 " in line:
-                match = re.search(r"inet6 ([0-9a-f:]+)", line)
-                if match:
-                    iface_data["inet6"] = match.group(1)
-            elif "ether " in line:
-                match = re.search(r"ether ([0-9a-f:]+)", line)
-                if match:
-                    iface_data["mac"] = match.group(1)
-
-        interfaces[iface_name] = iface_data
+# /proc/net/route holds what 'route -n' prints; fall back to it if absent.
+PROC_ROUTES_CMD = "cat /proc/net/route 2>/dev/null || /sbin/route -n"
+
+
+def parse_proc_interfaces(output):
+    """
+    Parse PROC_INTERFACES_CMD output into the parse_ifconfig schema, plus
+    "inet_all"/"inet6_all" lists holding every address on the interface.
+    Like plain ifconfig, only interfaces that are UP are reported.
+    Falls back to parse_ifconfig when the host sent ifconfig text.
+    """
+    if not output.startswith("#sysfs"):
+        return parse_ifconfig(output)
 
+    interfaces = {}
+    section = None
+    for line in output.splitlines():
+        if line.startswith("#"):
+            section = line[1:].strip()
+            continue
+        parts = line.split()
+        if section == "sysfs" and len(parts) >= 5 and parts[0] == "link":
+            name, flags, hw_type, carrier = parts[1], int(parts[2], 16), int(parts[3]), parts[4]
+            if not flags & IFF_UP:
+                continue
+            if carrier == "1":
+                flags |= IFF_RUNNING  # sysfs flags omit the operational bit
+            interfaces[name] = {
+                "flags": [label for bit, label in IFF_FLAGS if flags & bit],
+                "inet": None,
+                "inet6": None,
+                "mac": parts[5] if hw_type == ARPHRD_ETHER and len(parts) > 5 else None,
+                "inet_all": [],
+                "inet6_all": [],
+            }
+        elif section == "inet6" and len(parts) >= 6 and parts[5] in interfaces:
+            address = str(ipaddress.IPv6Address(int(parts[0], 16)))
+            interfaces[parts[5]]["inet6_all"].append(address)
+        elif section == "inet" and len(parts) >= 4 and parts[2] == "inet" and parts[1] in interfaces:
+            interfaces[parts[1]]["inet_all"].append(parts[3].split("/")[0])
+
+    # Keep the single-address fields consistent with parse_ifconfig (last wins)
+    for iface_data in interfaces.values():
+        if iface_data["inet_all"]:
+            iface_data["inet"] = iface_data["inet_all"][-1]
+        if iface_data["inet6_all"]:
+            iface_data["inet6"] = iface_data["inet6_all"][-1]
     return interfaces
 
 
-def parse_route(output):
-    """Parse 'route -n' output into a list of dictionaries."""
-    routes = []
-    lines = output.strip().splitlines()
+def _hex_to_ipv4(value):
+    """/proc/net/route stores addresses as little-endian hex."""
+    return socket.inet_ntoa(struct.pack("<L", int(value, 16)))
 
-    # Skip header lines until we find the actual routing table
-    for i, line in enumerate(lines):
-        if line.startswith("Destination"):
-            header_index = i
-            break
-    else:
-        return routes  # no valid table found
 
-    # Process the table lines after header
-    for line in lines[header_index + 1:]:
-        parts = line.split()
-        if len(parts) >= 8:
-            route_entry = {
-                "destination": parts[0],
-                "gateway": parts[1],
-                "genmask": parts[2],
-                "flags": parts[3],
-                "metric": int(parts[4]),
-                "ref": int(parts[5]),
-                "use": int(parts[6]),
-                "iface": parts[7],
-            }
-            routes.append(route_entry)
+def parse_proc_route(output):
+    """
+    Parse /proc/net/route into the parse_route schema.
+    Falls back to parse_route when the host sent 'route -n' text.
+    """
+    lines = output.strip().splitlines()
+    if not lines or not lines[0].startswith("Iface"):
+        return parse_route(output)
 
+    routes = []
+    for line in lines[1:]:
+        parts = line.split()
+        if len(parts) < 8:
+            continue
+        flags = int(parts[3], 16)
+        routes.append({
+            "destination": _hex_to_ipv4(parts[1]),
+            "gateway": _hex_to_ipv4(parts[2]),
+            "genmask": _hex_to_ipv4(parts[7]),
+            "flags": "".join(label for bit, label in RTF_FLAGS if flags & bit),
+            "metric": int(parts[6]),
+            "ref": int(parts[4]),
+            "use": int(parts[5]),
+            "iface": parts[0],
+        })
     return routes
 
 
@@ -98,63 +158,308 @@ def load_hosts(json_file):
         return []
 
 
-def prepare_output_directory(directory_name="current_extraction_jsons"):
+def prepare_output_directory(directory_name="current_extraction_jsons", keep=False):
     """
     Create/refresh an output directory relative to script location.
     Example: ./current_extraction_jsons/
+    With `keep` an existing directory is reused as is (--resume).
     """
     output_dir = Path(__file__).parent / directory_name
 
-    if output_dir.exists():
+    if output_dir.exists() and not keep:
         shutil.rmtree(output_dir)
 
-    output_dir.mkdir()
+    output_dir.mkdir(exist_ok=True)
     return output_dir
 
 
-def save_to_json(data, hostname, output_dir):
-    """Save parsed data to JSON with a timestamp in the filename."""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+def save_to_json(data, hostname, output_dir, timestamp=None):
+    """
+    Save parsed data to JSON with a timestamp in the filename.
+    Pass a shared run timestamp to keep filenames stable across a sweep.
+    Returns the file written, or None on failure.
+    """
+    if timestamp is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = output_dir / f"{hostname}_{timestamp}.json"
     try:
         with open(filename, "w") as f:
-            json.dump(data, f, indent=4)
+            f.write(canonical_json(data))
         print(f"[OK] Saved parsed data from {hostname} to {filename}")
+        return filename
     except Exception as e:
         print(f"[ERROR] Saving {hostname} data: {e}")
+        return None
+
+
+def file_hash(path):
+    """Content hash of a file on disk."""
+    with open(path, "rb") as f:
+        return content_hash(f.read())
 
 
 # ---------------- Remote Execution ----------------
-def ssh_command(host, command):
-    """Run a command over SSH and return its output, or None on failure."""
-    ssh_cmd = [
-        "ssh",
-        "-o", "BatchMode=yes",
-        "-i", os.path.expanduser("~/.ssh/id_rsa"),
-        host,
-        command,
-    ]
+# One multiplexed master connection per host for the whole run
+SSH_POOL = SSHPool()
+
+# Where ssh_command sends commands; swap for a LocalTransport or a
+# fleet_sim.SimulatedFleet to run without a real fleet.
+TRANSPORT = SSHTransport(SSH_POOL, options=[
+    "-o", "BatchMode=yes",
+    "-i", os.path.expanduser("~/.ssh/id_rsa"),
+])
+LOCAL_TRANSPORT = LocalTransport()
+
+# Per worker thread: did the host being collected fail transiently
+# (TransportError.transient)? Read by collect_hosts to decide on a retry.
+_ATTEMPT = threading.local()
+
+
+def _ssh_phase(host):
+    """Timing phase of the next ssh call: 'ssh_connect' if it opens the master connection."""
+    pool = getattr(TRANSPORT, "pool", None)
+    if pool is None or os.path.exists(pool.control_path(TRANSPORT.target(host))):
+        return "ssh_command"
+    return "ssh_connect"
+
+
+def ssh_command(host, command, timeout=None):
+    """
+    Run a command over SSH and return its output, or None on failure.
+    `timeout` (seconds) bounds the whole ssh invocation, connect included.
+    Timeouts and ssh's own errors are flagged for collect_hosts to retry.
+    """
+    phase = _ssh_phase(host) if timing.enabled() else None
     try:
-        return subprocess.check_output(ssh_cmd, text=True)
-    except subprocess.CalledProcessError as e:
+        with timing.span(phase, host):
+            return TRANSPORT.run(host, command, timeout=timeout)
+    except TransportError as e:
         print(f"[ERROR] SSH to {host}: {e}")
+        if e.transient:
+            _ATTEMPT.transient = True
         return None
 
 
-def get_ifconfig(host):
-    """Get and parse ifconfig output from a remote host."""
-    raw_output = ssh_command(host, "/usr/sbin/ifconfig")
-    if raw_output:
-        return parse_ifconfig(raw_output)
-    return None
+def local_command(host, command, timeout=None):
+    """
+    Same contract as ssh_command, but runs `command` on this machine.
+    Used by --local to exercise a backend without SSH.
+    """
+    try:
+        with timing.span("local_command", host):
+            return LOCAL_TRANSPORT.run(host, command, timeout=timeout)
+    except TransportError as e:
+        print(f"[ERROR] Local command for {host}: {e}")
+        if e.transient:
+            _ATTEMPT.transient = True
+        return None
 
 
-def get_routes(host):
-    """Get and parse route -n output from a remote host."""
-    raw_output = ssh_command(host, "/sbin/route -n")
-    if raw_output:
-        return parse_route(raw_output)
-    return None
+# ---------------- Batched Execution ----------------
+# Collector sets; each name becomes the "{host}_{name}" key.
+# name -> (remote command, parser)
+BACKENDS = {
+    # Text output of net-tools, scraped with regexes
+    "net-tools": {
+        "ifconfig": ("/usr/sbin/ifconfig", parse_ifconfig),
+        "routes": ("/sbin/route -n", parse_route),
+    },
+    # Kernel tables read directly, with the text tools as fallback
+    "proc": {
+        "ifconfig": (PROC_INTERFACES_CMD, parse_proc_interfaces),
+        "routes": (PROC_ROUTES_CMD, parse_proc_route),
+    },
+}
+
+# Every registered collector runs in one SSH session per host.
+COLLECTORS = dict(BACKENDS["net-tools"])
+
+
+def use_backend(name):
+    """Switch the registered collectors to one of BACKENDS."""
+    COLLECTORS.clear()
+    COLLECTORS.update(BACKENDS[name])
+
+
+def register_collector(name, command, parser):
+    """Add a command to the per-host batch. Its output is passed to `parser`."""
+    COLLECTORS[name] = (command, parser)
+
+
+def build_batch_script(collectors, marker):
+    """
+    Build one shell script that runs every collector, framing each output:
+        <marker> BEGIN <name>
+        ...command output...
+        <marker> END <name> <exit status>
+    """
+    lines = []
+    for name, (command, _parser) in collectors.items():
+        lines.append(f"echo '{marker} BEGIN {name}'")
+        lines.append(command)
+        lines.append(f"echo \"{marker} END {name} $?\"")
+    return "\n".join(lines)
+
+
+def split_batch_output(output, marker):
+    """
+    Split framed batch output back into sections.
+    Returns {name: (text, exit_status)}; sections cut short have status None.
+    """
+    sections = {}
+    current, buf = None, []
+    for line in output.splitlines(keepends=True):
+        pos = line.find(marker)
+        if pos < 0:
+            if current is not None:
+                buf.append(line)
+            continue
+        # Output without a trailing newline leaves the marker mid-line
+        if current is not None and pos > 0:
+            buf.append(line[:pos])
+        fields = line[pos + len(marker):].split()
+        if len(fields) >= 2 and fields[0] == "BEGIN":
+            current, buf = fields[1], []
+        elif len(fields) >= 3 and fields[0] == "END" and fields[1] == current:
+            sections[current] = ("".join(buf), int(fields[2]))
+            current, buf = None, []
+    if current is not None:
+        sections[current] = ("".join(buf), None)
+    return sections
+
+
+def run_batch(host, collectors=None, timeout=None, runner=ssh_command):
+    """
+    Run all collectors on `host` over a single SSH connection and parse
+    each section with its registered parser. Failed sections are None.
+    """
+    collectors = COLLECTORS if collectors is None else collectors
+    marker = f"__CEC_{uuid.uuid4().hex}__"
+    collected = dict.fromkeys(collectors)
+
+    raw_output = runner(host, build_batch_script(collectors, marker), timeout=timeout)
+    if raw_output is None:
+        return collected
+
+    sections = split_batch_output(raw_output, marker)
+    for name, (_command, parser) in collectors.items():
+        text, status = sections.get(name, ("", None))
+        if status != 0:
+            print(f"[ERROR] {host}: '{name}' exited with status {status}")
+            continue
+        if text:
+            with timing.span(f"parse_{name}", host):
+                collected[name] = parser(text)
+    return collected
+
+
+# ---------------- Collection ----------------
+# Retries of hosts that failed transiently: first delay, doubling up to the cap
+RETRY_BACKOFF = 1.0
+RETRY_MAX_DELAY = 60.0
+
+
+def _remaining(deadline):
+    """Seconds left until `deadline` (None means unbounded)."""
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def collect_host(host, timeout=None, batch=True, runner=ssh_command, verbose=True):
+    """
+    Collect all registered data from a single host.
+    `timeout` is the per-host budget shared by every command run on it.
+    With `batch` every collector shares one SSH session; otherwise each
+    command gets its own connection. `runner` executes the commands
+    (ssh_command, or local_command for this machine).
+    Returns {collector name: parsed data}; failed parts are None.
+    """
+    if verbose:
+        print(f"[*] Connecting to {host}...")
+    if batch:
+        with timing.span("collect", host):
+            return run_batch(host, timeout=timeout, runner=runner)
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    collected = dict.fromkeys(COLLECTORS)
+    with timing.span("collect", host):
+        for name, (command, parser) in COLLECTORS.items():
+            if deadline is not None and _remaining(deadline) <= 0:
+                print(f"[ERROR] {host}: host timeout of {timeout}s exhausted")
+                break
+            raw_output = runner(host, command, timeout=_remaining(deadline))
+            if raw_output:
+                with timing.span(f"parse_{name}", host):
+                    collected[name] = parser(raw_output)
+    return collected
+
+
+def _collect_attempt(host, timeout, batch, runner, verbose):
+    """collect_host() plus whether anything failed transiently on the way."""
+    _ATTEMPT.transient = False
+    collected = collect_host(host, timeout, batch, runner, verbose)
+    return collected, _ATTEMPT.transient
+
+
+def collect_hosts(hosts, parallel=1, timeout=None, batch=True, runner=ssh_command, verbose=True,
+                  retries=0, backoff=RETRY_BACKOFF, on_done=None):
+    """
+    Collect from many hosts with at most `parallel` hosts in flight.
+    Results come back as (host, collected) pairs in the order of `hosts`,
+    whatever order the hosts actually finish in.
+
+    A host that comes back incomplete after a timeout or an ssh error
+    (exit 255) is retried up to `retries` times, `backoff`, 2 x `backoff`,
+    ... seconds later (at most RETRY_MAX_DELAY). Waiting retries sit in a
+    queue ordered by due time and take the next free worker ahead of
+    hosts not yet tried, so backing off never holds up the rest of the
+    sweep. `on_done(host, collected)` is called, from this thread, as
+    each host finishes for good.
+    """
+    parallel = max(1, min(parallel, len(hosts) or 1))
+    if not retries and on_done is None:
+        if parallel == 1:
+            return [(host, collect_host(host, timeout, batch, runner, verbose)) for host in hosts]
+        with ThreadPoolExecutor(max_workers=parallel) as pool:
+            collected = pool.map(lambda host: collect_host(host, timeout, batch, runner, verbose), hosts)
+            return list(zip(hosts, collected))
+
+    fresh = deque(enumerate(hosts))
+    retry_queue = []  # (due, order, host, attempt)
+    in_flight = {}    # future -> (order, host, attempt)
+    results = {}
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        while fresh or retry_queue or in_flight:
+            now = time.monotonic()
+            while len(in_flight) < parallel:
+                if retry_queue and retry_queue[0][0] <= now:
+                    _, order, host, attempt = heapq.heappop(retry_queue)
+                elif fresh:
+                    (order, host), attempt = fresh.popleft(), 0
+                else:
+                    break
+                future = pool.submit(_collect_attempt, host, timeout, batch, runner, verbose)
+                in_flight[future] = (order, host, attempt)
+
+            # Sleep until a host finishes or the next retry is due
+            next_due = _remaining(retry_queue[0][0]) if retry_queue else None
+            if not in_flight:
+                time.sleep(next_due)
+                continue
+            done, _ = wait(in_flight, timeout=next_due, return_when=FIRST_COMPLETED)
+            for future in done:
+                order, host, attempt = in_flight.pop(future)
+                collected, transient = future.result()
+                if transient and attempt < retries and None in collected.values():
+                    delay = min(backoff * 2 ** attempt, RETRY_MAX_DELAY)
+                    print(f"[WARN] {host}: transient failure, retry {attempt + 1}/{retries} in {delay:g}s")
+                    heapq.heappush(retry_queue, (time.monotonic() + delay, order, host, attempt + 1))
+                    continue
+                results[order] = (host, collected)
+                if on_done is not None:
+                    on_done(host, collected)
+    return [results[order] for order in range(len(hosts))]
 
 
 # ---------------- Comparison ----------------
@@ -185,76 +490,850 @@ def find_base_file(base_dir, key):
         return matches[-1]  # latest (by sort order)
     return None
 
-def compare_extractions(base_dir, new_dir, output_dir):
+
+# ---------------- Multicast Interfaces ----------------
+def multicast_interfaces(interfaces):
     """
-    Compare new extraction JSON files against base values.
-    Print pass/fail per host and save results into a JSON summary.
+    {name: [IPv4 addresses]} for every interface in a parsed ifconfig
+    snapshot that is UP, MULTICAST, not LOOPBACK and has an IPv4 address.
+    Uses inet_all (proc backend) when present, else the single inet.
     """
-    results = {}
+    selected = {}
+    for name, data in interfaces.items():
+        flags = set(data.get("flags") or [])
+        if "UP" not in flags or "MULTICAST" not in flags or "LOOPBACK" in flags:
+            continue
+        addresses = data.get("inet_all") or ([data["inet"]] if data.get("inet") else [])
+        if addresses:
+            selected[name] = addresses
+    return selected
+
+
+def load_multicast_interfaces(base_dir, host):
+    """multicast_interfaces() of the latest {host}_ifconfig snapshot in base_dir, or {}."""
+    path = find_base_file(base_dir, f"{host}_ifconfig_")
+    if path is None:
+        return {}
+    with open(path) as f:
+        return multicast_interfaces(json.load(f))
+
+
+# ---------------- Baseline Index ----------------
+BASELINE_MANIFEST = ".baseline_manifest.json"
+
+
+def build_baseline_index(base_dir):
+    """
+    Map every baseline key to its latest file and content hash, in one
+    directory scan. Hashes are cached in base_dir/.baseline_manifest.json
+    and only recomputed for files whose size or mtime changed.
+    Returns {key: {"file": name, "hash": sha256, "size": n, "mtime_ns": t}}.
+    """
+    base_dir = Path(base_dir)
+    manifest_file = base_dir / BASELINE_MANIFEST
+    try:
+        with open(manifest_file, "r") as f:
+            cached = json.load(f).get("files", {})
+    except (OSError, ValueError):
+        cached = {}
+
+    # Sorted so the last file seen for a key is the latest, as in find_base_file
+    files = {}
+    index = {}
+    for path in sorted(base_dir.glob("*.json")):
+        if path.name == BASELINE_MANIFEST:
+            continue
+        st = path.stat()
+        entry = cached.get(path.name)
+        if not entry or entry["size"] != st.st_size or entry["mtime_ns"] != st.st_mtime_ns:
+            entry = {"hash": file_hash(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        files[path.name] = entry
+        index[strip_timestamp(path.name)] = dict(entry, file=path.name)
 
-    new_files = list(Path(new_dir).glob("*.json"))
-    for new_file in new_files:
-        key = strip_timestamp(new_file.name)
+    if files != cached:
+        try:
+            with open(manifest_file, "w") as f:
+                json.dump({"files": files}, f, indent=4)
+        except OSError as e:
+            print(f"[WARN] Could not update baseline manifest {manifest_file}: {e}")
+    return index
 
-	base_file = find_base_file(base_dir, key)
-	if not base_file:
-    	    results[key] = "MISSING_BASE"
-#    	    print(f"[WARN] No base file for {key}")
-    	    continue
 
-        match = compare_json_files(base_file, new_file)
-        results[key] = "PASS" if match else "FAIL"
-#        print(f"[{results[key]}] {key}")
+def compare_against_index(index, base_dir, entries):
+    """
+    Compare new snapshots against a baseline index.
+    `entries` yields (key, content hash, file). Equal hashes are a PASS
+    without opening either file; only differing hashes are parsed and
+    compared in full (which still passes files that merely differ in
+    formatting). A field-level diff is built for every FAIL.
+    Returns (results, diffs) keyed by snapshot key.
+    """
+    results = {}
+    diffs = {}
+    for key, new_hash, new_file in entries:
+        base = index.get(key)
+        if not base:
+            results[key] = "MISSING_BASE"
+            continue
+        if base["hash"] == new_hash:
+            results[key] = "PASS"
+            continue
+        base_file = Path(base_dir) / base["file"]
+        try:
+            with open(base_file, "r") as f1, open(new_file, "r") as f2:
+                base_data = json.load(f1)
+                new_data = json.load(f2)
+        except Exception as e:
+            print(f"[ERROR] Comparing {base_file} and {new_file}: {e}")
+            results[key] = "FAIL"
+            continue
+        if base_data == new_data:
+            results[key] = "PASS"
+        else:
+            results[key] = "FAIL"
+            diffs[key] = diff_snapshots(base_data, new_data)
+    return results, diffs
+
 
-    # Save results summary
+def save_comparison_summary(results, output_dir, diffs=None, roles=None, skip_unchanged=False):
+    """
+    Write comparison results to comparison_summary_<timestamp>.json as
+    {"results": {key: status}, "diffs": {key: diff}}, plus
+    "roles": {host: role or null} after a role comparison.
+    With `skip_unchanged` nothing is written when the latest summary
+    already in output_dir has the same contents.
+    """
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    summary_file = Path(output_dir) / f"comparison_summary_{timestamp}.json"
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    summary_file = output_dir / f"comparison_summary_{timestamp}.json"
+    summary = {"results": results, "diffs": diffs or {}}
+    if roles is not None:
+        summary["roles"] = roles
+    if skip_unchanged:
+        previous = sorted(output_dir.glob("comparison_summary_*.json"))
+        try:
+            with open(previous[-1], "r") as f:
+                if json.load(f) == summary:
+                    print(f"[OK] Comparison results unchanged since {previous[-1]}")
+                    return
+        except (IndexError, OSError, ValueError):
+            pass
     try:
         with open(summary_file, "w") as f:
-            json.dump(results, f, indent=4)
+            json.dump(summary, f, indent=4)
         print(f"[OK] Comparison results saved to {summary_file}")
     except Exception as e:
         print(f"[ERROR] Saving comparison summary: {e}")
 
+
+def compare_snapshots(base_dir, entries, output_dir, skip_unchanged=False):
+    """
+    Compare (key, content hash, file) entries against base values and
+    save results into a JSON summary.
+    """
+    index = build_baseline_index(base_dir)
+    results, diffs = compare_against_index(index, base_dir, entries)
+
+    save_comparison_summary(results, output_dir, diffs, skip_unchanged=skip_unchanged)
     return results
 
+
+def compare_extractions(base_dir, new_dir, output_dir):
+    """
+    Compare new extraction JSON files against base values.
+    Print pass/fail per host and save results into a JSON summary.
+    Only {host}_{collector}_<time>.json files are snapshots; anything else
+    in new_dir (comparison summaries of an earlier, resumed run) is skipped.
+    """
+    new_files = sorted({f for name in COLLECTORS for f in Path(new_dir).glob(f"*_{name}_*.json")})
+    entries = ((strip_timestamp(f.name), file_hash(f), f) for f in new_files)
+    return compare_snapshots(base_dir, entries, output_dir)
+
+
+# ---------------- Role Baselines ----------------
+# base_value_jsons/roles/roles.json names each role's template per kind;
+# templates live once each in configs/<fingerprint>.json, however many
+# roles or hosts share them.
+ROLE_DIR = "roles"
+ROLE_MANIFEST = "roles.json"
+# Route fields that count traffic rather than describe configuration
+ROUTE_COUNTERS = ("ref", "use")
+
+
+def host_addresses(interfaces):
+    """The host's own addresses: every inet/inet6 of its non-loopback interfaces."""
+    own = set()
+    for data in (interfaces or {}).values():
+        if "LOOPBACK" in (data.get("flags") or []):
+            continue
+        for field in ("inet", "inet6"):
+            if data.get(field):
+                own.add(data[field])
+        for field in ("inet_all", "inet6_all"):
+            own.update(data.get(field) or [])
+    return own
+
+
+def template_snapshot(kind, parsed, own):
+    """
+    Host-independent form of one snapshot: MACs become "<mac>", the host's
+    own addresses (`own`) "<self>", route counters are dropped and
+    interfaces/routes are sorted, so hosts configured alike get equal
+    templates. Subnets still show through the routes' destinations.
+    """
+    if kind == "ifconfig":
+        template = {}
+        for name in sorted(parsed):
+            data = dict(parsed[name])
+            if data.get("mac"):
+                data["mac"] = "<mac>"
+            for field in ("inet", "inet6"):
+                if data.get(field) in own:
+                    data[field] = "<self>"
+            for field in ("inet_all", "inet6_all"):
+                if field in data:
+                    data[field] = ["<self>" if a in own else a for a in data[field]]
+            template[name] = data
+        return template
+    if kind == "routes":
+        rows = [
+            {k: "<self>" if v in own else v for k, v in route.items() if k not in ROUTE_COUNTERS}
+            for route in parsed
+        ]
+        return sorted(rows, key=canonical_json)
+    return parsed
+
+
+def host_config(collected):
+    """{kind: (fingerprint, template)} for every kind collected from one host."""
+    own = host_addresses(collected.get("ifconfig"))
+    config = {}
+    for kind, parsed in collected.items():
+        if parsed:
+            template = template_snapshot(kind, parsed, own)
+            config[kind] = (content_hash(canonical_json(template)), template)
+    return config
+
+
+def group_by_config(swept):
+    """
+    {((kind, fingerprint), ...): (hosts, {kind: template})}: one entry per
+    distinct configuration, however many hosts share it.
+    """
+    groups = {}
+    for host, collected in swept:
+        config = host_config(collected)
+        key = tuple(sorted((kind, fingerprint) for kind, (fingerprint, _) in config.items()))
+        if key not in groups:
+            groups[key] = ([], {kind: template for kind, (_, template) in config.items()})
+        groups[key][0].append(host)
+    return groups
+
+
+def load_roles(role_dir):
+    """{role: {kind: fingerprint, "hosts": n}} from role_dir/roles.json ({} if absent)."""
+    try:
+        with open(Path(role_dir) / ROLE_MANIFEST) as f:
+            return json.load(f).get("roles", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def load_role_template(role_dir, fingerprint):
+    with open(Path(role_dir) / "configs" / f"{fingerprint}.json") as f:
+        return json.load(f)
+
+
+def learn_roles(swept, role_dir, min_hosts=2):
+    """
+    Add a role for every configuration shared by at least `min_hosts` hosts
+    that no existing role covers, storing each new template once.
+    Returns {role: [hosts]} for the roles added.
+    """
+    role_dir = Path(role_dir)
+    (role_dir / "configs").mkdir(parents=True, exist_ok=True)
+    roles = load_roles(role_dir)
+    known = {tuple(sorted((k, v) for k, v in role.items() if k != "hosts")) for role in roles.values()}
+    added = {}
+    number = len(roles)
+    groups = sorted(group_by_config(swept).items(), key=lambda item: -len(item[1][0]))
+    for key, (hosts, templates) in groups:
+        if not key or key in known or len(hosts) < min_hosts:
+            continue
+        for kind, fingerprint in key:
+            path = role_dir / "configs" / f"{fingerprint}.json"
+            if not path.exists():
+                path.write_text(canonical_json(templates[kind]))
+        number += 1
+        while f"role-{number}" in roles:
+            number += 1
+        roles[f"role-{number}"] = dict(key, hosts=len(hosts))
+        added[f"role-{number}"] = hosts
+    with open(role_dir / ROLE_MANIFEST, "w") as f:
+        json.dump({"roles": roles}, f, indent=4)
+    return added
+
+
+def compare_roles(swept, role_dir):
+    """
+    Compare every host against the role baselines. Hosts are grouped by
+    configuration first, so matching and diffing cost one pass per
+    distinct configuration, not per host. A host passes when some role
+    has its fingerprint for every kind; otherwise it is an outlier,
+    diffed against the role matching the most kinds.
+    Hosts missing a kind are not matched at all, since a role can't be
+    told from drift on what was collected: their missing kinds are
+    NOT_COLLECTED and the rest PARTIAL, and they get no assignment.
+    Returns (results keyed "{host}_{kind}", diffs, {host: role or None}).
+    """
+    roles = load_roles(role_dir)
+    results, diffs, assignment = {}, {}, {}
+    templates_cache = {}
+    complete = []
+    for host, collected in swept:
+        missing = {kind for kind, parsed in collected.items() if not parsed}
+        if not missing:
+            complete.append((host, collected))
+            continue
+        for kind in collected:
+            results[f"{host}_{kind}"] = "NOT_COLLECTED" if kind in missing else "PARTIAL"
+    for key, (hosts, templates) in group_by_config(complete).items():
+        config = dict(key)
+        scores = {
+            name: sum(role.get(kind) == fingerprint for kind, fingerprint in config.items())
+            for name, role in roles.items()
+        }
+        best = max(scores, key=lambda name: (scores[name], roles[name].get("hosts", 0)), default=None)
+        matched = best is not None and config and scores[best] == len(config)
+        for host in hosts:
+            assignment[host] = best if matched else None
+        for kind, fingerprint in config.items():
+            if best is None or kind not in roles[best]:
+                status, diff = "MISSING_BASE", None
+            elif roles[best][kind] == fingerprint:
+                status, diff = "PASS", None
+            else:
+                base_fp = roles[best][kind]
+                if base_fp not in templates_cache:
+                    templates_cache[base_fp] = load_role_template(role_dir, base_fp)
+                status = "FAIL"
+                diff = dict(diff_snapshots(templates_cache[base_fp], templates[kind]), role=best)
+            for host in hosts:
+                results[f"{host}_{kind}"] = status
+                if diff is not None:
+                    diffs[f"{host}_{kind}"] = diff
+    return results, diffs, assignment
+
+
+# ---------------- Diff ----------------
+def _field_changes(base, new):
+    """{field: {"base": old, "new": new}} for every field that differs."""
+    changes = {}
+    for field in list(base) + [f for f in new if f not in base]:
+        if base.get(field) != new.get(field):
+            changes[field] = {"base": base.get(field), "new": new.get(field)}
+    return changes
+
+
+def diff_ifconfig(base, new):
+    """Diff two parse_ifconfig results, matching interfaces by name."""
+    diff = {"kind": "ifconfig", "added": [], "removed": [], "changed": []}
+    for iface, data in new.items():
+        if iface not in base:
+            diff["added"].append({"iface": iface, **data})
+        elif base[iface] != data:
+            diff["changed"].append({"iface": iface, "fields": _field_changes(base[iface], data)})
+    for iface, data in base.items():
+        if iface not in new:
+            diff["removed"].append({"iface": iface, **data})
+    return diff
+
+
+def _route_key(route):
+    return (route.get("destination"), route.get("genmask"), route.get("iface"))
+
+
+def diff_routes(base, new):
+    """
+    Diff two parse_route results. Routes are matched on
+    destination/genmask/iface rather than table position, so a route
+    moving up or down the table is not a change. Linear in table size.
+    """
+    diff = {"kind": "routes", "added": [], "removed": [], "changed": []}
+
+    # key -> base routes with that key, in table order
+    pending = {}
+    for route in base:
+        pending.setdefault(_route_key(route), []).append(route)
+
+    # Identical routes pair up first, whatever their position, so a route
+    # sharing a key with a changed one (e.g. two defaults at different
+    # metrics) is never paired with the wrong partner
+    unmatched = []
+    for route in new:
+        candidates = pending.get(_route_key(route))
+        if candidates and route in candidates:
+            candidates.remove(route)
+        else:
+            unmatched.append(route)
+
+    for route in unmatched:
+        candidates = pending.get(_route_key(route))
+        if not candidates:
+            diff["added"].append(route)
+            continue
+        # Then prefer the same metric among routes sharing a key
+        for i, candidate in enumerate(candidates):
+            if candidate.get("metric") == route.get("metric"):
+                del candidates[i]
+                break
+        else:
+            candidate = candidates.pop(0)
+        destination, genmask, iface = _route_key(route)
+        diff["changed"].append({
+            "route": {"destination": destination, "genmask": genmask, "iface": iface},
+            "fields": _field_changes(candidate, route),
+        })
+
+    for candidates in pending.values():
+        diff["removed"].extend(candidates)
+    return diff
+
+
+def diff_snapshots(base, new):
+    """Dispatch on snapshot shape: interface dict, route list, or plain value."""
+    if isinstance(base, dict) and isinstance(new, dict):
+        return diff_ifconfig(base, new)
+    if isinstance(base, list) and isinstance(new, list):
+        return diff_routes(base, new)
+    return {"kind": "value", "base": base, "new": new}
+
+
+# ---------------- Incremental Persistence ----------------
+# Comparison summaries of incremental runs, kept apart from the store's objects
+SUMMARY_DIR = "summaries"
+
+
+def store_incremental(swept, timestamp, directory_name="snapshot_store"):
+    """
+    Record a sweep in the content-addressed snapshot store instead of
+    rewriting current_extraction_jsons. Only changed snapshots produce a
+    new blob; unchanged ones add a pointer line to the store history.
+    Returns (store root, comparison entries).
+    """
+    store = SnapshotStore(Path(__file__).parent / directory_name)
+    entries = []
+    changed = 0
+    for host, collected in swept:
+        for name, parsed in collected.items():
+            if parsed:
+                key = f"{host}_{name}"
+                digest, moved = store.put(key, canonical_json(parsed))
+                changed += moved
+                entries.append((key, digest, store.blob_path(digest)))
+    store.commit(timestamp)
+    print(f"[OK] Snapshot store {store.root}: {changed} changed, "
+          f"{len(entries) - changed} unchanged, {store.blobs_written} blobs written")
+    return store.root, entries
+
+
+# ---------------- Checkpoint Journal ----------------
+SWEEP_JOURNAL = ".sweep_journal.jsonl"
+
+
+class SweepJournal:
+    """
+    Append-only progress record of a sweep, kept in its output directory:
+    a header line {"run": timestamp, "hosts": n}, then one line
+    {"host", "status", "files"} per host, written (and fsynced) as soon as
+    that host's snapshots are saved. "ok" means every collector produced
+    data; anything else is "failed". The last line for a host wins, so a
+    resumed run just appends.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _append(self, record, mode="a"):
+        line = json.dumps(record) + "\n"
+        with self._lock, open(self.path, mode) as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def start(self, run_timestamp, host_count):
+        self._append({"run": run_timestamp, "hosts": host_count}, mode="w")
+
+    def record(self, host, status, files):
+        self._append({"host": host, "status": status, "files": files,
+                      "time": datetime.now().isoformat(timespec="seconds")})
+
+    def load(self):
+        """(run timestamp or None, {host: last record}); a torn last line is ignored."""
+        run_timestamp, hosts = None, {}
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if "run" in record:
+                        run_timestamp = record["run"]
+                    elif "host" in record:
+                        hosts[record["host"]] = record
+        except FileNotFoundError:
+            pass
+        return run_timestamp, hosts
+
+
+def save_host(journal, host, collected, output_dir, run_timestamp):
+    """Save one host's snapshots and journal the outcome."""
+    files = {}
+    with timing.span("save_json", host):
+        for name, parsed in collected.items():
+            if parsed:
+                saved = save_to_json(parsed, f"{host}_{name}", output_dir, run_timestamp)
+                if saved:
+                    files[name] = saved.name
+    journal.record(host, "ok" if files.keys() == collected.keys() else "failed", files)
+
+
+def load_host(output_dir, record):
+    """A completed host's collected data, read back from the files its journal record lists."""
+    collected = dict.fromkeys(COLLECTORS)
+    for name, filename in record["files"].items():
+        with open(Path(output_dir) / filename) as f:
+            collected[name] = json.load(f)
+    return collected
+
+
+# ---------------- Watch Mode ----------------
+def _compare_parsed(index, base_dir, key, parsed, baseline_cache):
+    """
+    Compare freshly parsed data against the baseline index in memory.
+    Parsed baselines are cached, so each one is read at most once per watch.
+    Returns (status, diff or None).
+    """
+    base = index.get(key)
+    if not base:
+        return "MISSING_BASE", None
+    if base["hash"] == content_hash(canonical_json(parsed)):
+        return "PASS", None
+    if key not in baseline_cache:
+        with open(Path(base_dir) / base["file"], "r") as f:
+            baseline_cache[key] = json.load(f)
+    base_data = baseline_cache[key]
+    if base_data == parsed:
+        return "PASS", None
+    return "FAIL", diff_snapshots(base_data, parsed)
+
+
+def _describe_diff(diff):
+    if not diff or diff.get("kind") == "value":
+        return ""
+    return f" (+{len(diff['added'])} -{len(diff['removed'])} ~{len(diff['changed'])})"
+
+
+def watch_hosts(hosts, base_dir=None, interval=60, max_interval=900, parallel=8,
+                timeout=None, batch=True, runner=ssh_command, cycles=None):
+    """
+    Keep polling `hosts` and print an event only when something changes:
+    a key's comparison status, its content, or the host's reachability.
+
+    Each host has its own polling interval. It drops back to `interval`
+    whenever something about the host changes (content, a comparison
+    status, reachability), and doubles (up to `max_interval`) on every
+    poll where nothing did, so hosts that stay stable, stay FAILing or
+    stay unreachable are all polled less and less often. Connections
+    stay open in SSH_POOL and the baseline index is built once, so stable
+    hosts cost one batched SSH call per (long) interval. `cycles` bounds
+    the number of scheduler wake-ups (None runs until interrupted).
+    """
+    index = build_baseline_index(base_dir) if base_dir and Path(base_dir).exists() else {}
+    baseline_cache = {}
+    # Keep masters alive across the longest gap between two polls of a host
+    SSH_POOL.persist = max(SSH_POOL.persist, int(max_interval * 2))
+
+    state = {host: {"interval": interval, "reachable": None, "keys": {}} for host in hosts}
+    schedule = [(time.monotonic(), i, host) for i, host in enumerate(hosts)]
+    heapq.heapify(schedule)
+
+    def emit(message):
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}", flush=True)
+
+    emit(f"[WATCH] {len(hosts)} hosts, interval {interval}s..{max_interval}s")
+    woken = 0
+    while schedule and (cycles is None or woken < cycles):
+        woken += 1
+        delay = schedule[0][0] - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+        # Every host that's due now is polled together
+        now = time.monotonic()
+        due = []
+        while schedule and schedule[0][0] <= now:
+            due.append(heapq.heappop(schedule)[1:])
+
+        polled = collect_hosts([host for _, host in due], parallel, timeout, batch, runner,
+                               verbose=False)
+        for (order, host), (_, collected) in zip(due, polled):
+            host_state = state[host]
+            reachable = any(parsed is not None for parsed in collected.values())
+            changed = False
+
+            if reachable != host_state["reachable"]:
+                changed = True
+                if not reachable:
+                    emit(f"[UNREACHABLE] {host}")
+                elif host_state["reachable"] is False:
+                    emit(f"[REACHABLE] {host}")
+                host_state["reachable"] = reachable
+
+            for name, parsed in collected.items():
+                if parsed is None:
+                    continue
+                key = f"{host}_{name}"
+                digest = content_hash(canonical_json(parsed))
+                previous = host_state["keys"].get(key)
+                if previous and previous[0] == digest:
+                    status = previous[1]
+                else:
+                    status, diff = _compare_parsed(index, base_dir, key, parsed, baseline_cache)
+                    if previous is None:
+                        if status != "PASS":
+                            emit(f"[{status}] {key}{_describe_diff(diff)}")
+                    else:
+                        changed = True
+                        if previous[1] == status:
+                            emit(f"[CHANGE] {key}: content changed, still {status}{_describe_diff(diff)}")
+                        else:
+                            emit(f"[CHANGE] {key}: {previous[1]} -> {status}{_describe_diff(diff)}")
+                    host_state["keys"][key] = (digest, status)
+
+            if changed:
+                host_state["interval"] = interval
+            else:
+                host_state["interval"] = min(host_state["interval"] * 2, max_interval)
+            heapq.heappush(schedule, (time.monotonic() + host_state["interval"], order, host))
+
+
 # ---------------- Main ----------------
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        description="Collect ifconfig/route data from hosts and compare against base values."
+    )
+    p.add_argument("hosts_file", nargs="?",
+                   help="JSON file with a top-level \"hosts\" list (not needed with --local)")
+    p.add_argument("--parallel", type=int, default=1, metavar="N",
+                   help="number of hosts to collect from concurrently (default: 1)")
+    p.add_argument("--timeout", type=float, default=None, metavar="SECONDS",
+                   help="per-host collection timeout (default: none)")
+    p.add_argument("--no-batch", dest="batch", action="store_false",
+                   help="open one SSH connection per command instead of one per host")
+    p.add_argument("--backend", choices=sorted(BACKENDS), default="net-tools",
+                   help="how to read interfaces/routes: parse ifconfig/route text, "
+                        "or read /proc and sysfs directly (default: net-tools)")
+    p.add_argument("--local", action="store_true",
+                   help="collect from this machine without SSH")
+    p.add_argument("--simulate", type=int, metavar="N",
+                   help="collect from N simulated hosts (see fleet_sim.py) instead of SSH")
+    p.add_argument("--incremental", action="store_true",
+                   help="keep previous runs and write only changed snapshots "
+                        "to the content-addressed snapshot_store/")
+    p.add_argument("--sqlite", metavar="DB",
+                   help="also record the run (interfaces, routes, comparison) in a SQLite "
+                        "database; query it with snapshot_db.py")
+    p.add_argument("--watch", action="store_true",
+                   help="keep polling and print only change events (Ctrl-C to stop)")
+    p.add_argument("--interval", type=float, default=60, metavar="SECONDS",
+                   help="watch: shortest polling interval, used after a change or failure "
+                        "(default: 60)")
+    p.add_argument("--max-interval", type=float, default=900, metavar="SECONDS",
+                   help="watch: longest interval a stable host backs off to (default: 900)")
+    p.add_argument("--learn-roles", action="store_true",
+                   help="add role baselines (base_value_jsons/roles/) for configurations "
+                        "shared by at least --role-min-hosts hosts in this sweep")
+    p.add_argument("--roles", action="store_true",
+                   help="compare hosts against the role baselines instead of one baseline "
+                        "file per host, and report hosts that match no role")
+    p.add_argument("--role-min-hosts", type=int, default=2, metavar="N",
+                   help="hosts needed for --learn-roles to make a role (default: 2)")
+    p.add_argument("--metrics", metavar="DIR",
+                   help="time each phase (ssh, parse, save, compare) per host and write "
+                        "DIR/extractor_<time>.json and DIR/extractor.prom")
+    p.add_argument("--resume", action="store_true",
+                   help="continue the interrupted or partly failed sweep in "
+                        "current_extraction_jsons/: collect only hosts its journal "
+                        "doesn't list as done")
+    p.add_argument("--retries", type=int, default=2, metavar="N",
+                   help="retry a host up to N times after a timeout or ssh connection "
+                        "error (default: 2)")
+    p.add_argument("--retry-backoff", type=float, default=RETRY_BACKOFF, metavar="SECONDS",
+                   help=f"delay before the first retry, doubled for each further one "
+                        f"(default: {RETRY_BACKOFF:g})")
+    args = p.parse_args(argv)
+    if args.resume and (args.incremental or args.watch):
+        p.error("--resume works with the default current_extraction_jsons/ output only")
+    return args
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python launcher.py <hosts.json>")
-        sys.exit(1)
+    args = parse_args()
+    use_backend(args.backend)
+    run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if args.metrics:
+        timing.enable()
+    try:
+        run(args, run_timestamp)
+    finally:
+        if args.metrics:
+            json_path, prom_path = timing.write_metrics(args.metrics, "extractor", run_timestamp)
+            print(f"[OK] Timings written to {json_path} and {prom_path}")
 
-    hosts_file = Path(sys.argv[1])
 
-    if not hosts_file.exists():
-        print(f"[ERROR] File not found: {hosts_file}")
-        sys.exit(1)
+def run(args, run_timestamp):
+    """One sweep (or --watch loop) as configured by parse_args()."""
+    if args.local:
+        hosts = [socket.gethostname()]
+        runner = local_command
+    elif args.simulate:
+        global TRANSPORT
+        TRANSPORT = fleet_sim.SimulatedFleet(args.simulate)
+        hosts = TRANSPORT.hosts
+        runner = ssh_command
+    else:
+        if not args.hosts_file:
+            print("Usage: multi_host_environment_settings_extractor.py <hosts.json> [options]")
+            sys.exit(1)
 
-    hosts = load_hosts(hosts_file)
-    if not hosts:
-        print("[ERROR] No hosts found in file.")
-        sys.exit(1)
+        hosts_file = Path(args.hosts_file)
 
-    output_dir = prepare_output_directory("current_extraction_jsons")
+        if not hosts_file.exists():
+            print(f"[ERROR] File not found: {hosts_file}")
+            sys.exit(1)
 
-    for host in hosts:
-        print(f"[*] Connecting to {host}...")
+        hosts = load_hosts(hosts_file)
+        if not hosts:
+            print("[ERROR] No hosts found in file.")
+            sys.exit(1)
+        runner = ssh_command
+
+    if args.watch:
+        base_dir = Path(__file__).parent / "base_value_jsons"
+        try:
+            watch_hosts(hosts, base_dir, args.interval, args.max_interval,
+                        max(args.parallel, 1), args.timeout, args.batch, runner)
+        except KeyboardInterrupt:
+            print("\n[*] Watch stopped.")
+        finally:
+            TRANSPORT.close()
+        return
 
-	# --- ifconfig ---
-        parsed_ifconfig = get_ifconfig(host)
-        if parsed_ifconfig:
-            save_to_json(parsed_ifconfig, f"{host}_ifconfig", output_dir)
+    # Without --incremental every host is saved and journaled as soon as it's
+    # done, so an interrupted sweep can be picked up again with --resume
+    journal = on_done = None
+    completed = {}
+    todo = hosts
+    if not args.incremental:
+        journal_path = Path(__file__).parent / "current_extraction_jsons" / SWEEP_JOURNAL
+        resuming = args.resume and journal_path.exists()
+        if args.resume and not resuming:
+            print("[WARN] No sweep journal to resume from; starting a new sweep.")
+        output_dir = prepare_output_directory("current_extraction_jsons", keep=resuming)
+        journal = SweepJournal(output_dir / SWEEP_JOURNAL)
+        previous_run, records = journal.load() if resuming else (None, {})
+        if previous_run:
+            run_timestamp = previous_run  # keep filenames consistent with the saved hosts
+        else:
+            journal.start(run_timestamp, len(hosts))
+        for host in hosts:
+            record = records.get(host)
+            if (record and record["status"] == "ok"
+                    and all((output_dir / f).exists() for f in record["files"].values())):
+                completed[host] = load_host(output_dir, record)
+        todo = [host for host in hosts if host not in completed]
+        if resuming:
+            print(f"[*] Resuming run {run_timestamp}: {len(completed)} hosts done, "
+                  f"{len(todo)} to collect")
 
-	# --- route -n ---
-        parsed_routes = get_routes(host)
-        if parsed_routes:
-            save_to_json(parsed_routes, f"{host}_routes", output_dir)
+        def on_done(host, collected):
+            # --- ifconfig, route -n, ... ---
+            save_host(journal, host, collected, output_dir, run_timestamp)
+
+    try:
+        with timing.span("sweep"):
+            collected_now = dict(collect_hosts(todo, args.parallel, args.timeout, args.batch, runner,
+                                               retries=args.retries, backoff=args.retry_backoff,
+                                               on_done=on_done))
+    finally:
+        ssh_stats = TRANSPORT.stats()
+        TRANSPORT.close()
+    print(f"[*] SSH connections opened: {ssh_stats['opened']}, reused: {ssh_stats['reused']}")
+    swept = [(host, completed[host] if host in completed else collected_now[host]) for host in hosts]
+
+    if journal is not None:
+        _, records = journal.load()
+        failed = [host for host in hosts if records.get(host, {}).get("status") != "ok"]
+        if failed:
+            shown = ", ".join(failed[:20]) + (f", ... (+{len(failed) - 20})" if len(failed) > 20 else "")
+            print(f"[WARN] {len(failed)} hosts incomplete; rerun with --resume to collect "
+                  f"only those: {shown}")
+
+    if args.incremental:
+        with timing.span("store_incremental"):
+            output_dir, entries = store_incremental(swept, run_timestamp)
+        # Only summaries that differ from the previous one, so the store doesn't
+        # grow by one file per run
+        summary_dir = output_dir / SUMMARY_DIR
+    else:
+        summary_dir = output_dir
 
     # Run comparison against base values if directory exists
+    results = None
     base_dir = Path(__file__).parent / "base_value_jsons"
-    if base_dir.exists():
-	print("\n=== Camparison Summary ===")
-        results = compare_extractions(base_dir, output_dir, output_dir)
+    if args.learn_roles:
+        added = learn_roles(swept, base_dir / ROLE_DIR, args.role_min_hosts)
+        for role, role_hosts in added.items():
+            print(f"[OK] Learned {role} from {len(role_hosts)} hosts")
+        if not added:
+            print("[INFO] No new roles learned.")
+    if args.roles:
+        print("\n=== Role Comparison ===")
+        if not load_roles(base_dir / ROLE_DIR):
+            print("[WARN] No role baselines found; run with --learn-roles first.")
+        with timing.span("compare"):
+            results, diffs, assignment = compare_roles(swept, base_dir / ROLE_DIR)
+        save_comparison_summary(results, summary_dir, diffs, assignment,
+                                skip_unchanged=args.incremental)
+        members = {}
+        for host, role in assignment.items():
+            members.setdefault(role, []).append(host)
+        for role in sorted(r for r in members if r is not None):
+            print(f"[ROLE] {role}: {len(members[role])} hosts")
+        for key, status in results.items():
+            if status not in ("PASS", "NOT_COLLECTED", "PARTIAL"):
+                print(f"[{status}] {key}")
+        if members.get(None):
+            print(f"[OUTLIER] {len(members[None])} hosts match no role: {', '.join(members[None])}")
+        incomplete = [(host, collected) for host, collected in swept if host not in assignment]
+        unreachable = [host for host, collected in incomplete if not any(collected.values())]
+        partial = [host for host, collected in incomplete if any(collected.values())]
+        if unreachable:
+            print(f"[UNREACHABLE] {len(unreachable)} hosts not collected: {', '.join(unreachable)}")
+        if partial:
+            print(f"[PARTIAL] {len(partial)} hosts with some collectors failed, not matched to "
+                  f"a role: {', '.join(partial)}")
+    elif base_dir.exists():
+        print("\n=== Camparison Summary ===")
+        with timing.span("compare"):
+            if args.incremental:
+                results = compare_snapshots(base_dir, entries, summary_dir, skip_unchanged=True)
+            else:
+                results = compare_extractions(base_dir, output_dir, output_dir)
 
         # Print all host results at once
         for key, status in results.items():
@@ -262,6 +1341,11 @@ def main():
     else:
         print("[WARN] No base_value_jsons directory found. Skipping comparison.")
 
+    if args.sqlite:
+        with timing.span("sqlite"):
+            run_id = snapshot_db.record_run(args.sqlite, run_timestamp, swept, results)
+        print(f"[OK] Recorded run {run_id} in {args.sqlite}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+net_parsers.py
+
+Single-pass parsers for ifconfig and 'route -n' output.
+
+Both parsers take either one string or any iterable of lines (an open
+file, a generator reading a socket, ...), so large archived outputs can
+be streamed instead of loaded whole. Each line is looked at once, with
+precompiled patterns:
+- ifconfig: a line starting in column 0 opens a new interface block;
+  indented lines that mention inet or ether (a substring test, so the
+  RX/TX counter lines never reach the regex engine) are matched once
+  against a combined inet/inet6/ether pattern anchored at the start of
+  the line.
+- route -n: lines are skipped until the 'Destination' header, then each
+  row is split once, in one comprehension. Building the row dicts and
+  ints the schema asks for is most of the cost, so this is about as fast
+  as the original parser on a string; the gain is streaming.
+
+The output schema matches the original regex parsers in
+multi_host_environment_settings_extractor.py.
+"""
+import re
+
+_FLAGS_RE = re.compile(r"<([^>]+)>")
+# One match per indented line; exactly one group is set on success
+_ADDR_RE = re.compile(
+    r"\s*(?:inet (\d+\.\d+\.\d+\.\d+)|inet6 ([0-9a-f:]+)|ether ([0-9a-f:]+))"
+)
+
+
+def _iter_lines(source):
+    """Lines of `source`, which may be a string or an iterable of lines."""
+    if isinstance(source, str):
+        return source.splitlines()
+    return source
+
+
+def parse_ifconfig(source):
+    """Parse ifconfig output into a structured dictionary."""
+    interfaces = {}
+    iface_data = None
+    addr_match = _ADDR_RE.match
+
+    for line in _iter_lines(source):
+        if not line or line.isspace():
+            continue
+
+        # Interface header: first non-blank line, or anything in column 0
+        if iface_data is None or not line[0].isspace():
+            line = line.strip()
+            iface_data = {
+                "flags": None,
+                "inet": None,
+                "inet6": None,
+                "mac": None,
+            }
+            flags_match = _FLAGS_RE.search(line)
+            if flags_match:
+                iface_data["flags"] = flags_match.group(1).split(",")
+            interfaces[line.split(":", 1)[0].strip()] = iface_data
+            continue
+
+        if "inet" not in line and "ether" not in line:
+            continue
+        match = addr_match(line)
+        if match:
+            inet, inet6, mac = match.groups()
+            if inet:
+                iface_data["inet"] = inet
+            elif inet6:
+                iface_data["inet6"] = inet6
+            else:
+                iface_data["mac"] = mac
+
+    return interfaces
+
+
+def parse_route(source):
+    """Parse 'route -n' output into a list of dictionaries."""
+    lines = iter(_iter_lines(source))
+
+    # Skip header lines until we find the actual routing table
+    for line in lines:
+        if line.lstrip().startswith("Destination"):
+            break
+    else:
+        return []  # no valid table found
+
+    return [
+        {
+            "destination": parts[0],
+            "gateway": parts[1],
+            "genmask": parts[2],
+            "flags": parts[3],
+            "metric": int(parts[4]),
+            "ref": int(parts[5]),
+            "use": int(parts[6]),
+            "iface": parts[7],
+        }
+        for parts in map(str.split, lines)
+        if len(parts) >= 8
+    ]
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+route_index.py
+
+Fleet-wide longest-prefix-match over the extractor's route snapshots:
+which gateway and interface would each host use to reach an address?
+
+Each host's routes ({host}_routes_<time>.json, as written by
+multi_host_environment_settings_extractor.py) become one hash table per
+prefix length, {network: route}, probed from the longest length down, so
+a lookup costs one dict probe per distinct prefix length in the table
+(a handful on real hosts) instead of a scan of the route list. Among
+routes to the same prefix the lowest metric wins, as in the kernel, and
+a reject route ("!") answers "unreachable" rather than falling through
+to a shorter prefix.
+
+Hosts with identical tables share one index: tables are fingerprinted on
+destination/genmask/gateway/flags/metric/iface (not on the ref/use
+counters), so a fleet built from a few templates costs a few tables, and
+batched queries resolve each destination once per distinct table and
+fan the answer out to its hosts.
+
+Usage:
+    python3 route_index.py DIR DEST [DEST ...] [--dest-file FILE] [--hosts HOST ...]
+                           [--summary | --csv]
+        DIR is the extractor's output directory (latest snapshot per host).
+        Default output is one line per host x destination; --summary
+        groups hosts by the route they would take, --csv writes rows.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import socket
+import sys
+from pathlib import Path
+
+ROUTE_FIELDS = ("destination", "genmask", "gateway", "flags", "metric", "iface")
+
+
+def _ipv4(text):
+    """
+    Dotted quad -> int; 'default' is 0.0.0.0 as in route(8) without -n.
+    Only full dotted quads are accepted (inet_aton would take "10.1").
+    """
+    if text == "default":
+        return 0
+    return int.from_bytes(socket.inet_pton(socket.AF_INET, text), "big")
+
+
+def is_reject(route):
+    """A reject route ("!" flag): matching it means the destination is unreachable."""
+    return route is not None and "!" in (route.get("flags") or "")
+
+
+def route_fingerprint(routes):
+    """Hash of the routing-relevant fields, independent of route order and ref/use."""
+    rows = sorted(tuple(str(r.get(field)) for field in ROUTE_FIELDS) for r in routes)
+    return hashlib.sha256(json.dumps(rows).encode()).hexdigest()
+
+
+class RouteTable:
+    """One host's routes as {prefix length: {network: route}}, longest length first."""
+
+    __slots__ = ("levels",)
+
+    def __init__(self, routes):
+        by_length = {}
+        for route in routes:
+            try:
+                network = _ipv4(route["destination"])
+                mask = _ipv4(route["genmask"])
+            except (KeyError, OSError):
+                continue
+            entries = by_length.setdefault(bin(mask).count("1"), {})
+            best = entries.get(network & mask)
+            if best is None or route.get("metric", 0) < best.get("metric", 0):
+                entries[network & mask] = route
+        # (mask, entries) from /32 down to /0
+        self.levels = [
+            ((0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF, by_length[length])
+            for length in sorted(by_length, reverse=True)
+        ]
+
+    def lookup(self, address):
+        """
+        Route dict for the int `address`, or None when nothing matches.
+        A matching reject route is returned as is (see is_reject): it hides
+        any shorter prefix, as in the kernel.
+        """
+        for mask, entries in self.levels:
+            route = entries.get(address & mask)
+            if route is not None:
+                return route
+        return None
+
+
+class RouteIndex:
+    """Longest-prefix match across hosts; identical tables are stored once."""
+
+    def __init__(self):
+        self._tables = {}  # fingerprint -> RouteTable
+        self._hosts = {}   # host -> RouteTable
+
+    @classmethod
+    def from_directory(cls, base_dir, hosts=None):
+        """Index the latest {host}_routes_*.json per host in base_dir (only `hosts` if given)."""
+        latest = {}
+        for path in sorted(Path(base_dir).glob("*_routes_*.json")):
+            host = path.name.rsplit("_routes_", 1)[0]
+            if hosts is None or host in hosts:
+                latest[host] = path  # sorted by timestamp, so the last one wins
+        index = cls()
+        for host, path in latest.items():
+            try:
+                with open(path) as f:
+                    index.add_host(host, json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"[ERROR] Reading {path}: {e}", file=sys.stderr)
+        return index
+
+    def add_host(self, host, routes):
+        fingerprint = route_fingerprint(routes)
+        table = self._tables.get(fingerprint)
+        if table is None:
+            table = self._tables[fingerprint] = RouteTable(routes)
+        self._hosts[host] = table
+
+    @property
+    def hosts(self):
+        return sorted(self._hosts)
+
+    @property
+    def table_count(self):
+        return len(self._tables)
+
+    def lookup(self, host, destination):
+        """Route `host` would use for `destination`, or None (KeyError for unknown hosts)."""
+        return self._hosts[host].lookup(_ipv4(destination))
+
+    def _groups(self, hosts):
+        """[(table, [hosts using it])] for the given hosts (all when None)."""
+        groups = {}
+        for host in self.hosts if hosts is None else hosts:
+            table = self._hosts[host]
+            groups.setdefault(id(table), (table, []))[1].append(host)
+        return list(groups.values())
+
+    def lookup_many(self, destinations, hosts=None):
+        """
+        Yield (host, destination, route or None) for every destination x
+        host; each destination is resolved once per distinct table.
+        """
+        groups = self._groups(hosts)
+        for destination in destinations:
+            address = _ipv4(destination)
+            for table, members in groups:
+                route = table.lookup(address)
+                for host in members:
+                    yield host, destination, route
+
+    def summarize(self, destinations, hosts=None):
+        """
+        Yield (destination, [(route or None, [hosts])]) with hosts grouped
+        by the route they would take, most hosts first.
+        """
+        groups = self._groups(hosts)
+        for destination in destinations:
+            address = _ipv4(destination)
+            by_route = {}
+            for table, members in groups:
+                route = table.lookup(address)
+                key = None if route is None else tuple(route.get(f) for f in ROUTE_FIELDS)
+                by_route.setdefault(key, (route, []))[1].extend(members)
+            yield destination, sorted(by_route.values(), key=lambda item: -len(item[1]))
+
+
+def describe(route):
+    if route is None:
+        return "no route"
+    if is_reject(route):
+        return (f"unreachable (reject {route['destination']}/"
+                f"{bin(_ipv4(route['genmask'])).count('1')})")
+    via = "" if route["gateway"] in ("0.0.0.0", "*") else f" via {route['gateway']}"
+    return (f"{route['destination']}/{bin(_ipv4(route['genmask'])).count('1')}{via} "
+            f"dev {route['iface']} metric {route.get('metric', 0)}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Longest-prefix-match route lookups across hosts.")
+    p.add_argument("dir", help="extractor output directory with {host}_routes_*.json")
+    p.add_argument("destinations", nargs="*", metavar="DEST")
+    p.add_argument("--dest-file", help="file with one destination per line")
+    p.add_argument("--hosts", nargs="+", help="only these hosts (default: every host in DIR)")
+    out = p.add_mutually_exclusive_group()
+    out.add_argument("--summary", action="store_true", help="group hosts by the route they take")
+    out.add_argument("--csv", action="store_true", help="CSV rows on stdout")
+    args = p.parse_args()
+
+    destinations = list(args.destinations)
+    if args.dest_file:
+        with open(args.dest_file) as f:
+            destinations += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if not destinations:
+        p.error("no destinations given")
+    for destination in destinations:
+        try:
+            _ipv4(destination)
+        except OSError:
+            p.error(f"not an IPv4 address: {destination}")
+
+    index = RouteIndex.from_directory(args.dir, set(args.hosts) if args.hosts else None)
+    if not index.hosts:
+        print(f"[ERROR] No route snapshots found in {args.dir}", file=sys.stderr)
+        sys.exit(1)
+    if args.hosts:
+        for host in sorted(set(args.hosts) - set(index.hosts)):
+            print(f"[WARN] No route snapshot for {host}", file=sys.stderr)
+    print(f"[INFO] {len(index.hosts)} hosts, {index.table_count} distinct route tables",
+          file=sys.stderr)
+
+    if args.summary:
+        for destination, groups in index.summarize(destinations):
+            print(destination)
+            for route, hosts in groups:
+                shown = ", ".join(hosts[:5]) + (f", ... (+{len(hosts) - 5})" if len(hosts) > 5 else "")
+                print(f"  {len(hosts):>6} hosts  {describe(route):<50} {shown}")
+    elif args.csv:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["host", "destination", "route", "genmask", "gateway", "iface", "metric",
+                         "reject"])
+        for host, destination, route in index.lookup_many(destinations):
+            if route is None:
+                writer.writerow([host, destination, "", "", "", "", "", ""])
+            else:
+                writer.writerow([host, destination, route["destination"], route["genmask"],
+                                 route["gateway"], route["iface"], route.get("metric", 0),
+                                 int(is_reject(route))])
+    else:
+        for host, destination, route in index.lookup_many(destinations):
+            print(f"{host:<30} {destination:<16} {describe(route)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+snapshot_db.py
+
+Optional SQLite history of extractor sweeps.
+
+Each run is written in a single transaction: one `runs` row, then
+batched inserts of per-host snapshot hashes, interfaces, addresses, routes and
+comparison results. Whether a host's content changed since its previous
+snapshot is decided at insert time (against the `latest` table), so the
+timeline queries below are index lookups over change rows only.
+
+Usage:
+    python3 snapshot_db.py DB timeline HOST [--kind ifconfig|routes]
+        Runs in which HOST's snapshot content changed.
+    python3 snapshot_db.py DB routes HOST [--destination 0.0.0.0]
+        When HOST's routes to DESTINATION changed (gateway/genmask/iface/metric
+        of every route to it), were removed or came back.
+    python3 snapshot_db.py DB addresses HOST [--iface NAME]
+        When the addresses on HOST's interfaces changed, including
+        secondary IPv4 and all IPv6 addresses (inet_all/inet6_all).
+    python3 snapshot_db.py DB changed-since TIME
+        Every host/kind whose content changed at or after TIME
+        (ISO 8601, e.g. 2026-10-01 or 2026-10-01T06:00:00).
+"""
+import argparse
+import sqlite3
+import sys
+from datetime import datetime
+
+from snapshot_store import canonical_json, content_hash
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY,
+    started_at  TEXT NOT NULL
+);
+-- changed: 0 same as previous snapshot, 1 changed, 2 first snapshot
+CREATE TABLE IF NOT EXISTS snapshots (
+    run_id   INTEGER NOT NULL REFERENCES runs(id),
+    host     TEXT NOT NULL,
+    kind     TEXT NOT NULL,
+    hash     TEXT NOT NULL,
+    changed  INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS latest (
+    host  TEXT NOT NULL,
+    kind  TEXT NOT NULL,
+    hash  TEXT NOT NULL,
+    PRIMARY KEY (host, kind)
+);
+CREATE TABLE IF NOT EXISTS interfaces (
+    run_id  INTEGER NOT NULL REFERENCES runs(id),
+    host    TEXT NOT NULL,
+    name    TEXT NOT NULL,
+    flags   TEXT,
+    inet    TEXT,
+    inet6   TEXT,
+    mac     TEXT
+);
+-- every address on an interface (inet_all/inet6_all, or inet/inet6 from ifconfig)
+CREATE TABLE IF NOT EXISTS addresses (
+    run_id   INTEGER NOT NULL REFERENCES runs(id),
+    host     TEXT NOT NULL,
+    name     TEXT NOT NULL,
+    family   TEXT NOT NULL,
+    address  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS routes (
+    run_id       INTEGER NOT NULL REFERENCES runs(id),
+    host         TEXT NOT NULL,
+    destination  TEXT NOT NULL,
+    gateway      TEXT,
+    genmask      TEXT,
+    flags        TEXT,
+    metric       INTEGER,
+    ref          INTEGER,
+    use          INTEGER,
+    iface        TEXT
+);
+CREATE TABLE IF NOT EXISTS comparisons (
+    run_id  INTEGER NOT NULL REFERENCES runs(id),
+    key     TEXT NOT NULL,
+    status  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_time ON runs(started_at);
+CREATE INDEX IF NOT EXISTS snapshots_host ON snapshots(host, kind, run_id);
+CREATE INDEX IF NOT EXISTS snapshots_changes ON snapshots(run_id) WHERE changed = 1;
+CREATE INDEX IF NOT EXISTS interfaces_host ON interfaces(host, name, run_id);
+CREATE INDEX IF NOT EXISTS addresses_host ON addresses(host, name, run_id);
+CREATE INDEX IF NOT EXISTS routes_host ON routes(host, destination, run_id);
+CREATE INDEX IF NOT EXISTS routes_destination ON routes(destination);
+CREATE INDEX IF NOT EXISTS comparisons_key ON comparisons(key, run_id);
+"""
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _iso(timestamp):
+    """Run timestamps are YYYYMMDD_HHMMSS; store ISO 8601 so text order is time order."""
+    return datetime.strptime(timestamp, "%Y%m%d_%H%M%S").isoformat()
+
+
+def _change_code(previous, digest):
+    if previous is None:
+        return 2
+    return int(previous != digest)
+
+
+def record_run(db_path, timestamp, swept, results=None):
+    """
+    Insert one sweep: `swept` is [(host, {kind: parsed data})] as
+    returned by collect_hosts, `results` the comparison {key: status}.
+    Everything goes in one transaction. Returns the new run id.
+    """
+    snapshots, interfaces, addresses, routes = [], [], [], []
+    for host, collected in swept:
+        for kind, parsed in collected.items():
+            if not parsed:
+                continue
+            # same hash as the snapshot file and the baseline manifest
+            digest = content_hash(canonical_json(parsed))
+            snapshots.append((host, kind, digest))
+            if kind == "ifconfig":
+                for name, data in parsed.items():
+                    interfaces.append((
+                        host, name, ",".join(data.get("flags") or []),
+                        data.get("inet"), data.get("inet6"), data.get("mac"),
+                    ))
+                    for family in ("inet", "inet6"):
+                        all_addresses = data.get(f"{family}_all")
+                        if all_addresses is None:
+                            all_addresses = [data[family]] if data.get(family) else []
+                        addresses.extend((host, name, family, a) for a in all_addresses)
+            elif kind == "routes":
+                for r in parsed:
+                    routes.append((
+                        host, r["destination"], r["gateway"], r["genmask"], r["flags"],
+                        r["metric"], r["ref"], r["use"], r["iface"],
+                    ))
+
+    conn = connect(db_path)
+    try:
+        with conn:
+            latest = {
+                (host, kind): digest
+                for host, kind, digest in conn.execute("SELECT host, kind, hash FROM latest")
+            }
+            moved = [row for row in snapshots if latest.get(row[:2]) != row[2]]
+            run_id = conn.execute(
+                "INSERT INTO runs (started_at) VALUES (?)", (_iso(timestamp),)
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO snapshots VALUES (?, ?, ?, ?, ?)",
+                ((run_id, host, kind, digest, _change_code(latest.get((host, kind)), digest))
+                 for host, kind, digest in snapshots),
+            )
+            conn.executemany("INSERT OR REPLACE INTO latest VALUES (?, ?, ?)", moved)
+            conn.executemany(
+                "INSERT INTO interfaces VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((run_id, *row) for row in interfaces),
+            )
+            conn.executemany(
+                "INSERT INTO addresses VALUES (?, ?, ?, ?, ?)",
+                ((run_id, *row) for row in addresses),
+            )
+            conn.executemany(
+                "INSERT INTO routes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((run_id, *row) for row in routes),
+            )
+            conn.executemany(
+                "INSERT INTO comparisons VALUES (?, ?, ?)",
+                ((run_id, key, status) for key, status in (results or {}).items()),
+            )
+    finally:
+        conn.close()
+    return run_id
+
+
+# ---------------- Queries ----------------
+def host_timeline(conn, host, kind=None):
+    """(time, kind, hash) for each run where the host's content changed."""
+    return conn.execute(
+        """
+        SELECT r.started_at, s.kind, s.hash
+        FROM snapshots s JOIN runs r ON r.id = s.run_id
+        WHERE s.host = ? AND (? IS NULL OR s.kind = ?) AND s.changed > 0
+        ORDER BY s.run_id, s.kind
+        """,
+        (host, kind, kind),
+    ).fetchall()
+
+
+def route_history(conn, host, destination="0.0.0.0"):
+    """
+    (time, [(gateway, genmask, iface, metric), ...]) for each run in which
+    the set of HOST's routes to `destination` changed. The whole set is
+    compared, so a pair of routes (e.g. two defaults at different metrics)
+    is one state; an empty list means the routes disappeared.
+    """
+    rows = conn.execute(
+        """
+        SELECT started_at, cur FROM (
+            SELECT started_at, cur, LAG(cur) OVER (ORDER BY run_id) AS prev FROM (
+                SELECT r.started_at, s.run_id, COALESCE((
+                    SELECT group_concat(route, ';') FROM (
+                        SELECT t.gateway || '|' || t.genmask || '|' || t.iface || '|' || t.metric
+                            AS route
+                        FROM routes t
+                        WHERE t.run_id = s.run_id AND t.host = s.host AND t.destination = ?
+                        ORDER BY route
+                    )
+                ), '') AS cur
+                FROM snapshots s JOIN runs r ON r.id = s.run_id
+                WHERE s.host = ? AND s.kind = 'routes'
+            )
+        )
+        WHERE cur != COALESCE(prev, '')
+        ORDER BY started_at
+        """,
+        (destination, host),
+    ).fetchall()
+    history = []
+    for started_at, routes in rows:
+        parsed = []
+        for route in routes.split(";") if routes else []:
+            gateway, genmask, iface, metric = route.split("|")
+            parsed.append((gateway, genmask, iface, int(metric)))
+        history.append((started_at, parsed))
+    return history
+
+
+def address_history(conn, host, name=None):
+    """
+    (time, interface, [family address, ...]) for each run in which the
+    set of addresses on one of HOST's interfaces (only `name` if given)
+    changed, secondary and IPv6 addresses included.
+    """
+    rows = conn.execute(
+        """
+        SELECT started_at, name, cur FROM (
+            SELECT started_at, name, cur,
+                   LAG(cur) OVER (PARTITION BY name ORDER BY run_id) AS prev FROM (
+                SELECT r.started_at, i.run_id, i.name, COALESCE((
+                    SELECT group_concat(address, ';') FROM (
+                        SELECT a.family || ' ' || a.address AS address
+                        FROM addresses a
+                        WHERE a.run_id = i.run_id AND a.host = i.host AND a.name = i.name
+                        ORDER BY address
+                    )
+                ), '') AS cur
+                FROM interfaces i JOIN runs r ON r.id = i.run_id
+                WHERE i.host = ? AND (? IS NULL OR i.name = ?)
+            )
+        )
+        WHERE cur != COALESCE(prev, '')
+        ORDER BY started_at, name
+        """,
+        (host, name, name),
+    ).fetchall()
+    return [(started_at, iface, cur.split(";") if cur else []) for started_at, iface, cur in rows]
+
+
+def changed_since(conn, since):
+    """
+    (host, kind, first change time, changes) for content changes in runs
+    stamped at or after `since`. Selected by run time, not id: a resumed
+    sweep gets a new id but keeps its original timestamp.
+    """
+    # First snapshots aren't drift; only the partial index of change rows is read
+    return conn.execute(
+        """
+        SELECT s.host, s.kind, MIN(r.started_at), COUNT(*)
+        FROM runs r JOIN snapshots s INDEXED BY snapshots_changes ON s.run_id = r.id
+        WHERE r.started_at >= ? AND s.changed = 1
+        GROUP BY s.host, s.kind
+        ORDER BY s.host, s.kind
+        """,
+        (since,),
+    ).fetchall()
+
+
+def main():
+    p = argparse.ArgumentParser(description="Query the extractor's SQLite history.")
+    p.add_argument("db")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    t = sub.add_parser("timeline", help="runs in which a host's data changed")
+    t.add_argument("host")
+    t.add_argument("--kind", choices=["ifconfig", "routes"])
+
+    r = sub.add_parser("routes", help="changes to one route on a host")
+    r.add_argument("host")
+    r.add_argument("--destination", default="0.0.0.0")
+
+    a = sub.add_parser("addresses", help="changes to the addresses on a host's interfaces")
+    a.add_argument("host")
+    a.add_argument("--iface", help="only this interface")
+
+    c = sub.add_parser("changed-since", help="hosts whose data changed since a time")
+    c.add_argument("since", help="ISO 8601 time, e.g. 2026-10-01T00:00:00")
+
+    args = p.parse_args()
+
+    conn = connect(args.db)
+    try:
+        if args.command == "timeline":
+            rows = host_timeline(conn, args.host, args.kind)
+            for started_at, kind, digest in rows:
+                print(f"{started_at}  {kind:<10} {digest[:12]}")
+        elif args.command == "routes":
+            rows = route_history(conn, args.host, args.destination)
+            for started_at, routes in rows:
+                if not routes:
+                    print(f"{started_at}  no route")
+                for gateway, genmask, iface, metric in routes:
+                    print(f"{started_at}  via {gateway} mask {genmask} dev {iface} metric {metric}")
+        elif args.command == "addresses":
+            rows = address_history(conn, args.host, args.iface)
+            for started_at, iface, addresses in rows:
+                print(f"{started_at}  {iface:<12} {', '.join(addresses) or 'no addresses'}")
+        else:
+            rows = changed_since(conn, args.since)
+            for host, kind, first, count in rows:
+                print(f"{host:<30} {kind:<10} first {first}  changes {count}")
+    finally:
+        conn.close()
+
+    if not rows:
+        print("[INFO] No matching rows.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+snapshot_store.py
+
+Content-addressed history of extraction snapshots.
+
+Layout under the store root:
+    objects/<2 hex>/<sha256>.json   one blob per distinct snapshot content
+    refs.json                       {key: {"hash": ..., "timestamp": ...}} latest content per
+                                    key and the run it first appeared in
+    history.jsonl                   one line per key per run: key, hash, timestamp, changed
+    summaries/                      the extractor's comparison_summary_<time>.json, one per
+                                    run whose comparison results changed
+
+A run only writes a blob when a key's canonical content changed; an
+unchanged key costs one history line (buffered and appended once per
+run). Nothing from earlier runs is deleted.
+
+Usage: python3 snapshot_store.py [--root DIR] [KEY]
+    Without KEY, list the latest hash per key; with KEY, print its history.
+"""
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+def canonical_json(data):
+    """
+    The one serialisation used for every snapshot we write.
+    Equal parsed data always gives byte-identical files, so a file's
+    content hash can stand in for its parsed contents.
+    """
+    return json.dumps(data, indent=4)
+
+
+def content_hash(raw):
+    """SHA-256 hex digest of a snapshot's bytes (or canonical text)."""
+    if isinstance(raw, str):
+        raw = raw.encode()
+    return hashlib.sha256(raw).hexdigest()
+
+
+class SnapshotStore:
+    """Blobs keyed by SHA-256 of their canonical text, plus per-key refs."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.refs_file = self.root / "refs.json"
+        self.history_file = self.root / "history.jsonl"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(self.refs_file, "r") as f:
+                self.refs = json.load(f)
+        except (OSError, ValueError):
+            self.refs = {}
+        self._pending = []
+        self.blobs_written = 0
+
+    def blob_path(self, digest):
+        return self.objects / digest[:2] / f"{digest}.json"
+
+    def put(self, key, text):
+        """
+        Record `text` (canonical JSON) as the current snapshot for `key`.
+        Returns (hash, changed); the blob is only written for new content.
+        """
+        digest = content_hash(text)
+        previous = self.refs.get(key, {}).get("hash")
+        path = self.blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                f.write(text)
+            os.replace(tmp, path)
+            self.blobs_written += 1
+        self._pending.append((key, digest, previous != digest))
+        return digest, previous != digest
+
+    def commit(self, timestamp):
+        """Append this run's history lines and update refs if any key moved."""
+        if not self._pending:
+            return
+        moved = False
+        lines = []
+        for key, digest, changed in self._pending:
+            lines.append(json.dumps(
+                {"key": key, "hash": digest, "timestamp": timestamp, "changed": changed}
+            ))
+            if changed:
+                moved = True
+                self.refs[key] = {"hash": digest, "timestamp": timestamp}
+        with open(self.history_file, "a") as f:
+            f.write("\n".join(lines) + "\n")
+        if moved:
+            tmp = self.refs_file.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump(self.refs, f, indent=4)
+            os.replace(tmp, self.refs_file)
+        self._pending = []
+
+    def load(self, digest):
+        """Parsed snapshot for a content hash."""
+        with open(self.blob_path(digest), "r") as f:
+            return json.load(f)
+
+    def history(self, key=None):
+        """Yield history records (optionally for one key), oldest first."""
+        if not self.history_file.exists():
+            return
+        with open(self.history_file, "r") as f:
+            for line in f:
+                record = json.loads(line)
+                if key is None or record["key"] == key:
+                    yield record
+
+
+def main():
+    p = argparse.ArgumentParser(description="Inspect the extraction snapshot store.")
+    p.add_argument("--root", default=str(Path(__file__).parent / "snapshot_store"))
+    p.add_argument("key", nargs="?", help="snapshot key, e.g. host1_routes")
+    args = p.parse_args()
+
+    store = SnapshotStore(args.root)
+    if args.key is None:
+        for key, ref in sorted(store.refs.items()):
+            print(f"{key:<40} {ref['hash'][:12]}  {ref['timestamp']}")
+        return
+
+    for record in store.history(args.key):
+        marker = "*" if record["changed"] else " "
+        print(f"{record['timestamp']} {marker} {record['hash'][:12]}")
+
+
+if __name__ == "__main__":
+    main()
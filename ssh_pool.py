@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+ssh_pool.py
+
+Shared SSH connection pool for the extractor and the multicast managers.
+
+Each target ("host" or "user@host") gets one OpenSSH ControlMaster
+connection for the lifetime of the pool. Every ssh/scp call made through
+the pool adds ControlMaster/ControlPath options, so only the first call
+per target pays for the TCP + key handshake; later calls ride the
+existing master socket.
+
+Usage:
+    pool = SSHPool()
+    subprocess.run(["ssh", *pool.options("user@host"), "user@host", "uptime"])
+    ...
+    print(pool.stats())   # {"opened": 1, "reused": 41}
+    pool.close()
+"""
+import hashlib
+import os
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+
+class SSHPool:
+    """One persistent ControlMaster connection per target, with counters."""
+
+    def __init__(self, control_dir=None, persist=600, connect_wait=10.0):
+        # Unix socket paths are limited to ~100 chars, so keep the dir short
+        self._control_dir = control_dir
+        self._owns_dir = control_dir is None
+        self.persist = persist
+        self._lock = threading.Lock()
+        self._targets = set()
+        # target -> monotonic time its first call was handed out, until its socket exists
+        self._opening = {}
+        self.connect_wait = connect_wait
+        self.opened = 0
+        self.reused = 0
+
+    # ---------- paths ----------
+    def _dir(self):
+        with self._lock:
+            if self._control_dir is None:
+                self._control_dir = tempfile.mkdtemp(prefix="cec-ssh-")
+            return self._control_dir
+
+    def control_path(self, target):
+        """Socket path for `target` (hashed so any hostname length fits)."""
+        digest = hashlib.sha1(target.encode()).hexdigest()[:16]
+        return os.path.join(self._dir(), digest)
+
+    # ---------- options ----------
+    def options(self, target):
+        """
+        ssh/scp `-o` options that route a call to `target` through its
+        master connection. Counts the call as opened or reused.
+        """
+        path = self.control_path(target)
+        # A call made while the socket exists multiplexes over it. The first
+        # call before ssh has created it opens the master; concurrent calls
+        # to the same target wait (up to connect_wait from that first call)
+        # for the socket instead of each opening a connection of their own.
+        while True:
+            with self._lock:
+                self._targets.add(target)
+                if os.path.exists(path):
+                    self._opening.pop(target, None)
+                    self.reused += 1
+                    break
+                started = self._opening.get(target)
+                now = time.monotonic()
+                if started is None or now - started >= self.connect_wait:
+                    # Nobody is connecting (or the last attempt never came up)
+                    self._opening[target] = now
+                    self.opened += 1
+                    break
+            time.sleep(0.05)
+        return [
+            "-o", "ControlMaster=auto",
+            "-o", f"ControlPath={path}",
+            "-o", f"ControlPersist={self.persist}",
+        ]
+
+    def options_str(self, target):
+        """options() quoted for use in a shell command string."""
+        return " ".join(shlex.quote(o) for o in self.options(target))
+
+    # ---------- bookkeeping ----------
+    def stats(self):
+        """Connections opened vs calls that reused an existing master."""
+        with self._lock:
+            return {"opened": self.opened, "reused": self.reused}
+
+    def close(self):
+        """Stop every master connection and remove the control directory."""
+        with self._lock:
+            targets, self._targets = self._targets, set()
+            self._opening.clear()
+            control_dir = self._control_dir
+        if control_dir is None:
+            return
+        for target in targets:
+            path = self.control_path(target)
+            if os.path.exists(path):
+                subprocess.call(
+                    ["ssh", "-o", f"ControlPath={path}", "-O", "exit", target],
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                )
+        if self._owns_dir:
+            shutil.rmtree(control_dir, ignore_errors=True)
+            self._control_dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Root modules, and the v1 multicast scripts (recv_mcast imports send_mcast)
+for path in (ROOT, ROOT / "group_multicast_packet"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,90 @@
+import asyncio
+import csv
+import importlib.util
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import ROOT
+from transport import LocalTransport
+
+V2 = ROOT / "version_2_group_multicast_packet"
+
+
+def load(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# async_mcast_manager does "import mcast_manager as config"; give it the v2 one
+config = load("mcast_manager_v2", V2 / "mcast_manager.py")
+saved = sys.modules.get("mcast_manager")
+sys.modules["mcast_manager"] = config
+try:
+    async_mcast_manager = load("async_mcast_manager", V2 / "async_mcast_manager.py")
+finally:
+    if saved is None:
+        del sys.modules["mcast_manager"]
+    else:
+        sys.modules["mcast_manager"] = saved
+
+
+@pytest.fixture
+def local(monkeypatch):
+    monkeypatch.setattr(config, "TRANSPORT", LocalTransport())
+
+
+def test_run_remote_streams_lines_and_returns_status(local):
+    lines = []
+    status = asyncio.run(async_mcast_manager.run_remote(
+        "h", "echo one; echo two; exit 3", asyncio.Semaphore(1), lines.append))
+    assert status == 3
+    assert lines == ["one", "two"]
+
+
+def test_run_remote_kills_the_whole_group_on_timeout(local):
+    # the backgrounded sleep keeps stdout open unless it is killed too
+    started = time.monotonic()
+    status = asyncio.run(async_mcast_manager.run_remote(
+        "h", "sleep 30 & echo started; wait", asyncio.Semaphore(1), timeout=0.5))
+    assert status is None
+    assert time.monotonic() - started < 10
+
+
+def test_sessions_bound_concurrent_commands(local):
+    async def main():
+        sessions = asyncio.Semaphore(2)
+        await asyncio.gather(*(async_mcast_manager.run_remote("h", "sleep 0.3", sessions)
+                               for _ in range(4)))
+
+    started = time.monotonic()
+    asyncio.run(main())
+    assert time.monotonic() - started >= 0.6
+
+
+def test_matrix_over_loopback_hears_every_pair(local, tmp_path, monkeypatch):
+    # the remote commands run "python3.10"; point it at this interpreter
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    (bin_dir / "python3.10").symlink_to(sys.executable)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setattr(config, "HOSTS", ["a", "b", "c"])
+    monkeypatch.setattr(config, "REMOTE_DIR", str(tmp_path / "remote"))
+    args = SimpleNamespace(max_sessions=4, wave=2, stagger=0.05, csv=str(tmp_path / "matrix.csv"),
+                           jsonl=None, db=None)
+
+    asyncio.run(async_mcast_manager.run(args))
+
+    with open(args.csv) as f:
+        rows = list(csv.DictReader(f))
+    assert sorted((r["wave"], r["sender"], r["receiver"], r["result"]) for r in rows) == [
+        (str(wave), sender, receiver, "success")
+        for wave, receivers in ((0, "ab"), (1, "c"))
+        for sender in "abc"
+        for receiver in receivers
+    ]
@@ -0,0 +1,62 @@
+import json
+
+import multi_host_environment_settings_extractor as extractor
+
+
+def write(path, data, indent=4):
+    path.write_text(json.dumps(data, indent=indent))
+    return path
+
+
+def test_index_keeps_latest_file_per_key(tmp_path):
+    write(tmp_path / "web1_ifconfig_20260101_000000.json", {"old": True})
+    write(tmp_path / "web1_ifconfig_20260102_000000.json", {"new": True})
+    write(tmp_path / "web1_routes_20260101_000000.json", [])
+
+    index = extractor.build_baseline_index(tmp_path)
+    assert set(index) == {"web1_ifconfig", "web1_routes"}
+    assert index["web1_ifconfig"]["file"] == "web1_ifconfig_20260102_000000.json"
+    assert index["web1_ifconfig"]["hash"] == extractor.file_hash(
+        tmp_path / "web1_ifconfig_20260102_000000.json")
+
+
+def test_manifest_hashes_are_reused_until_the_file_changes(tmp_path, monkeypatch):
+    path = write(tmp_path / "web1_ifconfig_20260101_000000.json", {"a": 1})
+    extractor.build_baseline_index(tmp_path)
+    assert (tmp_path / extractor.BASELINE_MANIFEST).exists()
+
+    hashed = []
+    file_hash = extractor.file_hash
+    monkeypatch.setattr(extractor, "file_hash", lambda p: hashed.append(p.name) or file_hash(p))
+    extractor.build_baseline_index(tmp_path)
+    assert hashed == []
+
+    write(path, {"a": 22})
+    index = extractor.build_baseline_index(tmp_path)
+    assert hashed == [path.name]
+    assert index["web1_ifconfig"]["hash"] == file_hash(path)
+
+
+def test_compare_against_index(tmp_path):
+    base_dir, new_dir = tmp_path / "base", tmp_path / "new"
+    base_dir.mkdir()
+    new_dir.mkdir()
+    same = {"eth0": {"inet": "10.0.0.1", "flags": ["UP"]}}
+    write(base_dir / "web1_ifconfig_20260101_000000.json", same)
+    write(base_dir / "web2_ifconfig_20260101_000000.json", same)
+    write(base_dir / "web3_ifconfig_20260101_000000.json", same)
+    index = extractor.build_baseline_index(base_dir)
+
+    new_files = [
+        write(new_dir / "web1_ifconfig_x.json", same),
+        write(new_dir / "web2_ifconfig_x.json", same, indent=None),
+        write(new_dir / "web3_ifconfig_x.json", {"eth0": {"inet": "10.0.0.9", "flags": ["UP"]}}),
+        write(new_dir / "web4_ifconfig_x.json", same),
+    ]
+    entries = [(f.name.replace("_x.json", ""), extractor.file_hash(f), f) for f in new_files]
+    results, diffs = extractor.compare_against_index(index, base_dir, entries)
+
+    # web2 only differs in formatting, so it passes after a full parse
+    assert results == {"web1_ifconfig": "PASS", "web2_ifconfig": "PASS",
+                       "web3_ifconfig": "FAIL", "web4_ifconfig": "MISSING_BASE"}
+    assert list(diffs) == ["web3_ifconfig"]
@@ -0,0 +1,47 @@
+import subprocess
+
+import multi_host_environment_settings_extractor as extractor
+
+MARKER = "__CEC_test__"
+
+
+def run_script(collectors):
+    script = extractor.build_batch_script(collectors, MARKER)
+    return subprocess.run(["sh", "-c", script], capture_output=True, text=True).stdout
+
+
+def test_sections_and_exit_statuses_round_trip():
+    collectors = {
+        "a": ("printf 'one\\ntwo\\n'", None),
+        "b": ("printf 'no newline'", None),
+        "c": ("echo partial; false", None),
+    }
+    sections = extractor.split_batch_output(run_script(collectors), MARKER)
+    assert sections == {
+        "a": ("one\ntwo\n", 0),
+        "b": ("no newline", 0),
+        "c": ("partial\n", 1),
+    }
+
+
+def test_section_cut_short_has_no_status():
+    output = f"{MARKER} BEGIN a\nsome output\n"
+    assert extractor.split_batch_output(output, MARKER) == {"a": ("some output\n", None)}
+
+
+def test_run_batch_parses_only_successful_sections():
+    collectors = {
+        "good": ("echo 1", lambda text: text.strip()),
+        "bad": ("echo 2; exit 3", lambda text: text.strip()),
+    }
+
+    def runner(host, command, timeout=None):
+        return subprocess.run(["sh", "-c", command], capture_output=True, text=True).stdout
+
+    # "bad" exits the whole script, so it never reports an END line
+    assert extractor.run_batch("h", collectors, runner=runner) == {"good": "1", "bad": None}
+
+
+def test_run_batch_connection_failure():
+    collectors = {"good": ("echo 1", str)}
+    assert extractor.run_batch("h", collectors, runner=lambda *a, **k: None) == {"good": None}
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+
+import multi_host_environment_settings_extractor as extractor
+
+
+@pytest.fixture
+def collectors(monkeypatch):
+    monkeypatch.setattr(extractor, "COLLECTORS", {
+        "first": ("first", str.strip),
+        "second": ("second", str.strip),
+    })
+
+
+class Runner:
+    """Answers every command with "<host>:<command>" after `delays[host]` seconds."""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.lock = threading.Lock()
+        self.active = self.peak = 0
+        self.timeouts = []
+
+    def __call__(self, host, command, timeout=None):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.timeouts.append(timeout)
+        time.sleep(self.delays[host])
+        with self.lock:
+            self.active -= 1
+        return f"{host}:{command}\n"
+
+
+def test_results_keep_host_order_whatever_order_hosts_finish(collectors):
+    runner = Runner({"slow": 0.3, "mid": 0.15, "fast": 0.0})
+    swept = extractor.collect_hosts(["slow", "mid", "fast"], parallel=3, batch=False,
+                                    runner=runner, verbose=False)
+    assert [host for host, _ in swept] == ["slow", "mid", "fast"]
+    assert swept[0][1] == {"first": "slow:first", "second": "slow:second"}
+
+
+def test_parallel_bounds_hosts_in_flight(collectors):
+    hosts = [f"h{n}" for n in range(4)]
+    runner = Runner(dict.fromkeys(hosts, 0.1))
+    extractor.collect_hosts(hosts, parallel=2, batch=False, runner=runner, verbose=False)
+    assert runner.peak == 2
+
+    runner = Runner(dict.fromkeys(hosts, 0.1))
+    extractor.collect_hosts(hosts, parallel=1, batch=False, runner=runner, verbose=False)
+    assert runner.peak == 1
+
+
+def test_host_timeout_is_shared_by_its_commands(collectors):
+    runner = Runner({"h": 0.3})
+    collected = extractor.collect_host("h", timeout=0.2, batch=False, runner=runner, verbose=False)
+    # The first command used up the budget; the second was never run
+    assert collected == {"first": "h:first", "second": None}
+    assert len(runner.timeouts) == 1 and 0 < runner.timeouts[0] <= 0.2
+
+
+def test_batch_passes_the_whole_budget_to_one_call(collectors):
+    runner = Runner({"h": 0.0})
+    extractor.collect_hosts(["h"], timeout=5, runner=runner, verbose=False)
+    assert runner.timeouts == [5]
@@ -0,0 +1,71 @@
+import json
+
+import multi_host_environment_settings_extractor as extractor
+
+
+def route(destination="0.0.0.0", gateway="10.0.0.1", genmask="0.0.0.0", metric=100, iface="eth0"):
+    return {"destination": destination, "gateway": gateway, "genmask": genmask, "flags": "UG",
+            "metric": metric, "ref": 0, "use": 0, "iface": iface}
+
+
+def test_routes_reordered_are_not_a_change():
+    base = [route(), route("10.0.0.0", "0.0.0.0", "255.255.255.0", 0)]
+    diff = extractor.diff_routes(base, list(reversed(base)))
+    assert diff == {"kind": "routes", "added": [], "removed": [], "changed": []}
+
+
+def test_route_field_change_added_and_removed():
+    base = [route(), route("192.168.0.0", genmask="255.255.0.0")]
+    new = [route(gateway="10.0.0.254"), route("172.16.0.0", genmask="255.240.0.0")]
+    diff = extractor.diff_routes(base, new)
+    assert diff["changed"] == [{
+        "route": {"destination": "0.0.0.0", "genmask": "0.0.0.0", "iface": "eth0"},
+        "fields": {"gateway": {"base": "10.0.0.1", "new": "10.0.0.254"}},
+    }]
+    assert [r["destination"] for r in diff["added"]] == ["172.16.0.0"]
+    assert [r["destination"] for r in diff["removed"]] == ["192.168.0.0"]
+
+
+def test_routes_sharing_a_key_prefer_the_identical_one():
+    base = [route(metric=100), route(metric=600)]
+    # Same pair in the other order, plus the 600 route changing gateway
+    new = [route(metric=600, gateway="10.0.0.2"), route(metric=100)]
+    diff = extractor.diff_routes(base, new)
+    assert diff["added"] == [] and diff["removed"] == []
+    assert diff["changed"][0]["fields"] == {"gateway": {"base": "10.0.0.1", "new": "10.0.0.2"}}
+
+
+def test_ifconfig_diff_by_interface_name():
+    base = {"eth0": {"inet": "10.0.0.5", "mac": "aa"}, "eth1": {"inet": None, "mac": "bb"}}
+    new = {"eth0": {"inet": "10.0.0.6", "mac": "aa"}, "eth2": {"inet": None, "mac": "cc"}}
+    diff = extractor.diff_ifconfig(base, new)
+    assert diff["changed"] == [{"iface": "eth0",
+                                "fields": {"inet": {"base": "10.0.0.5", "new": "10.0.0.6"}}}]
+    assert diff["added"] == [{"iface": "eth2", "inet": None, "mac": "cc"}]
+    assert diff["removed"] == [{"iface": "eth1", "inet": None, "mac": "bb"}]
+
+
+def test_diff_snapshots_dispatch():
+    assert extractor.diff_snapshots({}, {})["kind"] == "ifconfig"
+    assert extractor.diff_snapshots([], [])["kind"] == "routes"
+    assert extractor.diff_snapshots([], {}) == {"kind": "value", "base": [], "new": {}}
+
+
+def test_compare_against_index_pass_fail_missing(tmp_path):
+    base_dir = tmp_path / "base"
+    new_dir = tmp_path / "new"
+    base_dir.mkdir()
+    new_dir.mkdir()
+    snapshots = {"h1_routes": [route()], "h2_routes": [route()]}
+    for key, data in snapshots.items():
+        (base_dir / f"{key}_20260101_000000.json").write_text(extractor.canonical_json(data))
+    changed = [route(gateway="10.0.0.9")]
+    (new_dir / "h1_routes_20260102_000000.json").write_text(extractor.canonical_json([route()]))
+    (new_dir / "h2_routes_20260102_000000.json").write_text(extractor.canonical_json(changed))
+    (new_dir / "h3_routes_20260102_000000.json").write_text(extractor.canonical_json([route()]))
+
+    results = extractor.compare_extractions(base_dir, new_dir, tmp_path / "out")
+    assert results == {"h1_routes": "PASS", "h2_routes": "FAIL", "h3_routes": "MISSING_BASE"}
+    summary, = (tmp_path / "out").glob("comparison_summary_*.json")
+    diffs = json.loads(summary.read_text())["diffs"]
+    assert list(diffs) == ["h2_routes"]
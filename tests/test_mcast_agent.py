@@ -0,0 +1,93 @@
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+import mcast_agent
+from mcast_agent import Agent, AgentClient, AgentError
+
+AGENT = os.path.abspath(mcast_agent.__file__)
+PORT = 47000 + os.getpid() % 1000  # away from the default 5000 and from other runs
+
+
+def serve(agent, *requests):
+    rfile = io.BytesIO(b"".join(
+        (r if isinstance(r, bytes) else json.dumps(r).encode()) + b"\n" for r in requests
+    ))
+    wfile = io.BytesIO()
+    agent.serve(rfile, wfile)
+    return [json.loads(line) for line in wfile.getvalue().splitlines()]
+
+
+def test_protocol_one_reply_per_line_until_quit():
+    agent = Agent(sender_id=7)
+    replies = serve(agent, {"cmd": "ping"}, {"cmd": "nope"}, b"{not json",
+                    {"cmd": "stats", "group": "239.1.1.1", "port": PORT},
+                    {"cmd": "quit"}, {"cmd": "ping"})
+    assert replies[0]["ok"] and replies[0]["sender_id"] == 7
+    assert replies[1] == {"ok": False, "error": "ValueError: unknown command 'nope'"}
+    assert replies[2]["ok"] is False and replies[2]["error"].startswith("JSONDecodeError")
+    assert replies[3]["ok"] is False and "not joined" in replies[3]["error"]
+    assert replies[4] == {"ok": True}
+    assert len(replies) == 5  # nothing is read after quit
+
+
+def test_listener_ignores_groups_it_did_not_join():
+    agent = Agent(sender_id=1)
+    try:
+        serve(agent, {"cmd": "join", "group": "239.1.1.77", "port": PORT},
+              {"cmd": "join", "group": "239.1.1.78", "port": PORT},
+              {"cmd": "send", "group": "239.1.1.78", "port": PORT, "count": 5})
+        time.sleep(0.3)
+        stats = serve(agent, {"cmd": "stats", "group": "239.1.1.77", "port": PORT},
+                      {"cmd": "stats", "group": "239.1.1.78", "port": PORT})
+    finally:
+        agent.close()
+    if not stats[1]["senders"]:
+        pytest.skip("no loopback multicast here")
+    assert stats[1]["senders"]["1"]["unique"] == 5
+    assert stats[0]["senders"] == {}
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="IP_MULTICAST_ALL is Linux-only")
+def test_listener_turns_off_multicast_all():
+    # matters when the bind falls back to INADDR_ANY: only this socket's groups get through
+    listener = mcast_agent.Listener("239.1.1.77", PORT)
+    try:
+        assert listener.sock.getsockopt(socket.IPPROTO_IP, mcast_agent.IP_MULTICAST_ALL) == 0
+    finally:
+        listener.sock.close()
+
+
+def test_matrix_round_trip_over_loopback():
+    clients = [AgentClient.spawn(f"agent{i}", [sys.executable, AGENT]) for i in range(2)]
+    try:
+        assert clients[0].request("ping")["pid"] != clients[1].request("ping")["pid"]
+        matrix, errors = mcast_agent.run_matrix(clients, "239.1.1.79", PORT, count=20)
+        with pytest.raises(AgentError):
+            clients[0].request("stats", group="239.1.1.80", port=PORT)
+    finally:
+        for client in clients:
+            client.close()
+    if all(s is None for s in matrix.values()):
+        pytest.skip("no loopback multicast here")
+    assert errors == {}
+    assert {pair: s["unique"] for pair, s in matrix.items()} == {
+        ("agent0", "agent0"): 20, ("agent0", "agent1"): 20,
+        ("agent1", "agent0"): 20, ("agent1", "agent1"): 20,
+    }
+
+
+def test_local_mode_exits_zero():
+    result = subprocess.run(
+        [sys.executable, AGENT, "--local", "2", "--count", "10", "--group", "239.1.1.81",
+         "--port", str(PORT)],
+        capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "Matrix of 2 agents" in result.stdout
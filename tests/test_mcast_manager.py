@@ -0,0 +1,162 @@
+import csv
+import json
+import shlex
+import threading
+import time
+
+import pytest
+
+import mcast_manager
+import mcast_results
+from transport import LocalTransport
+
+
+class FakeTransport:
+    """Answers remote commands with exit status 0, or failed[host], and records them."""
+
+    def __init__(self, failed=None):
+        self.failed = failed or {}
+        self.commands = []
+
+    def call(self, host, command):
+        self.commands.append((host, command))
+        return self.failed.get(host, 0), ""
+
+
+def stream(sender, addr, iface, count, group="239.1.1.1", port=5000, size=64):
+    return {"sender": sender, "addr": addr, "iface": iface, "group": group, "port": port,
+            "size": size, "unique": count, "reordered": 0, "duplicates": 0, "jitter_us": 1.0,
+            "latency_us": {"mean": 10.0, "hist": {"16": count}}}
+
+
+@pytest.fixture
+def sweep_env(tmp_path, monkeypatch):
+    """HOSTS a (snapshot: eth0 10.0.0.1) and b (no snapshot), run from tmp_path."""
+    snapshots = tmp_path / "snapshots"
+    snapshots.mkdir()
+    (snapshots / "a_ifconfig_20260101_000000.json").write_text(json.dumps(
+        {"eth0": {"flags": ["UP", "MULTICAST"], "inet": "10.0.0.1"}}
+    ))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(mcast_manager, "HOSTS", ["a", "b"])
+    monkeypatch.setattr(mcast_manager, "TRANSPORT", FakeTransport())
+    monkeypatch.setattr(mcast_manager, "deploy_scripts", lambda: None)
+    monkeypatch.setattr(mcast_manager, "start_receivers",
+                        lambda sender=None, options=None: ["a", "b"])
+    return snapshots
+
+
+def read_cube():
+    [path] = mcast_manager.Path("results").glob("sweep_*/cube.csv")
+    with open(path) as f:
+        return list(csv.DictReader(f))
+
+
+def test_sweep_mixes_hosts_with_and_without_snapshots(sweep_env, tmp_path, monkeypatch):
+    # b sends from whatever address its kernel picks (192.168.1.2)
+    summaries = {
+        "a": {"streams": [stream(0, "10.0.0.1", "10.0.0.1", 10),
+                          stream(1, "192.168.1.2", "10.0.0.1", 10)]},
+        "b": {"streams": [stream(0, "10.0.0.1", "0.0.0.0", 10),
+                          stream(1, "192.168.1.2", "0.0.0.0", 10)]},
+    }
+    monkeypatch.setattr(mcast_manager, "stop_receiver_stats", summaries.get)
+    db = tmp_path / "results.db"
+
+    mcast_manager.run_sweep(["239.1.1.1"], [5000], [64], 10, "1k", str(sweep_env), str(db))
+
+    rows = read_cube()
+    assert [(r["sender"], r["sender_iface"], r["receiver"], r["receiver_iface"]) for r in rows] == [
+        ("a", "10.0.0.1", "a", "10.0.0.1"), ("b", "", "a", "10.0.0.1"),
+        ("a", "10.0.0.1", "b", "0.0.0.0"), ("b", "", "b", "0.0.0.0"),
+    ]
+    assert {r["received"] for r in rows} == {"10"}
+    conn = mcast_results.connect(db)
+    assert conn.execute("SELECT COUNT(*), SUM(received) FROM results").fetchone() == (4, 40)
+
+
+def test_sweep_reports_failed_sender_as_send_error(sweep_env, tmp_path, monkeypatch):
+    monkeypatch.setattr(mcast_manager, "TRANSPORT", FakeTransport(failed={"b": 2}))
+    summaries = {h: {"streams": [stream(0, "10.0.0.1", iface, 10)]}
+                 for h, iface in (("a", "10.0.0.1"), ("b", "0.0.0.0"))}
+    monkeypatch.setattr(mcast_manager, "stop_receiver_stats", summaries.get)
+    db = tmp_path / "results.db"
+
+    with pytest.raises(SystemExit) as exit_info:
+        mcast_manager.run_sweep(["239.1.1.1"], [5000], [64], 10, "1k", str(sweep_env), str(db))
+
+    assert exit_info.value.code == 1
+    rows = read_cube()
+    assert {(r["sender"], r["received"], r["error"]) for r in rows} == {
+        ("a", "10", ""), ("b", "", "send error"),
+    }
+    conn = mcast_results.connect(db)
+    assert conn.execute("SELECT COUNT(*) FROM results").fetchone() == (2,)
+
+
+@pytest.fixture
+def matrix_env(tmp_path, monkeypatch):
+    """HOSTS a, b, c; every receiver logs the payloads in `heard[receiver]`."""
+    heard = {}
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(mcast_manager, "HOSTS", ["a", "b", "c"])
+    monkeypatch.setattr(mcast_manager, "TRANSPORT", FakeTransport())
+    monkeypatch.setattr(mcast_manager, "deploy_scripts", lambda: None)
+    monkeypatch.setattr(mcast_manager, "start_receivers",
+                        lambda sender=None, options=None: ["a", "b", "c"])
+    monkeypatch.setattr(mcast_manager, "wait_for_packets", lambda receivers, expected=1: None)
+
+    def collect(sender, results_dir):
+        for receiver, payloads in heard.items():
+            with open(mcast_manager.Path(results_dir) / f"{receiver}_recv.log", "w") as f:
+                f.writelines(f"RECV from 10.0.0.9:5000 -> {p}\n" for p in payloads)
+
+    monkeypatch.setattr(mcast_manager, "stop_receivers_and_collect", collect)
+    return heard
+
+
+def test_matrix_writes_one_row_per_sender(matrix_env, tmp_path):
+    payload = mcast_manager.matrix_payload
+    matrix_env.update({
+        "a": [payload("a", 0), payload("b", 1), payload("c", 2)],
+        "b": [payload("b", 1), payload("a", 0)],
+        "c": [payload("c", 2), "unrelated line"],
+    })
+    db = tmp_path / "results.db"
+
+    mcast_manager.run_matrix(0, str(db))
+
+    [path] = mcast_manager.Path("results").glob("matrix_*/matrix.csv")
+    with open(path) as f:
+        assert list(csv.reader(f)) == [
+            ["sender", "a", "b", "c"],
+            ["a", "1", "1", "0"],
+            ["b", "1", "1", "0"],
+            ["c", "1", "0", "1"],
+        ]
+    conn = mcast_results.connect(db)
+    assert conn.execute("SELECT COUNT(*), SUM(received) FROM results").fetchone() == (9, 6)
+
+
+def test_matrix_tags_each_sender_with_its_slot(matrix_env):
+    mcast_manager.run_matrix(0)
+
+    sent = sorted((host, command.split("--msg ")[1]) for host, command in
+                  mcast_manager.TRANSPORT.commands)
+    assert sent == [(h, shlex.quote(mcast_manager.matrix_payload(h, slot)))
+                    for slot, h in enumerate(["a", "b", "c"])]
+
+
+def test_wait_remote_returns_once_condition_holds(tmp_path, monkeypatch):
+    monkeypatch.setattr(mcast_manager, "TRANSPORT", LocalTransport())
+    ready = tmp_path / "ready"
+    threading.Timer(0.3, ready.touch).start()
+
+    started = time.monotonic()
+    assert mcast_manager.wait_remote("h", f"[ -f {ready} ]", 10)
+    assert time.monotonic() - started < 5
+
+
+def test_wait_remote_gives_up_after_timeout(tmp_path, monkeypatch):
+    monkeypatch.setattr(mcast_manager, "TRANSPORT", LocalTransport())
+    assert not mcast_manager.wait_remote("h", f"[ -f {tmp_path / 'never'} ]", 0)
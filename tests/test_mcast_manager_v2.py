@@ -0,0 +1,108 @@
+import csv
+import importlib.util
+import time
+
+import pytest
+
+import mcast_results
+from transport import LocalTransport
+
+from conftest import ROOT
+
+spec = importlib.util.spec_from_file_location(
+    "mcast_manager_v2", ROOT / "version_2_group_multicast_packet" / "mcast_manager.py")
+mcast_manager_v2 = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mcast_manager_v2)
+
+
+class FakeReceiver:
+    def __init__(self, output):
+        self.output = output
+
+    def finish(self, timeout):
+        return self.output, False
+
+
+class FakeTransport:
+    def __init__(self, failed):
+        self.failed = failed
+
+    def call(self, host, command):
+        return self.failed.get(host, 0), ""
+
+
+def test_matrix_reports_failed_sender_and_exits_nonzero(tmp_path, monkeypatch):
+    monkeypatch.setattr(mcast_manager_v2, "HOSTS", ["a", "b"])
+    monkeypatch.setattr(mcast_manager_v2, "LOG_FILE", str(tmp_path / "matrix.csv"))
+    monkeypatch.setattr(mcast_manager_v2, "TRANSPORT", FakeTransport({"b": 1}))
+    monkeypatch.setattr(mcast_manager_v2, "deploy_scripts", lambda: None)
+    # every receiver hears a; b's send fails
+    heard_a = mcast_manager_v2.matrix_payload("a", 0)
+    monkeypatch.setattr(mcast_manager_v2, "start_receivers", lambda hosts, count, duration: {
+        h: FakeReceiver(heard_a) for h in hosts
+    })
+
+    with pytest.raises(SystemExit) as exit_info:
+        mcast_manager_v2.run_matrix(0)
+
+    assert exit_info.value.code == 1
+    with open(tmp_path / "matrix.csv") as f:
+        assert list(csv.reader(f)) == [
+            ["sender", "a", "b"], ["a", "1", "1"], ["b", "send error", "send error"],
+        ]
+
+
+def test_matrix_marks_each_heard_pair(tmp_path, monkeypatch):
+    monkeypatch.setattr(mcast_manager_v2, "HOSTS", ["a", "b"])
+    monkeypatch.setattr(mcast_manager_v2, "LOG_FILE", str(tmp_path / "matrix.csv"))
+    monkeypatch.setattr(mcast_manager_v2, "TRANSPORT", FakeTransport({}))
+    monkeypatch.setattr(mcast_manager_v2, "deploy_scripts", lambda: None)
+    payload = mcast_manager_v2.matrix_payload
+    outputs = {"a": f"{payload('a', 0)}\n{payload('b', 1)}\n", "b": f"{payload('b', 1)}\n"}
+    monkeypatch.setattr(mcast_manager_v2, "start_receivers", lambda hosts, count, duration: {
+        h: FakeReceiver(outputs[h]) for h in hosts
+    })
+    db = tmp_path / "results.db"
+
+    mcast_manager_v2.run_matrix(0, str(db))
+
+    with open(tmp_path / "matrix.csv") as f:
+        assert list(csv.reader(f)) == [["sender", "a", "b"], ["a", "1", "0"], ["b", "1", "1"]]
+    conn = mcast_results.connect(db)
+    assert conn.execute("SELECT COUNT(*), SUM(received) FROM results").fetchone() == (4, 3)
+
+
+class ScriptTransport(LocalTransport):
+    """Runs `script` locally in place of the receiver command."""
+
+    def __init__(self, script):
+        super().__init__()
+        self.script = script
+
+    def spawn(self, host, command):
+        return super().spawn(host, self.script)
+
+
+def test_receiver_is_ready_when_it_prints_ready(monkeypatch):
+    monkeypatch.setattr(mcast_manager_v2, "TRANSPORT",
+                        ScriptTransport("echo READY; sleep 0.2; echo 'RECV one'"))
+    receiver = mcast_manager_v2.Receiver("h")
+    assert receiver.wait_ready(10)
+    assert receiver.finish(10) == ("RECV one\n", False)
+
+
+def test_receiver_that_exits_without_joining_is_not_ready(monkeypatch):
+    monkeypatch.setattr(mcast_manager_v2, "TRANSPORT",
+                        ScriptTransport("echo 'bind failed'; exit 1"))
+    receiver = mcast_manager_v2.Receiver("h")
+    started = time.monotonic()
+    assert not receiver.wait_ready(10)
+    assert time.monotonic() - started < 5
+    assert receiver.finish(10) == ("bind failed\n", False)
+
+
+def test_silent_receiver_is_killed_after_timeout(monkeypatch):
+    monkeypatch.setattr(mcast_manager_v2, "TRANSPORT", ScriptTransport("echo READY; exec sleep 30"))
+    receiver = mcast_manager_v2.Receiver("h")
+    assert receiver.wait_ready(10)
+    assert receiver.finish(0.2) == ("", True)
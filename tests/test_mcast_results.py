@@ -0,0 +1,86 @@
+from datetime import datetime
+
+import mcast_results
+
+
+def store(db, mode, rows, minute=0):
+    with mcast_results.ResultStore(db, mode, datetime(2026, 1, 1, 0, minute)) as s:
+        for row in rows:
+            s.add(*row[:4], **row[4])
+        return s.run_id
+
+
+def test_hist_percentile():
+    hist = {"100": 50, "200": 49, "1000": 1}
+    assert mcast_results.hist_percentile(hist, 0.5) == 100.0
+    assert mcast_results.hist_percentile(hist, 0.99) == 200.0
+    assert mcast_results.hist_percentile(hist, 1.0) == 1000.0
+    assert mcast_results.hist_percentile({}, 0.5) is None
+    assert mcast_results.hist_percentile(None, 0.5) is None
+
+
+def test_add_summary_and_batched_flush(tmp_path, monkeypatch):
+    monkeypatch.setattr(mcast_results, "BATCH_ROWS", 2)
+    db = tmp_path / "r.db"
+    s = mcast_results.ResultStore(db, "matrix", datetime(2026, 1, 1))
+    s.add_summary("a", "b", 10, {"unique": 9, "jitter_us": 5.0,
+                                 "latency_us": {"hist": {"100": 9}}})
+    s.add_summary("a", "c", 10, None)
+    assert s.count == 2  # batch of two written before close
+    s.add("b", "a", 10, None)
+    s.close()
+    conn = mcast_results.connect(db)
+    assert list(mcast_results.list_runs(conn)) == [(1, "2026-01-01T00:00:00", "matrix", 3, 30, 9)]
+    row = conn.execute("SELECT received, p50_us, p99_us, jitter_us FROM results"
+                       " WHERE received = 9").fetchone()
+    assert row == (9, 100.0, 100.0, 5.0)
+
+
+def test_host_and_pair_summary(tmp_path):
+    db = tmp_path / "r.db"
+    store(db, "matrix", [("a", "b", 100, 90, {"p99_us": 300.0}),
+                         ("a", "c", 100, 100, {"p99_us": 100.0}),
+                         ("b", "a", 100, None, {})])  # never joined: ignored
+    run = store(db, "matrix", [("a", "b", 100, 50, {}), ("a", "c", 100, 100, {})], minute=1)
+    conn = mcast_results.connect(db)
+
+    assert list(mcast_results.host_summary(conn)) == [
+        ("a", "sender", 2, 200, 150, 25.0, None),
+        ("b", "receiver", 1, 100, 50, 50.0, None),
+        ("c", "receiver", 1, 100, 100, 0.0, None),
+    ]
+    assert list(mcast_results.pair_summary(conn)) == [
+        ("a", "b", 2, 200, 140, 30.0, 50.0, 300.0),
+        ("a", "c", 2, 200, 200, 0.0, 0.0, 100.0),
+    ]
+    assert list(mcast_results.pair_summary(conn, run_id=run, min_loss=1.0)) == [
+        ("a", "b", 1, 100, 50, 50.0, 50.0, None),
+    ]
+
+
+def test_regressions_against_previous_run_of_same_mode(tmp_path):
+    db = tmp_path / "r.db"
+    cell = {"sender_iface": "eth0", "receiver_iface": "eth0", "group": "239.1.1.1",
+            "port": 5000, "size": 64}
+    first = store(db, "matrix", [("a", "b", 100, 100, dict(cell, p99_us=100.0)),
+                                 ("a", "c", 100, 100, dict(cell, p99_us=100.0)),
+                                 ("a", "d", 100, 100, dict(cell, p99_us=100.0))])
+    store(db, "agents", [("a", "b", 100, 0, cell)], minute=1)
+    latest = store(db, "matrix", [("a", "b", 100, 95, dict(cell, p99_us=150.0)),
+                                  ("a", "c", 100, 100, dict(cell, p99_us=250.0)),
+                                  ("a", "d", 100, 100, dict(cell, p99_us=110.0))], minute=2)
+    conn = mcast_results.connect(db)
+
+    run_id, against, cursor = mcast_results.regressions(conn)
+    assert (run_id, against) == (latest, first)
+    assert list(cursor) == [
+        ("a", "b", "eth0", "eth0", "239.1.1.1", 5000, 64, 0.0, 5.0, 100.0, 150.0),
+        ("a", "c", "eth0", "eth0", "239.1.1.1", 5000, 64, 0.0, 0.0, 100.0, 250.0),
+    ]
+
+
+def test_regressions_without_earlier_run(tmp_path):
+    db = tmp_path / "r.db"
+    run = store(db, "matrix", [("a", "b", 1, 1, {})])
+    conn = mcast_results.connect(db)
+    assert mcast_results.regressions(conn) == (run, None, None)
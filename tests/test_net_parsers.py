@@ -0,0 +1,52 @@
+import io
+
+from net_parsers import parse_ifconfig, parse_route
+
+IFCONFIG = """\
+eth0: flags=4163<UP,BROADCAST,RUNNING,MULTICAST>  mtu 1500
+        inet 10.0.0.5  netmask 255.255.255.0  broadcast 10.0.0.255
+        inet6 fe80::1  prefixlen 64  scopeid 0x20<link>
+        ether 52:54:00:12:34:56  txqueuelen 1000  (Ethernet)
+        RX packets 10  bytes 1000 (1.0 KB)
+
+lo: flags=73<UP,LOOPBACK,RUNNING>  mtu 65536
+        inet 127.0.0.1  netmask 255.0.0.0
+        loop  txqueuelen 1000  (Local Loopback)
+"""
+
+ROUTE_N = """\
+Kernel IP routing table
+Destination     Gateway         Genmask         Flags Metric Ref    Use Iface
+0.0.0.0         10.0.0.1        0.0.0.0         UG    100    0        0 eth0
+10.0.0.0        0.0.0.0         255.255.255.0   U     0      0        0 eth0
+"""
+
+
+def test_parse_ifconfig_fields():
+    interfaces = parse_ifconfig(IFCONFIG)
+    assert list(interfaces) == ["eth0", "lo"]
+    assert interfaces["eth0"] == {
+        "flags": ["UP", "BROADCAST", "RUNNING", "MULTICAST"],
+        "inet": "10.0.0.5",
+        "inet6": "fe80::1",
+        "mac": "52:54:00:12:34:56",
+    }
+    assert interfaces["lo"]["inet"] == "127.0.0.1"
+    assert interfaces["lo"]["mac"] is None
+
+
+def test_parse_ifconfig_streams_lines():
+    assert parse_ifconfig(io.StringIO(IFCONFIG)) == parse_ifconfig(IFCONFIG)
+
+
+def test_parse_route_rows():
+    routes = parse_route(ROUTE_N)
+    assert routes[0] == {
+        "destination": "0.0.0.0", "gateway": "10.0.0.1", "genmask": "0.0.0.0",
+        "flags": "UG", "metric": 100, "ref": 0, "use": 0, "iface": "eth0",
+    }
+    assert [r["destination"] for r in routes] == ["0.0.0.0", "10.0.0.0"]
+
+
+def test_parse_route_without_header_is_empty():
+    assert parse_route("route: command not found\n") == []
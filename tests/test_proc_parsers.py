@@ -0,0 +1,53 @@
+import multi_host_environment_settings_extractor as extractor
+
+PROC_INTERFACES = """\
+#sysfs
+link eth0 0x1003 1 1 52:54:00:12:34:56
+link lo 0x9 772 1 00:00:00:00:00:00
+link eth1 0x1002 1 0 52:54:00:ab:cd:ef
+#inet6
+fe800000000000000000000000000001 02 40 20 80 eth0
+#inet
+2: eth0    inet 10.0.0.5/24 brd 10.0.0.255 scope global eth0
+2: eth0    inet 10.0.0.9/24 brd 10.0.0.255 scope global secondary eth0
+1: lo    inet 127.0.0.1/8 scope host lo
+"""
+
+PROC_ROUTE = """\
+Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\t\tMTU\tWindow\tIRTT
+eth0\t00000000\t0100000A\t0003\t0\t0\t100\t00000000\t0\t0\t0
+eth0\t0000000A\t00000000\t0001\t0\t0\t0\t00FFFFFF\t0\t0\t0
+"""
+
+
+def test_proc_interfaces_keeps_every_address():
+    interfaces = extractor.parse_proc_interfaces(PROC_INTERFACES)
+    # eth1 is down (no IFF_UP), so it is left out like ifconfig does
+    assert sorted(interfaces) == ["eth0", "lo"]
+    eth0 = interfaces["eth0"]
+    assert eth0["inet_all"] == ["10.0.0.5", "10.0.0.9"]
+    assert eth0["inet"] == "10.0.0.9"
+    assert eth0["inet6_all"] == ["fe80::1"]
+    assert eth0["mac"] == "52:54:00:12:34:56"
+    assert "RUNNING" in eth0["flags"] and "UP" in eth0["flags"]
+    assert interfaces["lo"]["mac"] is None
+    assert "LOOPBACK" in interfaces["lo"]["flags"]
+
+
+def test_proc_route_decodes_little_endian_hex():
+    routes = extractor.parse_proc_route(PROC_ROUTE)
+    assert routes == [
+        {"destination": "0.0.0.0", "gateway": "10.0.0.1", "genmask": "0.0.0.0",
+         "flags": "UG", "metric": 100, "ref": 0, "use": 0, "iface": "eth0"},
+        {"destination": "10.0.0.0", "gateway": "0.0.0.0", "genmask": "255.255.255.0",
+         "flags": "U", "metric": 0, "ref": 0, "use": 0, "iface": "eth0"},
+    ]
+
+
+def test_proc_parsers_fall_back_to_text_tools():
+    route_n = ("Kernel IP routing table\n"
+               "Destination Gateway Genmask Flags Metric Ref Use Iface\n"
+               "0.0.0.0 10.0.0.1 0.0.0.0 UG 100 0 0 eth0\n")
+    assert extractor.parse_proc_route(route_n)[0]["gateway"] == "10.0.0.1"
+    ifconfig = "eth0: flags=4163<UP,RUNNING>  mtu 1500\n        inet 10.0.0.5  netmask 255.0.0.0\n"
+    assert extractor.parse_proc_interfaces(ifconfig)["eth0"]["inet"] == "10.0.0.5"
@@ -0,0 +1,116 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+import recv_mcast
+from recv_mcast import SenderStats
+from send_mcast import send_stream
+
+MS = 1_000_000  # ns
+
+
+def feed(seqs, first=None):
+    stats = SenderStats("10.0.0.1", seqs[0] if first is None else first)
+    for seq in seqs:
+        stats.add(seq, 0, MS)
+    return stats.summary()
+
+
+def test_in_order_stream_is_lossless():
+    s = feed(list(range(100)))
+    assert (s["received"], s["unique"], s["lost"], s["loss_pct"]) == (100, 100, 0, 0.0)
+    assert (s["duplicates"], s["reordered"], s["gaps"]) == (0, 0, 0)
+    assert s["latency_us"]["mean"] == 1000.0
+
+
+def test_gap_counts_as_loss():
+    s = feed([0, 1, 2, 6, 7])
+    assert s["lost"] == 3 and s["gaps"] == 1 and s["max_gap"] == 3
+    assert s["loss_pct"] == round(100 * 3 / 8, 4)
+
+
+def test_late_packet_fills_gap_as_reordered():
+    s = feed([0, 1, 3, 2, 4])
+    assert s["lost"] == 0 and s["reordered"] == 1 and s["duplicates"] == 0
+
+
+def test_duplicates_are_not_unique():
+    s = feed([0, 1, 1, 2, 2, 2])
+    assert s["received"] == 6 and s["unique"] == 3 and s["duplicates"] == 3 and s["lost"] == 0
+
+
+def test_packet_older_than_window_is_late_not_duplicate():
+    seqs = list(range(recv_mcast.WINDOW + 10)) + [0]
+    s = feed(seqs)
+    assert s["late"] == 1 and s["duplicates"] == 0
+
+
+def test_jitter_follows_rfc3550():
+    stats = SenderStats("10.0.0.1", 0)
+    stats.add(0, 0, MS)
+    stats.add(1, 0, 3 * MS)  # transit differs by 2 ms
+    assert stats.summary()["jitter_us"] == 125.0  # 2000 us / 16
+
+
+def test_silent_stream_reports_total_loss():
+    s = recv_mcast.silent_stream("239.1.1.1", 5000, "0.0.0.0")
+    assert s["sender"] is None and s["received"] == 0 and s["loss_pct"] == 100.0
+
+
+def test_huge_sequence_jump_resets_window():
+    stats = SenderStats("10.0.0.1", 0)
+    stats.add(0, 0, MS)
+    stats.add(2 ** 40, 0, MS)
+    assert stats.seen == 1
+    stats.add(2 ** 40, 0, MS)
+    s = stats.summary()
+    assert s["unique"] == 2 and s["duplicates"] == 1
+    assert s["gaps"] == 1 and s["max_gap"] == 2 ** 40 - 1
+
+
+def test_tail_loss_needs_expected_count():
+    stats = SenderStats("10.0.0.1", 0)
+    for seq in range(5):
+        stats.add(seq, 0, MS)
+    assert stats.summary()["lost"] == 0  # packets 5..9 never arrived, but nothing says so
+    s = stats.summary(expected=10)
+    assert (s["expected"], s["lost"], s["loss_pct"]) == (10, 5, 50.0)
+
+
+def test_silent_stream_with_expected_count():
+    s = recv_mcast.silent_stream("239.1.1.1", 5000, "0.0.0.0", 10)
+    assert s["expected"] == 10 and s["lost"] == 10
+
+
+def test_receiver_reports_tail_loss_on_sigterm(tmp_path):
+    group, port = "239.1.1.90", 47000 + os.getpid() % 1000
+    ready, stats_file = tmp_path / "ready", tmp_path / "stats.json"
+    proc = subprocess.Popen(
+        [sys.executable, recv_mcast.__file__, "--group", group, "--port", str(port),
+         "--ready-file", str(ready), "--stats-file", str(stats_file), "--expect", "20"],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while not ready.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert ready.exists()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.connect((group, port))
+        send_stream(sock, 64, 3, count=10)  # the sender stops half way
+        sock.close()
+        time.sleep(0.2)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(10)
+    summary = json.loads(stats_file.read_text())
+    [stream] = summary["streams"]
+    if stream["sender"] is None:
+        pytest.skip("no loopback multicast here")
+    assert (stream["sender"], stream["unique"], stream["expected"], stream["lost"]) == (3, 10, 20, 10)
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+import fleet_sim
+import multi_host_environment_settings_extractor as extractor
+from transport import TransportError
+
+
+class FlakyFleet(fleet_sim.SimulatedFleet):
+    """Simulated hosts; each host in `failures` fails that many times with `status` first."""
+
+    def __init__(self, size, failures=None, status=255):
+        super().__init__(size, latency=0, jitter=0, connect_latency=0)
+        self.failures = dict(failures or {})
+        self.status = status
+        self.attempts = {}
+
+    def call(self, host, command, timeout=None):
+        self.attempts[host] = self.attempts.get(host, 0) + 1
+        if self.failures.get(host, 0) > 0:
+            self.failures[host] -= 1
+            raise TransportError(f"{host} unreachable", self.status)
+        return super().call(host, command, timeout)
+
+
+@pytest.fixture
+def fleet(monkeypatch):
+    def make(*args, **kwargs):
+        fleet = FlakyFleet(*args, **kwargs)
+        monkeypatch.setattr(extractor, "TRANSPORT", fleet)
+        return fleet
+    return make
+
+
+def complete(collected):
+    return all(parsed is not None for parsed in collected.values())
+
+
+def test_transient_failures_are_retried(fleet):
+    sim = fleet(3, {"sim0001": 2})
+    swept = extractor.collect_hosts(sim.hosts, parallel=2, retries=2, backoff=0.01, verbose=False)
+    assert [host for host, _ in swept] == sim.hosts
+    assert all(complete(collected) for _, collected in swept)
+    assert sim.attempts["sim0001"] == 3
+
+
+def test_retries_are_bounded(fleet):
+    sim = fleet(2, {"sim0000": 5})
+    swept = dict(extractor.collect_hosts(sim.hosts, parallel=2, retries=1, backoff=0.01,
+                                         verbose=False))
+    assert not complete(swept["sim0000"]) and complete(swept["sim0001"])
+    assert sim.attempts["sim0000"] == 2
+
+
+def test_non_transient_failures_are_not_retried(fleet):
+    sim = fleet(1, {"sim0000": 1}, status=1)
+    extractor.collect_hosts(sim.hosts, retries=3, backoff=0.01, verbose=False)
+    assert sim.attempts["sim0000"] == 1
+
+
+def test_backing_off_does_not_hold_up_fresh_hosts(fleet):
+    sim = fleet(4, {"sim0000": 1})
+    done = []
+    extractor.collect_hosts(sim.hosts, parallel=1, retries=1, backoff=0.2, verbose=False,
+                            on_done=lambda host, collected: done.append(host))
+    assert done == ["sim0001", "sim0002", "sim0003", "sim0000"]
+
+
+def test_transient_error_classification():
+    assert TransportError("x", 255).transient
+    assert TransportError("timed out", timed_out=True).transient
+    assert not TransportError("x", 1).transient
+    assert not TransportError("no such file").transient
+
+
+def test_journal_last_record_wins_and_torn_lines_are_skipped(tmp_path):
+    journal = extractor.SweepJournal(tmp_path / extractor.SWEEP_JOURNAL)
+    journal.start("20260101_000000", 2)
+    journal.record("a", "failed", {})
+    journal.record("b", "ok", {"routes": "b_routes_20260101_000000.json"})
+    journal.record("a", "ok", {"routes": "a_routes_20260101_000000.json"})
+    with open(journal.path, "a") as f:
+        f.write('{"host": "c", "sta')  # interrupted mid-write
+    run, records = journal.load()
+    assert run == "20260101_000000"
+    assert {host: r["status"] for host, r in records.items()} == {"a": "ok", "b": "ok"}
+
+
+def test_journal_without_file_is_empty(tmp_path):
+    assert extractor.SweepJournal(tmp_path / "missing.jsonl").load() == (None, {})
+
+
+def test_save_host_journals_and_load_host_reads_back(tmp_path, monkeypatch):
+    monkeypatch.setattr(extractor, "COLLECTORS", {"ifconfig": None, "routes": None})
+    journal = extractor.SweepJournal(tmp_path / extractor.SWEEP_JOURNAL)
+    journal.start("20260101_000000", 2)
+    full = {"ifconfig": {"eth0": {"inet": "10.0.0.5"}}, "routes": [{"destination": "0.0.0.0"}]}
+    extractor.save_host(journal, "a", full, tmp_path, "20260101_000000")
+    extractor.save_host(journal, "b", dict(full, routes=None), tmp_path, "20260101_000000")
+
+    _, records = journal.load()
+    assert records["a"]["status"] == "ok"
+    assert records["b"]["status"] == "failed"
+    assert records["b"]["files"] == {"ifconfig": "b_ifconfig_20260101_000000.json"}
+    assert extractor.load_host(tmp_path, records["a"]) == full
+    assert json.loads((tmp_path / "a_routes_20260101_000000.json").read_text()) == full["routes"]
@@ -0,0 +1,67 @@
+import json
+
+import multi_host_environment_settings_extractor as extractor
+
+
+def host(n, gateway="10.0.0.254"):
+    """A host on 10.0.0.0/24 with its own address and MAC; routes via `gateway`."""
+    ifconfig = {
+        "eth0": {"flags": ["UP", "BROADCAST", "RUNNING", "MULTICAST"], "inet": f"10.0.0.{n}",
+                 "inet6": None, "mac": f"02:00:00:00:00:{n:02x}"},
+        "lo": {"flags": ["UP", "LOOPBACK", "RUNNING"], "inet": "127.0.0.1", "inet6": "::1",
+               "mac": None},
+    }
+    routes = [
+        {"destination": "0.0.0.0", "gateway": gateway, "genmask": "0.0.0.0", "flags": "UG",
+         "metric": 0, "ref": 0, "use": n * 100, "iface": "eth0"},
+        {"destination": "10.0.0.0", "gateway": "0.0.0.0", "genmask": "255.255.255.0",
+         "flags": "U", "metric": 0, "ref": 0, "use": n, "iface": "eth0"},
+    ]
+    return {"ifconfig": ifconfig, "routes": routes}
+
+
+def fleet():
+    return [
+        ("web1", host(1)), ("web2", host(2)), ("web3", host(3)),
+        ("odd", host(4, gateway="10.0.0.253")),
+        ("half", dict(host(5), routes=None)),
+    ]
+
+
+def test_hosts_configured_alike_share_one_template():
+    groups = extractor.group_by_config(fleet()[:3])
+    assert [hosts for hosts, _ in groups.values()] == [["web1", "web2", "web3"]]
+    [(_, templates)] = groups.values()
+    assert templates["ifconfig"]["eth0"]["inet"] == "<self>"
+    assert templates["ifconfig"]["eth0"]["mac"] == "<mac>"
+    assert all("use" not in route for route in templates["routes"])
+
+
+def test_learn_roles_stores_each_template_once(tmp_path):
+    added = extractor.learn_roles(fleet(), tmp_path)
+    assert added == {"role-1": ["web1", "web2", "web3"]}  # odd and half are alone
+    assert len(list((tmp_path / "configs").glob("*.json"))) == 2
+    roles = json.loads((tmp_path / "roles.json").read_text())["roles"]
+    assert set(roles["role-1"]) == {"ifconfig", "routes", "hosts"}
+    assert extractor.learn_roles(fleet(), tmp_path) == {}
+
+
+def test_compare_roles_flags_outliers_and_partial_hosts(tmp_path):
+    extractor.learn_roles(fleet(), tmp_path)
+    results, diffs, assignment = extractor.compare_roles(fleet(), tmp_path)
+
+    assert assignment == {"web1": "role-1", "web2": "role-1", "web3": "role-1", "odd": None}
+    assert {key: status for key, status in results.items() if key.startswith("web")} == {
+        f"web{n}_{kind}": "PASS" for n in (1, 2, 3) for kind in ("ifconfig", "routes")
+    }
+    assert results["odd_ifconfig"] == "PASS" and results["odd_routes"] == "FAIL"
+    assert diffs["odd_routes"]["role"] == "role-1"
+    [change] = diffs["odd_routes"]["changed"]
+    assert change["fields"] == {"gateway": {"base": "10.0.0.254", "new": "10.0.0.253"}}
+    assert results["half_ifconfig"] == "PARTIAL" and results["half_routes"] == "NOT_COLLECTED"
+    assert list(diffs) == ["odd_routes"]
+
+
+def test_compare_roles_without_roles_is_missing_base(tmp_path):
+    results, _, assignment = extractor.compare_roles(fleet()[:1], tmp_path)
+    assert set(results.values()) == {"MISSING_BASE"} and assignment == {"web1": None}
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+import route_index
+
+
+def route(destination, genmask, gateway="0.0.0.0", metric=0, iface="eth0", flags="U"):
+    return {"destination": destination, "genmask": genmask, "gateway": gateway, "flags": flags,
+            "metric": metric, "ref": 0, "use": 0, "iface": iface}
+
+
+TABLE = [
+    route("0.0.0.0", "0.0.0.0", "10.0.0.1", 100, flags="UG"),
+    route("0.0.0.0", "0.0.0.0", "10.0.0.2", 600, "wlan0", flags="UG"),
+    route("10.0.0.0", "255.0.0.0"),
+    route("10.1.0.0", "255.255.0.0", iface="eth1"),
+    route("10.1.2.3", "255.255.255.255", iface="eth2", flags="UH"),
+    route("10.9.0.0", "255.255.0.0", flags="!"),
+]
+
+
+def lookup(destination, table=TABLE):
+    return route_index.RouteTable(table).lookup(route_index._ipv4(destination))
+
+
+def test_longest_prefix_wins():
+    assert lookup("10.1.2.3")["iface"] == "eth2"
+    assert lookup("10.1.2.4")["iface"] == "eth1"
+    assert lookup("10.200.0.1")["destination"] == "10.0.0.0"
+    assert lookup("8.8.8.8")["destination"] == "0.0.0.0"
+
+
+def test_lowest_metric_wins_for_the_same_prefix():
+    assert lookup("8.8.8.8")["gateway"] == "10.0.0.1"
+    assert lookup("8.8.8.8", list(reversed(TABLE)))["gateway"] == "10.0.0.1"
+
+
+def test_no_match_without_default_route():
+    assert lookup("192.168.1.1", TABLE[2:]) is None
+
+
+def test_reject_route_is_unreachable_and_hides_shorter_prefixes():
+    match = lookup("10.9.1.1")
+    assert route_index.is_reject(match)
+    assert route_index.describe(match).startswith("unreachable")
+
+
+@pytest.mark.parametrize("text", ["10", "10.1", "10.1.2", "1.2.3.4.5", "example"])
+def test_short_or_malformed_addresses_are_rejected(text):
+    with pytest.raises(OSError):
+        route_index._ipv4(text)
+
+
+def test_identical_tables_are_shared(tmp_path):
+    for host, table in (("a", TABLE), ("b", list(reversed(TABLE))), ("c", TABLE[2:])):
+        (tmp_path / f"{host}_routes_20260101_000000.json").write_text(json.dumps(table))
+    index = route_index.RouteIndex.from_directory(tmp_path)
+    assert index.hosts == ["a", "b", "c"]
+    assert index.table_count == 2
+    answers = {host: r and r["destination"] for host, _, r in index.lookup_many(["8.8.8.8"])}
+    assert answers == {"a": "0.0.0.0", "b": "0.0.0.0", "c": None}
+    (destination, groups), = index.summarize(["8.8.8.8"])
+    assert [hosts for _, hosts in groups] == [["a", "b"], ["c"]]
+
+
+def test_latest_snapshot_per_host_is_used(tmp_path):
+    (tmp_path / "a_routes_20260101_000000.json").write_text(json.dumps(TABLE))
+    (tmp_path / "a_routes_20260102_000000.json").write_text(json.dumps(TABLE[2:]))
+    assert route_index.RouteIndex.from_directory(tmp_path).lookup("a", "8.8.8.8") is None
@@ -0,0 +1,74 @@
+import errno
+import socket
+
+import pytest
+
+import send_mcast
+from send_mcast import HEADER, MAGIC, parse_rate, send_stream
+
+
+def test_parse_rate_suffixes():
+    assert parse_rate("100000") == 100000.0
+    assert parse_rate("100k") == 1e5
+    assert parse_rate("1.5M") == 1.5e6
+    assert parse_rate("1G") == 1e9
+
+
+def test_default_sender_id_from_iface():
+    assert send_mcast.default_sender_id("10.0.0.1") == 0x0A000001
+
+
+@pytest.fixture
+def udp_pair():
+    rx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    rx.bind(("127.0.0.1", 0))
+    rx.settimeout(2)
+    tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    tx.connect(rx.getsockname())
+    yield tx, rx
+    tx.close()
+    rx.close()
+
+
+def test_stream_packets_carry_header_and_sequence(udp_pair):
+    tx, rx = udp_pair
+    sent, dropped, _ = send_stream(tx, 100, 7, count=5)
+    assert (sent, dropped) == (5, 0)
+    for seq in range(5):
+        data = rx.recv(2048)
+        assert len(data) == 100
+        magic, sender_id, got_seq, sent_ns = HEADER.unpack_from(data)
+        assert (magic, sender_id, got_seq) == (MAGIC, 7, seq) and sent_ns > 0
+
+
+def test_pacing_holds_the_rate(udp_pair):
+    tx, _ = udp_pair
+    # 100 packets at 1000 pps in bursts of 10: bursts go out every 10 ms,
+    # the last one 90 ms after the first
+    sent, dropped, elapsed = send_stream(tx, HEADER.size, 1, rate=1000, burst=10, count=100)
+    assert sent == 100
+    assert 0.09 <= elapsed < 5
+
+
+def test_duration_bounds_a_paced_stream(udp_pair):
+    tx, _ = udp_pair
+    sent, _, elapsed = send_stream(tx, HEADER.size, 1, rate=200, duration=0.1)
+    assert 0.1 <= elapsed < 5
+    assert 1 <= sent <= 21  # at most one packet per 5 ms slot in 0.1 s
+
+
+class FullQueue:
+    """A socket whose every other send fails with ENOBUFS."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def send(self, buf):
+        self.calls += 1
+        if self.calls % 2 == 0:
+            raise OSError(errno.ENOBUFS, "No buffer space available")
+
+
+def test_refused_sends_are_counted_as_dropped():
+    sent, dropped, _ = send_stream(FullQueue(), HEADER.size, 1, count=10)
+    assert (sent, dropped) == (10, 5)
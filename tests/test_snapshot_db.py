@@ -0,0 +1,92 @@
+import snapshot_db
+from snapshot_store import canonical_json, content_hash
+
+
+def route(gateway, metric, iface="eth0", destination="0.0.0.0", genmask="0.0.0.0"):
+    return {"destination": destination, "gateway": gateway, "genmask": genmask, "flags": "UG",
+            "metric": metric, "ref": 0, "use": 0, "iface": iface}
+
+
+LAN = route("0.0.0.0", 0, destination="10.0.0.0", genmask="255.255.255.0")
+
+
+def record(db, runs, kind="routes"):
+    for i, data in enumerate(runs):
+        snapshot_db.record_run(db, f"20260101_0000{i:02d}", [("h", {kind: data})])
+    return snapshot_db.connect(db)
+
+
+def test_route_history_two_default_routes_is_one_state(tmp_path):
+    pair = [LAN, route("10.0.0.1", 100), route("10.0.0.1", 600, "wlan0")]
+    conn = record(tmp_path / "db.sqlite", [pair, list(reversed(pair)), pair])
+    assert snapshot_db.route_history(conn, "h") == [
+        ("2026-01-01T00:00:00", [("10.0.0.1", "0.0.0.0", "eth0", 100),
+                                 ("10.0.0.1", "0.0.0.0", "wlan0", 600)]),
+    ]
+
+
+def test_route_history_removal_and_return(tmp_path):
+    conn = record(tmp_path / "db.sqlite", [
+        [LAN, route("10.0.0.1", 100)],
+        [LAN, route("10.0.0.2", 100)],
+        [LAN],
+        [LAN, route("10.0.0.2", 100)],
+    ])
+    history = snapshot_db.route_history(conn, "h")
+    assert [(time[-2:], routes) for time, routes in history] == [
+        ("00", [("10.0.0.1", "0.0.0.0", "eth0", 100)]),
+        ("01", [("10.0.0.2", "0.0.0.0", "eth0", 100)]),
+        ("02", []),
+        ("03", [("10.0.0.2", "0.0.0.0", "eth0", 100)]),
+    ]
+
+
+def test_address_history_includes_secondary_and_ipv6(tmp_path):
+    def eth0(inet_all, inet6_all=()):
+        return {"eth0": {"flags": ["UP"], "inet": inet_all[-1], "inet6": None, "mac": "aa",
+                         "inet_all": list(inet_all), "inet6_all": list(inet6_all)}}
+
+    conn = record(tmp_path / "db.sqlite", [
+        eth0(["10.0.0.1"]),
+        eth0(["10.0.0.1"]),
+        eth0(["10.0.0.1", "10.0.0.9"]),
+        eth0(["10.0.0.1"], ["fe80::1"]),
+    ], kind="ifconfig")
+    history = snapshot_db.address_history(conn, "h")
+    assert [(time[-2:], name, addresses) for time, name, addresses in history] == [
+        ("00", "eth0", ["inet 10.0.0.1"]),
+        ("02", "eth0", ["inet 10.0.0.1", "inet 10.0.0.9"]),
+        ("03", "eth0", ["inet 10.0.0.1", "inet6 fe80::1"]),
+    ]
+
+
+def test_timeline_and_changed_since(tmp_path):
+    db = tmp_path / "db.sqlite"
+    conn = record(db, [[LAN], [LAN], [LAN, route("10.0.0.1", 100)]])
+    assert [row[1] for row in snapshot_db.host_timeline(conn, "h")] == ["routes", "routes"]
+    # The first snapshot is not drift; the change in the third run is
+    assert snapshot_db.changed_since(conn, "2026-01-01T00:00:00") == [
+        ("h", "routes", "2026-01-01T00:00:02", 1),
+    ]
+    assert snapshot_db.changed_since(conn, "2027-01-01") == []
+
+
+def test_snapshot_hash_matches_the_extractor_files(tmp_path):
+    conn = record(tmp_path / "db.sqlite", [[LAN]])
+    [(_, _, digest)] = snapshot_db.host_timeline(conn, "h")
+    assert digest == content_hash(canonical_json([LAN]))
+
+
+def test_changed_since_goes_by_run_time_not_id(tmp_path):
+    db = tmp_path / "db.sqlite"
+    snapshot_db.record_run(db, "20260101_000000", [("h", {"routes": [LAN]})])
+    snapshot_db.record_run(db, "20260101_000010", [("h", {"routes": [LAN, route("10.0.0.1", 1)]})])
+    # a resumed earlier sweep: new id, old timestamp
+    snapshot_db.record_run(db, "20260101_000005", [("h", {"routes": [LAN, route("10.0.0.2", 1)]})])
+    conn = snapshot_db.connect(db)
+    assert snapshot_db.changed_since(conn, "2026-01-01T00:00:08") == [
+        ("h", "routes", "2026-01-01T00:00:10", 1),
+    ]
+    assert snapshot_db.changed_since(conn, "2026-01-01T00:00:05") == [
+        ("h", "routes", "2026-01-01T00:00:05", 2),
+    ]
@@ -0,0 +1,53 @@
+import json
+
+import multi_host_environment_settings_extractor as extractor
+from snapshot_store import SnapshotStore, canonical_json, content_hash
+
+IFCONFIG = {"eth0": {"flags": ["UP"], "inet": "10.0.0.1", "inet6": None, "mac": None}}
+ROUTES = [{"destination": "0.0.0.0", "gateway": "10.0.0.254", "genmask": "0.0.0.0",
+           "flags": "UG", "metric": 0, "ref": 0, "use": 0, "iface": "eth0"}]
+
+
+def blobs(root):
+    return sorted(p.name for p in (root / "objects").glob("*/*.json"))
+
+
+def test_store_incremental_writes_only_changes(tmp_path):
+    root = tmp_path / "store"
+    swept = [("h1", {"ifconfig": IFCONFIG, "routes": ROUTES}), ("h2", {"ifconfig": IFCONFIG})]
+    extractor.store_incremental(swept, "20260101_000000", root)
+    # h1 and h2 share the ifconfig content: one blob for it
+    assert len(blobs(root)) == 2
+
+    _, entries = extractor.store_incremental(swept, "20260101_000100", root)
+    assert len(blobs(root)) == 2
+    assert [key for key, _, _ in entries] == ["h1_ifconfig", "h1_routes", "h2_ifconfig"]
+
+    moved = [dict(ROUTES[0], gateway="10.0.0.253")]
+    extractor.store_incremental([("h1", {"ifconfig": IFCONFIG, "routes": moved})],
+                                "20260101_000200", root)
+    store = SnapshotStore(root)
+    assert len(blobs(root)) == 3
+    assert [(r["timestamp"], r["changed"]) for r in store.history("h1_routes")] == [
+        ("20260101_000000", True), ("20260101_000100", False), ("20260101_000200", True),
+    ]
+    assert store.refs["h1_routes"] == {"hash": content_hash(canonical_json(moved)),
+                                       "timestamp": "20260101_000200"}
+    assert store.refs["h2_ifconfig"]["timestamp"] == "20260101_000000"
+    assert store.load(store.refs["h1_routes"]["hash"]) == moved
+
+
+def test_failed_collectors_are_not_stored(tmp_path):
+    root = tmp_path / "store"
+    _, entries = extractor.store_incremental([("h1", {"ifconfig": IFCONFIG, "routes": None})],
+                                             "20260101_000000", root)
+    assert [key for key, _, _ in entries] == ["h1_ifconfig"]
+    assert list(SnapshotStore(root).refs) == ["h1_ifconfig"]
+
+
+def test_unchanged_comparison_summary_is_not_rewritten(tmp_path):
+    summaries = tmp_path / "summaries"
+    extractor.save_comparison_summary({"h1_routes": "PASS"}, summaries, skip_unchanged=True)
+    extractor.save_comparison_summary({"h1_routes": "PASS"}, summaries, skip_unchanged=True)
+    [written] = summaries.glob("comparison_summary_*.json")
+    assert json.loads(written.read_text())["results"] == {"h1_routes": "PASS"}
@@ -0,0 +1,28 @@
+import threading
+import time
+
+from ssh_pool import SSHPool
+
+
+def test_concurrent_first_calls_open_one_connection(tmp_path):
+    pool = SSHPool(control_dir=str(tmp_path), connect_wait=5.0)
+    threads = [threading.Thread(target=pool.options, args=("host",)) for _ in range(2)]
+    for t in threads:
+        t.start()
+    time.sleep(0.2)
+    # one call opens the master, the other waits for its socket
+    assert sum(t.is_alive() for t in threads) == 1
+    open(pool.control_path("host"), "w").close()
+    for t in threads:
+        t.join(2)
+    assert not any(t.is_alive() for t in threads)
+    assert pool.stats() == {"opened": 1, "reused": 1}
+
+
+def test_master_that_never_comes_up_is_reopened(tmp_path):
+    pool = SSHPool(control_dir=str(tmp_path), connect_wait=0.1)
+    pool.options("host")
+    started = time.monotonic()
+    pool.options("host")
+    assert time.monotonic() - started < 1
+    assert pool.stats() == {"opened": 2, "reused": 0}
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+import timing
+
+
+@pytest.fixture
+def clean_timing(monkeypatch):
+    monkeypatch.setattr(timing, "_enabled", False)
+    timing.reset()
+    yield
+    timing.reset()
+
+
+def test_span_is_a_no_op_until_enabled(clean_timing):
+    with timing.span("ssh_command", "web1"):
+        pass
+    timing.record("parse", 0.5)
+    assert timing.summary()["phases"] == {}
+
+
+def test_spans_and_records_are_summarised_per_phase_and_host(clean_timing):
+    timing.enable()
+    with timing.span("ssh_command", "web1"):
+        pass
+    for seconds in (1.0, 2.0, 3.0, 4.0):
+        timing.record("parse", seconds, "web2")
+    timing.record("parse", 10.0, "web3")
+    timing.record("deploy", 0.25)
+
+    data = timing.summary()
+    assert data["phases"]["ssh_command"]["count"] == 1
+    assert data["phases"]["parse"] == {"count": 5, "total": 20.0, "p50": 3.0,
+                                       "p90": 10.0, "p99": 10.0, "max": 10.0}
+    assert data["hosts"]["web2"]["parse"]["p50"] == 2.0
+    assert data["slowest"]["parse"] == [["web2", 10.0], ["web3", 10.0]]
+    assert "deploy" in data["phases"] and "deploy" not in data["slowest"]
+
+
+def test_write_metrics_writes_json_and_prometheus_text(clean_timing, tmp_path):
+    timing.enable()
+    timing.record("ssh_command", 0.5, 'odd"host')
+    timing.record("ssh_command", 1.5, "web1")
+
+    json_path, prom_path = timing.write_metrics(tmp_path / "metrics", "extractor", "20261017")
+
+    assert json_path.name == "extractor_20261017.json"
+    data = json.loads(json_path.read_text())
+    assert data["tool"] == "extractor" and data["run"] == "20261017"
+    assert data["phases"]["ssh_command"]["total"] == 2.0
+
+    prom = prom_path.read_text().splitlines()
+    assert "# TYPE cec_phase_seconds summary" in prom
+    assert 'cec_phase_seconds_count{tool="extractor",phase="ssh_command"} 2' in prom
+    assert ('cec_host_phase_seconds{tool="extractor",phase="ssh_command",'
+            'host="odd\\"host",quantile="0.5"} 0.5') in prom
+    assert not list((tmp_path / "metrics").glob(".*.tmp"))
@@ -0,0 +1,73 @@
+import pytest
+
+import fleet_sim
+import multi_host_environment_settings_extractor as extractor
+from transport import LocalTransport, TransportError
+
+
+def test_local_call_and_run():
+    local = LocalTransport()
+    assert local.call("h", "echo out; echo err >&2; exit 3") == (3, "out\nerr\n")
+    assert local.run("h", "echo hi") == "hi\n"
+    with pytest.raises(TransportError) as e:
+        local.run("h", "exit 4")
+    assert e.value.status == 4 and not e.value.transient
+
+
+def test_local_timeout_is_transient():
+    with pytest.raises(TransportError) as e:
+        LocalTransport().run("h", "sleep 5", timeout=0.2)
+    assert e.value.timed_out and e.value.transient
+
+
+def test_local_os_errors_are_transport_errors(tmp_path, monkeypatch):
+    local = LocalTransport()
+    with pytest.raises(TransportError) as e:
+        local.copy_to("h", tmp_path / "missing", str(tmp_path / "dest"))
+    assert not e.value.transient
+    monkeypatch.setenv("PATH", str(tmp_path))  # no sh to run
+    for method in (local.call, local.run):
+        with pytest.raises(TransportError) as e:
+            method("h", "true")
+        assert not e.value.transient
+
+
+def test_collect_host_records_a_local_failure(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", str(tmp_path))
+    collected = extractor.collect_host("h", runner=extractor.local_command, verbose=False)
+    assert set(collected.values()) == {None}
+
+
+def test_local_proc_backend_collects_this_machine(monkeypatch):
+    monkeypatch.setattr(extractor, "COLLECTORS", dict(extractor.BACKENDS["proc"]))
+    collected = extractor.collect_host("localhost", runner=extractor.local_command, verbose=False)
+    assert "lo" in collected["ifconfig"]
+    assert collected["routes"] is not None
+
+
+def test_simulated_fleet_counts_connections_and_answers_collectors():
+    sim = fleet_sim.SimulatedFleet(2, latency=0, jitter=0, connect_latency=0, interfaces=3, routes=5)
+    ifconfig = extractor.parse_ifconfig(sim.run("sim0001", "/usr/sbin/ifconfig"))
+    assert sorted(ifconfig) == ["eth0", "eth1", "eth2", "lo"]
+    assert ifconfig["eth0"]["inet"] == "10.0.0.1"
+    sim.run("sim0001", "/sbin/route -n")
+    sim.run("sim0000", "true")
+    assert sim.stats() == {"opened": 2, "reused": 1}
+
+
+def test_simulated_fleet_sweep(monkeypatch):
+    sim = fleet_sim.SimulatedFleet(4, latency=0, jitter=0, connect_latency=0, routes=5)
+    monkeypatch.setattr(extractor, "TRANSPORT", sim)
+    swept = extractor.collect_hosts(sim.hosts, parallel=4, verbose=False)
+    assert [host for host, _ in swept] == sim.hosts
+    for _, collected in swept:
+        assert len(collected["ifconfig"]) == 5  # eth0..eth3 and lo
+        assert collected["routes"]
+    assert sim.stats() == {"opened": 4, "reused": 0}  # one batched session per host
+
+
+def test_simulated_failures_are_transient():
+    sim = fleet_sim.SimulatedFleet(1, latency=0, jitter=0, connect_latency=0, failure_rate=1.0)
+    with pytest.raises(TransportError) as e:
+        sim.call("sim0000", "true")
+    assert e.value.transient
@@ -0,0 +1,75 @@
+import types
+
+import pytest
+
+import fleet_sim
+import multi_host_environment_settings_extractor as extractor
+from transport import TransportError
+
+
+class Clock:
+    """Stands in for the time module in the extractor: sleep() only moves monotonic()."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class ScriptedFleet(fleet_sim.SimulatedFleet):
+    """One simulated host; poll n answers with script[n] ("up", "down" or "changed")."""
+
+    def __init__(self, script):
+        super().__init__(1, latency=0, jitter=0, connect_latency=0)
+        self.script = list(script)
+        self.polls = 0
+
+    def call(self, host, command, timeout=None):
+        step = self.script[min(self.polls, len(self.script) - 1)]
+        self.polls += 1
+        if step == "down":
+            raise TransportError(f"{host} unreachable", 255)
+        if step == "changed":
+            self.routes += 1
+        return super().call(host, command, timeout)
+
+
+@pytest.fixture
+def watch(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(extractor, "time", types.SimpleNamespace(
+        monotonic=clock.monotonic, sleep=clock.sleep,
+    ))
+
+    def run(script, cycles):
+        fleet = ScriptedFleet(script)
+        monkeypatch.setattr(extractor, "TRANSPORT", fleet)
+        extractor.watch_hosts(fleet.hosts, interval=10, max_interval=40, cycles=cycles)
+        return clock.sleeps
+    return run
+
+
+def test_stable_host_backs_off_to_max_interval(watch):
+    assert watch(["up"], cycles=5) == [10, 20, 40, 40]
+
+
+def test_unreachable_host_backs_off_too(watch, capsys):
+    assert watch(["down"], cycles=5) == [10, 20, 40, 40]
+    assert capsys.readouterr().out.count("[UNREACHABLE]") == 1
+
+
+def test_change_resets_the_interval(watch, capsys):
+    # up, stable, stable, routes change, stable
+    assert watch(["up", "up", "up", "changed", "up"], cycles=5) == [10, 20, 40, 10]
+    assert "[CHANGE] sim0000_routes" in capsys.readouterr().out
+
+
+def test_recovery_resets_the_interval(watch, capsys):
+    assert watch(["down", "down", "down", "up"], cycles=5) == [10, 20, 40, 10]
+    assert "[REACHABLE] sim0000" in capsys.readouterr().out
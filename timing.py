@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+timing.py
+
+Opt-in per-phase timing for the extractor and the multicast managers.
+
+    timing.enable()
+    with timing.span("ssh_command", host):
+        ...
+    timing.write_metrics("metrics", "extractor", stamp)
+
+Spans are recorded per (phase, host); host may be None for run-wide
+phases. write_metrics() writes <dir>/<tool>_<stamp>.json with count,
+total and p50/p90/p99/max per phase and per host, plus the slowest hosts
+per phase, and <dir>/<tool>.prom in the Prometheus text format (replaced
+atomically, for node_exporter's textfile collector).
+
+Disabled is the default: span() then returns one shared no-op context
+manager, so an instrumented call costs a global check and nothing else.
+"""
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+
+QUANTILES = (0.5, 0.9, 0.99)
+SLOWEST_HOSTS = 10
+
+_enabled = False
+_lock = threading.Lock()
+_samples = {}  # (phase, host) -> [seconds]
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("key", "start")
+
+    def __init__(self, key):
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        with _lock:
+            _samples.setdefault(self.key, []).append(elapsed)
+        return False
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+
+
+def span(phase, host=None):
+    """Context manager timing one `phase` (on `host`); a no-op unless enabled."""
+    if not _enabled:
+        return _NO_SPAN
+    return _Span((phase, host))
+
+
+def record(phase, seconds, host=None):
+    """Add a duration measured elsewhere."""
+    if _enabled:
+        with _lock:
+            _samples.setdefault((phase, host), []).append(seconds)
+
+
+def _stats(values):
+    values = sorted(values)
+    stats = {"count": len(values), "total": round(sum(values), 6)}
+    for q in QUANTILES:
+        # nearest rank
+        stats[f"p{round(q * 100)}"] = round(values[max(0, math.ceil(len(values) * q) - 1)], 6)
+    stats["max"] = round(values[-1], 6)
+    return stats
+
+
+def summary():
+    """
+    {"phases": {phase: stats}, "hosts": {host: {phase: stats}},
+    "slowest": {phase: [[host, total seconds], ...]}}
+    """
+    with _lock:
+        samples = {key: list(values) for key, values in _samples.items()}
+    by_phase, hosts = {}, {}
+    for (phase, host), values in samples.items():
+        by_phase.setdefault(phase, []).extend(values)
+        if host is not None:
+            hosts.setdefault(str(host), {})[phase] = _stats(values)
+    slowest = {}
+    for host, phases in hosts.items():
+        for phase, stats in phases.items():
+            slowest.setdefault(phase, []).append([host, stats["total"]])
+    for phase, totals in slowest.items():
+        totals.sort(key=lambda item: -item[1])
+        del totals[SLOWEST_HOSTS:]
+    return {
+        "phases": {phase: _stats(values) for phase, values in sorted(by_phase.items())},
+        "hosts": dict(sorted(hosts.items())),
+        "slowest": slowest,
+    }
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prometheus(tool, data):
+    lines = []
+    for metric, rows in (
+        ("cec_phase_seconds", [({"phase": p}, s) for p, s in data["phases"].items()]),
+        ("cec_host_phase_seconds", [({"phase": p, "host": h}, s)
+                                    for h, phases in data["hosts"].items()
+                                    for p, s in phases.items()]),
+    ):
+        lines.append(f"# HELP {metric} Time spent per phase{' and host' if 'host' in metric else ''}.")
+        lines.append(f"# TYPE {metric} summary")
+        for labels, stats in rows:
+            base = ",".join(f'{k}="{_label(v)}"' for k, v in {"tool": tool, **labels}.items())
+            for q in QUANTILES:
+                lines.append(f'{metric}{{{base},quantile="{q}"}} {stats[f"p{round(q * 100)}"]}')
+            lines.append(f"{metric}_sum{{{base}}} {stats['total']}")
+            lines.append(f"{metric}_count{{{base}}} {stats['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(directory, tool, stamp):
+    """Write <tool>_<stamp>.json and <tool>.prom into `directory`; returns both paths."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    data = {"tool": tool, "run": stamp, **summary()}
+    json_path = directory / f"{tool}_{stamp}.json"
+    with open(json_path, "w") as f:
+        json.dump(data, f, indent=2)
+    prom_path = directory / f"{tool}.prom"
+    tmp_path = directory / f".{tool}.prom.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(_prometheus(tool, data))
+    os.replace(tmp_path, prom_path)
+    return json_path, prom_path
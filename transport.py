@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+transport.py
+
+How the extractor and the multicast managers reach hosts.
+
+Every transport offers the same small interface:
+    call(host, command, timeout=None)        -> (exit status, output)
+    run(host, command, timeout=None)         -> output, TransportError on failure
+    copy_to(host, local_path, remote_path)   -> push a file
+    copy_from(host, remote_path, local_path) -> pull a file
+    spawn(host, command)                     -> Popen with a text stdout pipe
+    command_argv(host, command)              -> argv running command on host, for
+                                                callers that manage the process (asyncio)
+    stats()                                  -> {"opened": n, "reused": n}
+    close()
+
+SSHTransport runs ssh/scp through an SSHPool so each host keeps one
+master connection. LocalTransport runs everything on this machine.
+fleet_sim.SimulatedFleet implements the same interface for offline
+benchmarks.
+"""
+import os
+import shutil
+import subprocess
+
+from ssh_pool import SSHPool
+
+# ssh exits with 255 when it fails itself rather than the remote command
+SSH_ERROR_STATUS = 255
+
+
+class TransportError(Exception):
+    """A remote command could not be run or exited non-zero."""
+
+    def __init__(self, message, status=None, timed_out=False):
+        super().__init__(message)
+        self.status = status
+        self.timed_out = timed_out
+
+    @property
+    def transient(self):
+        """A timeout or ssh's own failure (exit 255: refused, reset, no route); worth retrying."""
+        return self.timed_out or self.status == SSH_ERROR_STATUS
+
+
+class SSHTransport:
+    """ssh/scp subprocesses multiplexed over one master connection per host."""
+
+    def __init__(self, pool=None, user=None, options=()):
+        self.pool = pool if pool is not None else SSHPool()
+        self.user = user
+        self.options = list(options)
+
+    def target(self, host):
+        return f"{self.user}@{host}" if self.user else host
+
+    def _ssh_argv(self, host, command, timeout=None):
+        target = self.target(host)
+        argv = ["ssh", *self.options, *self.pool.options(target)]
+        if timeout is not None:
+            argv += ["-o", f"ConnectTimeout={max(1, int(timeout))}"]
+        return argv + [target, command]
+
+    def call(self, host, command, timeout=None):
+        try:
+            proc = subprocess.run(
+                self._ssh_argv(host, command, timeout),
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                text=True, timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            raise TransportError(f"timed out after {timeout}s", timed_out=True)
+        except OSError as e:
+            raise TransportError(str(e))
+        return proc.returncode, proc.stdout
+
+    def run(self, host, command, timeout=None):
+        try:
+            return subprocess.check_output(
+                self._ssh_argv(host, command, timeout), text=True, timeout=timeout
+            )
+        except subprocess.CalledProcessError as e:
+            raise TransportError(str(e), e.returncode)
+        except subprocess.TimeoutExpired:
+            raise TransportError(f"timed out after {timeout}s", timed_out=True)
+        except OSError as e:
+            raise TransportError(str(e))
+
+    def _scp(self, host, source, dest, timeout=None):
+        argv = ["scp", *self.options, *self.pool.options(self.target(host)), source, dest]
+        try:
+            status = subprocess.call(argv, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            raise TransportError(f"scp timed out after {timeout}s", timed_out=True)
+        except OSError as e:
+            raise TransportError(str(e))
+        if status != 0:
+            raise TransportError(f"scp {source} -> {dest} exited with {status}", status)
+
+    def copy_to(self, host, local_path, remote_path, timeout=None):
+        self._scp(host, str(local_path), f"{self.target(host)}:{remote_path}", timeout)
+
+    def copy_from(self, host, remote_path, local_path, timeout=None):
+        self._scp(host, f"{self.target(host)}:{remote_path}", str(local_path), timeout)
+
+    def command_argv(self, host, command):
+        return self._ssh_argv(host, command)
+
+    def spawn(self, host, command):
+        return subprocess.Popen(
+            self._ssh_argv(host, command),
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True,
+        )
+
+    def stats(self):
+        return self.pool.stats()
+
+    def close(self):
+        self.pool.close()
+
+
+class LocalTransport:
+    """Runs every "remote" command on this machine with sh -c."""
+
+    def call(self, host, command, timeout=None):
+        try:
+            proc = subprocess.run(
+                ["sh", "-c", command],
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                text=True, timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            raise TransportError(f"timed out after {timeout}s", timed_out=True)
+        except OSError as e:
+            # no sh, EACCES, ...: not going to get better on retry
+            raise TransportError(str(e))
+        return proc.returncode, proc.stdout
+
+    def run(self, host, command, timeout=None):
+        try:
+            return subprocess.check_output(["sh", "-c", command], text=True, timeout=timeout)
+        except subprocess.CalledProcessError as e:
+            raise TransportError(str(e), e.returncode)
+        except subprocess.TimeoutExpired:
+            raise TransportError(f"timed out after {timeout}s", timed_out=True)
+        except OSError as e:
+            raise TransportError(str(e))
+
+    def copy_to(self, host, local_path, remote_path, timeout=None):
+        try:
+            shutil.copy(local_path, os.path.expanduser(remote_path))
+        except OSError as e:
+            raise TransportError(str(e))
+
+    def copy_from(self, host, remote_path, local_path, timeout=None):
+        try:
+            shutil.copy(os.path.expanduser(remote_path), local_path)
+        except OSError as e:
+            raise TransportError(str(e))
+
+    def command_argv(self, host, command):
+        return ["sh", "-c", command]
+
+    def spawn(self, host, command):
+        return subprocess.Popen(
+            ["sh", "-c", command],
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True,
+        )
+
+    def stats(self):
+        return {"opened": 0, "reused": 0}
+
+    def close(self):
+        pass
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3.10
+"""
+async_mcast_manager.py
+
+asyncio version of mcast_manager.py's --matrix mode, for large host lists.
+Hosts, paths and the transport come from mcast_manager.py's configuration.
+
+- Scripts are deployed with one ssh session per host: the file contents
+  travel inside the remote command, so there is no scp.
+- Every ssh session is an asyncio subprocess, and at most --max-sessions
+  run at once.
+- Receivers run in waves of --wave hosts. Within a wave, every host sends
+  one tagged packet in its own --stagger slot, once all of the wave's
+  receivers have printed READY.
+- Receiver output is parsed line by line as it arrives. Each heard
+  (sender, receiver) pair is appended to the CSV (and --jsonl) as soon as
+  it is seen. Pairs still missing when a wave ends are written as "fail",
+  or "not ready" for receivers that never joined.
+- With --metrics DIR, deploy, receiver start (spawn to READY), send and
+  each wave are timed per host (see timing.py).
+- With --db FILE, rows are also batched into an SQLite results store
+  (see mcast_results.py) as one "matrix" run.
+
+Usage: python3.10 async_mcast_manager.py [--max-sessions N] [--wave N] [--stagger S]
+                                         [--csv FILE] [--jsonl FILE] [--db FILE]
+                                         [--metrics DIR]
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import re
+import shlex
+import signal
+import time
+from datetime import datetime
+from pathlib import Path
+
+import mcast_manager as config
+from mcast_results import ResultStore
+import timing
+
+_RECEIVED_RE = re.compile(
+    r"Received multicast from (\S+): '" + re.escape(config.MATRIX_TAG) + r" from=(\S+) slot=(\d+)'"
+)
+
+class ResultWriter:
+    """
+    Appends result rows to a CSV (and optionally a JSON-lines file and a
+    ResultStore) as they arrive.
+    """
+
+    FIELDS = ["wave", "sender", "receiver", "result", "elapsed"]
+
+    def __init__(self, csv_path, jsonl_path=None, db_path=None):
+        self._csv_file = open(csv_path, "w", newline="")
+        self._csv = csv.writer(self._csv_file)
+        self._csv.writerow(self.FIELDS)
+        self._jsonl = open(jsonl_path, "w") if jsonl_path else None
+        self._store = ResultStore(db_path, "matrix") if db_path else None
+        self.counts = {}
+
+    def row(self, wave, sender, receiver, result, elapsed=None):
+        values = [wave, sender, receiver, result, None if elapsed is None else round(elapsed, 3)]
+        self._csv.writerow(values)
+        self._csv_file.flush()
+        if self._jsonl:
+            self._jsonl.write(json.dumps(dict(zip(self.FIELDS, values))) + "\n")
+            self._jsonl.flush()
+        if self._store:
+            received = None if result == "not ready" else int(result == "success")
+            self._store.add(sender, receiver, 1, received, group=config.GROUP, port=config.PORT)
+        self.counts[result] = self.counts.get(result, 0) + 1
+
+    def close(self):
+        self._csv_file.close()
+        if self._jsonl:
+            self._jsonl.close()
+        if self._store:
+            self._store.close()
+
+async def run_remote(host, command, sessions, on_line=None, timeout=None):
+    """
+    Run `command` on `host` in one of the `sessions` slots, calling
+    on_line(line) for each stdout line as it arrives. Returns the exit
+    status, or None if it was killed after `timeout` seconds.
+    """
+    async with sessions:
+        # in a thread: the pool may wait up to connect_wait for the host's master socket
+        argv = await asyncio.to_thread(config.TRANSPORT.command_argv, host, command)
+        proc = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+        def kill():
+            # the whole group: a child left holding stdout would keep the pipe open
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+        async def pump():
+            async for raw in proc.stdout:
+                if on_line:
+                    on_line(raw.decode(errors="replace").rstrip("\n"))
+
+        try:
+            await asyncio.wait_for(pump(), timeout)
+        except asyncio.TimeoutError:
+            kill()
+            await proc.wait()
+            return None
+        except asyncio.CancelledError:
+            kill()
+            await proc.wait()
+            raise
+        return await proc.wait()
+
+def deploy_command():
+    """One shell command that writes both scripts into REMOTE_DIR."""
+    parts = [f"mkdir -p {config.REMOTE_DIR}"]
+    for name in (config.SEND_SCRIPT, config.RECV_SCRIPT):
+        text = Path(__file__).with_name(name).read_text()
+        parts.append(f"cat > {config.REMOTE_DIR}/{name} <<'CEC_EOF'\n{text}\nCEC_EOF")
+    return "\n".join(parts) + "\n"
+
+async def deploy(sessions):
+    command = deploy_command()
+
+    async def deploy_one(host):
+        with timing.span("deploy", host):
+            return await run_remote(host, command, sessions)
+
+    statuses = await asyncio.gather(*(deploy_one(h) for h in config.HOSTS))
+    for host, status in zip(config.HOSTS, statuses):
+        if status != 0:
+            print(f"[{host}] deploy failed (status {status})")
+
+async def run_wave(number, receivers, sessions, stagger, writer):
+    hosts = config.HOSTS
+    window = config.READY_TIMEOUT + len(hosts) * stagger + config.RECV_TIMEOUT
+    ready = {r: asyncio.Event() for r in receivers}
+    heard = set()
+    started = None
+    spawned = time.perf_counter()
+
+    def on_line(receiver):
+        def handle(line):
+            if line.strip() == "READY":
+                timing.record("start", time.perf_counter() - spawned, receiver)
+                ready[receiver].set()
+                return
+            m = _RECEIVED_RE.search(line)
+            if m and (m.group(2), receiver) not in heard:
+                heard.add((m.group(2), receiver))
+                elapsed = time.monotonic() - started if started else None
+                writer.row(number, m.group(2), receiver, "success", elapsed)
+        return handle
+
+    recv_cmd = (f"cd {config.REMOTE_DIR} && python3.10 {config.RECV_SCRIPT} "
+                f"--count {len(hosts)} --duration {window:g}")
+    recv_tasks = [
+        asyncio.create_task(run_remote(r, recv_cmd, sessions, on_line(r), window + 5))
+        for r in receivers
+    ]
+
+    # Send as soon as every receiver has joined; READY_TIMEOUT is only an upper bound
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*(e.wait() for e in ready.values())), config.READY_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        pass
+    started = time.monotonic()
+
+    async def fire(slot, sender):
+        await asyncio.sleep(slot * stagger)
+        msg = config.matrix_payload(sender, slot)
+        with timing.span("send", sender):
+            await run_remote(
+                sender,
+                f"cd {config.REMOTE_DIR} && python3.10 {config.SEND_SCRIPT} --msg {shlex.quote(msg)}",
+                sessions,
+            )
+
+    await asyncio.gather(*(fire(slot, h) for slot, h in enumerate(hosts)))
+    # Receivers exit by themselves once they have heard every sender
+    try:
+        await asyncio.wait_for(asyncio.gather(*recv_tasks), config.RECV_TIMEOUT)
+    except asyncio.TimeoutError:
+        pass
+    for task in recv_tasks:
+        task.cancel()
+    await asyncio.gather(*recv_tasks, return_exceptions=True)
+
+    for r in receivers:
+        for sender in hosts:
+            if (sender, r) not in heard:
+                writer.row(number, sender, r, "fail" if ready[r].is_set() else "not ready")
+
+async def run(args):
+    sessions = asyncio.Semaphore(args.max_sessions)
+    writer = ResultWriter(args.csv, args.jsonl, args.db)
+    try:
+        print(f"Deploying to {len(config.HOSTS)} hosts...")
+        await deploy(sessions)
+        waves = [config.HOSTS[i:i + args.wave] for i in range(0, len(config.HOSTS), args.wave)]
+        for number, receivers in enumerate(waves):
+            print(f"Wave {number + 1}/{len(waves)}: {len(receivers)} receivers, "
+                  f"{len(config.HOSTS)} senders")
+            with timing.span("wave"):
+                await run_wave(number, receivers, sessions, args.stagger, writer)
+    finally:
+        writer.close()
+    total = len(config.HOSTS) ** 2
+    print(f"\n✅ {writer.counts.get('success', 0)}/{total} pairs heard "
+          f"({writer.counts.get('fail', 0)} fail, {writer.counts.get('not ready', 0)} not ready). "
+          f"Results saved to: {args.csv}")
+
+def parse_args():
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    p = argparse.ArgumentParser(description="Concurrent multicast reachability matrix.")
+    p.add_argument("--max-sessions", type=int, default=64,
+                   help="most ssh sessions open at once")
+    p.add_argument("--wave", type=int, default=None,
+                   help="receivers per wave (default: half of --max-sessions)")
+    p.add_argument("--stagger", type=float, default=0.05, help="seconds between sender slots")
+    p.add_argument("--csv", default=f"mcast_matrix_{stamp}.csv")
+    p.add_argument("--jsonl", default=None, help="also write rows as JSON lines")
+    p.add_argument("--db", default=None, help="also store rows in this SQLite file (mcast_results.py)")
+    p.add_argument("--metrics", default=None, help="write per-phase, per-host timings to this directory")
+    args = p.parse_args()
+    # receivers hold their session for the whole wave; leave room for senders
+    if args.wave is None:
+        args.wave = max(1, args.max_sessions // 2)
+    if args.wave >= args.max_sessions:
+        p.error("--wave must be smaller than --max-sessions")
+    return args
+
+def main():
+    args = parse_args()
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if args.metrics:
+        timing.enable()
+    try:
+        asyncio.run(run(args))
+    finally:
+        stats = config.TRANSPORT.stats()
+        config.TRANSPORT.close()
+        print(f"SSH connections opened: {stats['opened']}, reused: {stats['reused']}")
+        if args.metrics:
+            paths = timing.write_metrics(args.metrics, "async_mcast_manager", stamp)
+            print("Timings in", " and ".join(str(p) for p in paths))
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,19 @@
 #!/usr/bin/env python3.10
-import subprocess
+import argparse
+import re
+import shlex
+import threading
 import time
 import csv
 import os
+import sys
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from transport import SSHTransport, TransportError
+from mcast_results import ResultStore
+import timing
 
 # --- Configuration ---
 USER = "yourusername"   # <-- change this
@@ -13,30 +23,134 @@ GROUP = "239.1.1.1"
 PORT = 5000
 SEND_SCRIPT = "send_mcast.py"
 RECV_SCRIPT = "recv_mcast.py"
+MATRIX_TAG = "cec-matrix"
+READY_TIMEOUT = 10  # max seconds for a receiver to print READY
+RECV_TIMEOUT = 5    # max seconds to wait for packets once sending is done
 
 # CSV log file
 LOG_FILE = f"mcast_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
 
-def run_cmd(cmd):
-    """Run a shell command and return the result."""
-    return subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+# How ssh/scp reach the hosts; one multiplexed master connection per host.
+# Swap for transport.LocalTransport or fleet_sim.SimulatedFleet to run offline.
+TRANSPORT = SSHTransport(user=USER, options=[
+    "-o", "StrictHostKeyChecking=no",
+    "-o", "UserKnownHostsFile=/dev/null",
+])
 
 def scp_to(host, filename):
     """Copy a file to the remote host."""
-    cmd = f"scp -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null {filename} {USER}@{host}:{REMOTE_DIR}/"
-    return run_cmd(cmd)
+    try:
+        TRANSPORT.copy_to(host, filename, f"{REMOTE_DIR}/")
+    except TransportError as e:
+        print(f"[{host}] copy of {filename} failed: {e}")
 
 def ssh(host, command):
-    """Run an SSH command on a remote host."""
-    cmd = f"ssh -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null {USER}@{host} '{command}'"
-    return run_cmd(cmd)
+    """Run an SSH command on a remote host; returns (exit status, output)."""
+    try:
+        return TRANSPORT.call(host, command)
+    except TransportError as e:
+        return 255, str(e)
 
 def ensure_remote_dir(host):
     """Ensure remote directory exists."""
     ssh(host, f"mkdir -p {REMOTE_DIR}")
 
+class Receiver:
+    """A remote recv_mcast.py whose output is read line by line as it arrives."""
+
+    def __init__(self, host, count=1, duration=None):
+        if duration is None:
+            duration = READY_TIMEOUT + RECV_TIMEOUT
+        cmd = f"cd {REMOTE_DIR} && python3.10 {RECV_SCRIPT} --count {count} --duration {duration:g}"
+        self.host = host
+        self.started = time.perf_counter()
+        self.proc = TRANSPORT.spawn(host, cmd)
+        self.lines = []
+        self.is_ready = False
+        self._ready = threading.Event()
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        for line in self.proc.stdout:
+            if line.strip() == "READY":
+                timing.record("start", time.perf_counter() - self.started, self.host)
+                self.is_ready = True
+                self._ready.set()
+            else:
+                self.lines.append(line)
+        self._ready.set()  # exited without joining; stop waiting for it
+
+    def wait_ready(self, timeout):
+        """True once the receiver has joined the group."""
+        self._ready.wait(timeout)
+        return self.is_ready
+
+    def finish(self, timeout):
+        """
+        Wait for the receiver to exit by itself (it stops after --count
+        packets). Returns (output, timed_out); kills it after `timeout`.
+        """
+        with timing.span("collect", self.host):
+            self._reader.join(max(0, timeout))
+            timed_out = self._reader.is_alive()
+            if timed_out:
+                self.proc.kill()
+                self._reader.join()
+            self.proc.wait()
+        return "".join(self.lines), timed_out
+
+def start_receivers(hosts, count=1, duration=None):
+    """Spawn a Receiver on each host and wait (at most READY_TIMEOUT) until all have joined."""
+    receivers = {h: Receiver(h, count, duration) for h in hosts}
+    deadline = time.monotonic() + READY_TIMEOUT
+    for h, receiver in receivers.items():
+        if not receiver.wait_ready(deadline - time.monotonic()):
+            print(f"[{h}] receiver not ready after {READY_TIMEOUT}s")
+    return receivers
+
+def deploy_scripts():
+    """Copy the send/receive scripts to all hosts."""
+    for host in HOSTS:
+        print(f"\nCopying scripts to {host}...")
+        with timing.span("deploy", host):
+            ensure_remote_dir(host)
+            scp_to(host, SEND_SCRIPT)
+            scp_to(host, RECV_SCRIPT)
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Multicast reachability test across HOSTS.")
+    p.add_argument("--matrix", action="store_true",
+                   help="run all senders in one window instead of one round per sender")
+    p.add_argument("--stagger", type=float, default=0.2,
+                   help="seconds between sender slots in --matrix mode (0 = all at once)")
+    p.add_argument("--db", metavar="FILE", default=None,
+                   help="also store results in this SQLite file (mcast_results.py)")
+    p.add_argument("--metrics", metavar="DIR", default=None,
+                   help="write per-phase, per-host timings to DIR (JSON and Prometheus textfile)")
+    return p.parse_args()
+
 def main():
+    args = parse_args()
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if args.metrics:
+        timing.enable()
+    try:
+        if args.matrix:
+            run_matrix(args.stagger, args.db)
+        else:
+            run_tests(args.db)
+    finally:
+        stats = TRANSPORT.stats()
+        TRANSPORT.close()
+        print(f"SSH connections opened: {stats['opened']}, reused: {stats['reused']}")
+        if args.metrics:
+            paths = timing.write_metrics(args.metrics, "mcast_manager_v2", stamp)
+            print("Timings in", " and ".join(str(p) for p in paths))
+
+def run_tests(db=None):
     print("=== Multicast Test Orchestrator ===")
+    store = ResultStore(db, "rounds") if db else None
 
     # --- Prepare CSV log file ---
     with open(LOG_FILE, "w", newline="") as f:
@@ -44,51 +158,41 @@ def main():
         writer.writerow(["sender", "receiver", "result"])
 
     # --- Copy scripts to all hosts ---
-    for host in HOSTS:
-        print(f"\nCopying scripts to {host}...")
-        ensure_remote_dir(host)
-        scp_to(host, SEND_SCRIPT)
-        scp_to(host, RECV_SCRIPT)
+    deploy_scripts()
 
     # --- Main test loop ---
     for sender in HOSTS:
         receivers = [h for h in HOSTS if h != sender]
         print(f"\n=== Round: Sender = {sender} ===")
 
-        # Start receivers
-        recv_procs = {}
-        for r in receivers:
-            cmd = f"cd {REMOTE_DIR} && python3.10 {RECV_SCRIPT}"
-            recv_procs[r] = subprocess.Popen(
-                f"ssh -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null {USER}@{r} '{cmd}'",
-                shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-            )
-
-        time.sleep(2)  # Give receivers time to start
+        # Start receivers; each exits after its first packet
+        recv_procs = start_receivers(receivers)
 
         # Send from sender
         print(f"Sending multicast from {sender}...")
         send_cmd = f"cd {REMOTE_DIR} && python3.10 {SEND_SCRIPT}"
-        ssh(sender, send_cmd)
-
-        time.sleep(6)  # Allow receivers to finish
+        with timing.span("send", sender):
+            ssh(sender, send_cmd)
 
         # Collect receiver output and write to CSV
         results = []
-        for r, proc in recv_procs.items():
-            try:
-                out, err = proc.communicate(timeout=3)
-                success = "✅" in out or "Received multicast" in out
-                result = "success" if success else "fail"
-                results.append((sender, r, result))
-            except subprocess.TimeoutExpired:
-                proc.kill()
+        deadline = time.monotonic() + RECV_TIMEOUT
+        for r, receiver in recv_procs.items():
+            out, timed_out = receiver.finish(deadline - time.monotonic())
+            if timed_out:
                 results.append((sender, r, "timeout"))
+            else:
+                success = "✅" in out or "Received multicast" in out
+                results.append((sender, r, "success" if success else "fail"))
 
         # Write to CSV
         with open(LOG_FILE, "a", newline="") as f:
             writer = csv.writer(f)
             writer.writerows(results)
+        if store:
+            for sender_, receiver, result in results:
+                store.add(sender_, receiver, 1, int(result == "success"), group=GROUP, port=PORT)
+            store.flush()
 
         # Print summary
         print("\nResults:")
@@ -97,7 +201,85 @@ def main():
             print(f"  {icon} {receiver} - {result}")
         print("\n----------------------------------------")
 
+    if store:
+        store.close()
     print(f"\n✅ All tests complete. Results saved to: {LOG_FILE}")
 
+def matrix_payload(sender, slot):
+    return f"{MATRIX_TAG} from={sender} slot={slot}"
+
+_MATRIX_RE = re.compile(re.escape(MATRIX_TAG) + r" from=(\S+) slot=\d+")
+
+def run_matrix(stagger, db=None):
+    """
+    One window for all senders: a receiver on every host listens for the
+    whole run while each host sends one tagged packet in its own slot.
+    Writes an N x N matrix to LOG_FILE (one row per sender, 1 = received,
+    "send error" when the sender failed) and exits 1 if any sender failed.
+    """
+    print("=== Multicast Matrix Test ===")
+    deploy_scripts()
+
+    # Receivers exit once they have one packet per host; the duration is only an upper bound
+    window = READY_TIMEOUT + len(HOSTS) * stagger + RECV_TIMEOUT
+    recv_procs = start_receivers(HOSTS, count=len(HOSTS), duration=window)
+
+    errors = {}
+    def fire(slot, sender):
+        time.sleep(slot * stagger)
+        msg = matrix_payload(sender, slot)
+        cmd = f"cd {REMOTE_DIR} && python3.10 {SEND_SCRIPT} --msg {shlex.quote(msg)}"
+        try:
+            with timing.span("send", sender):
+                status, _ = ssh(sender, cmd)
+        except Exception as e:
+            errors[sender] = str(e) or type(e).__name__
+            return
+        if status != 0:
+            errors[sender] = f"exit status {status}"
+
+    print(f"Sending from {len(HOSTS)} hosts, {stagger}s apart...")
+    senders = [threading.Thread(target=fire, args=(slot, h)) for slot, h in enumerate(HOSTS)]
+    for t in senders:
+        t.start()
+    for t in senders:
+        t.join()
+
+    # Collect receiver output; each tagged line is one heard (sender, receiver) pair
+    heard = set()
+    deadline = time.monotonic() + RECV_TIMEOUT
+    for r, receiver in recv_procs.items():
+        out, timed_out = receiver.finish(deadline - time.monotonic())
+        for m in _MATRIX_RE.finditer(out):
+            heard.add((m.group(1), r))
+
+    with open(LOG_FILE, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["sender"] + HOSTS)
+        for sender in HOSTS:
+            if sender in errors:
+                writer.writerow([sender] + ["send error"] * len(HOSTS))
+            else:
+                writer.writerow([sender] + [int((sender, r) in heard) for r in HOSTS])
+    if db:
+        with ResultStore(db, "matrix") as store:
+            for sender in HOSTS:
+                if sender in errors:
+                    continue
+                for r in HOSTS:
+                    store.add(sender, r, 1, int((sender, r) in heard), group=GROUP, port=PORT)
+
+    print("\nMatrix (rows: sender, columns: receiver):")
+    for sender in HOSTS:
+        if sender in errors:
+            print(f"  {sender:<20} send error: {errors[sender]}")
+            continue
+        row = " ".join("✅" if (sender, r) in heard else "❌" for r in HOSTS)
+        print(f"  {sender:<20} {row}")
+    print(f"\n✅ {len(heard)}/{len(HOSTS) ** 2} pairs heard. Matrix saved to: {LOG_FILE}")
+    if errors:
+        print(f"❌ {len(errors)} senders failed to send: {', '.join(errors)}")
+        sys.exit(1)
+
 if __name__ == "__main__":
     main()
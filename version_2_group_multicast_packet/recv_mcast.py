@@ -1,4 +1,5 @@
 #!/usr/bin/env python3.10
+import argparse
 import socket
 import struct
 import sys
@@ -10,8 +11,15 @@ PORT = 5000
 LISTEN_TIME = 5  # seconds
 
 def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--duration", type=float, default=LISTEN_TIME,
+                   help="seconds to listen for")
+    p.add_argument("--count", type=int, default=1,
+                   help="stop after this many packets (0 = listen for the whole duration)")
+    args = p.parse_args()
+
     hostname = platform.node()
-    print(f"[{hostname}] Listening for multicast on {GROUP}:{PORT} for {LISTEN_TIME}s...")
+    print(f"[{hostname}] Listening for multicast on {GROUP}:{PORT} for {args.duration}s...", flush=True)
 
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
     sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -19,14 +27,25 @@ def main():
 
     mreq = struct.pack("4sl", socket.inet_aton(GROUP), socket.INADDR_ANY)
     sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
-    sock.settimeout(LISTEN_TIME)
+    print("READY", flush=True)  # group joined; the manager can start sending
 
+    deadline = time.monotonic() + args.duration
+    received = 0
     try:
-        data, addr = sock.recvfrom(1024)
-        msg = data.decode().strip()
-        print(f"[{hostname}] ✅ Received multicast from {addr[0]}: '{msg}'")
-    except socket.timeout:
-        print(f"[{hostname}] ❌ No multicast received.")
+        while args.count == 0 or received < args.count:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            sock.settimeout(remaining)
+            try:
+                data, addr = sock.recvfrom(1024)
+            except socket.timeout:
+                break
+            received += 1
+            msg = data.decode(errors="replace").strip()
+            print(f"[{hostname}] ✅ Received multicast from {addr[0]}: '{msg}'", flush=True)
+        if not received:
+            print(f"[{hostname}] ❌ No multicast received.")
     finally:
         sock.close()
 
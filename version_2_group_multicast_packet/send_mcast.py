@@ -1,4 +1,5 @@
 #!/usr/bin/env python3.10
+import argparse
 import socket
 import sys
 import time
@@ -9,16 +10,22 @@ PORT = 5000
 MESSAGE = f"Multicast test from {platform.node()}"
 
 def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--msg", default=MESSAGE, help="payload to send")
+    args = p.parse_args()
+
+    sock = None
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
         ttl = 2
         sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
-        sock.sendto(MESSAGE.encode(), (GROUP, PORT))
-        print(f"[SENDER] Sent multicast: '{MESSAGE}' to {GROUP}:{PORT}")
+        sock.sendto(args.msg.encode(), (GROUP, PORT))
+        print(f"[SENDER] Sent multicast: '{args.msg}' to {GROUP}:{PORT}")
     except Exception as e:
         print(f"[SENDER] Error sending multicast: {e}")
     finally:
-        sock.close()
+        if sock:
+            sock.close()
 
 if __name__ == "__main__":
     main()